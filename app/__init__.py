@@ -1 +1,105 @@
-# This file makes the app directory a Python package 
\ No newline at end of file
+"""
+GrameenConnect application factory.
+
+    from app import create_app
+    app = create_app()
+
+Creating an app only configures it. The schema is set up once, before
+serving, with `python -m app.models.database`; connections, the writer
+thread and the task workers start with the first request that needs them.
+"""
+import logging
+import os
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+logger = logging.getLogger(__name__)
+
+def create_app(config=None):
+    """Create the Flask app; `config` is a dict of settings overriding the defaults"""
+    # Imported here so `python -m app.<module>` tools don't load Flask and every view
+    from flask import Flask
+    from app.log import init_app as init_log
+    from app.metrics import init_app as init_metrics
+    from app.models.database import init_app as init_db
+    from app.tasks import init_app as init_tasks
+    from app.passwords import init_app as init_passwords
+    from app.assets import init_app as init_assets
+    from app.vendor import init_app as init_vendor
+    from app.compression import init_app as init_compression
+    from app.images import image_sources
+    from app.views import main
+
+    app = Flask(__name__, static_folder='static', template_folder='templates')
+    app.secret_key = 'grameenconnect_secret_key'  # Change this in production
+
+    app.config['UPLOAD_FOLDER'] = os.path.join(ROOT, 'app', 'static', 'images', 'uploads')
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16 MB max upload
+    # Raw uploads wait here until a background task has made their variants (see app/images.py)
+    app.config['UPLOAD_SPOOL_FOLDER'] = os.path.join(ROOT, 'spool')
+
+    # Listing pages: rows per page and whether to show a (cached) total count
+    app.config['PAGE_SIZE'] = 20
+    app.config['LISTING_SHOW_TOTAL'] = False
+    app.config['LISTING_TOTAL_TTL'] = 60  # seconds
+
+    # Rendered public pages for anonymous visitors (see app/cache.py); set
+    # PAGE_CACHE_DIR to share the cache between worker processes
+    app.config['PAGE_CACHE_ENABLED'] = True
+    app.config['PAGE_CACHE_TTL'] = 300  # seconds
+    app.config['PAGE_CACHE_DIR'] = os.environ.get('GRAMEENCONNECT_PAGE_CACHE_DIR')
+
+    # gzip/brotli for responses the client accepts compressed (see app/compression.py)
+    app.config['COMPRESS_MIN_SIZE'] = 1024  # bytes
+    app.config['COMPRESS_LEVEL'] = 6        # gzip level, 1-9
+    app.config['COMPRESS_BR_QUALITY'] = 4   # brotli quality, 0-11
+
+    # Pool, cache and slow-query internals at /debug/db-pool, for load testing; off unless the debugger is on
+    app.config['DEBUG_STATS_ENABLED'] = os.environ.get('GRAMEENCONNECT_DEBUG_STATS') == '1'
+
+    app.config.update(config or {})
+
+    # Levels, per-request tracing and a queue between the loggers and stderr (see app/log.py)
+    init_log(app)
+
+    # Per-route latency, SQL and template timings at /metrics (see app/metrics.py)
+    init_metrics(app)
+
+    # Pooled database connections, one checked out per request (see app/models/database.py)
+    init_db(app)
+
+    # Background task workers, started with the first request (see app/tasks.py)
+    init_tasks(app)
+
+    # Password hash method and cost, and the threads hashing runs on (see app/passwords.py)
+    init_passwords(app)
+
+    # Fingerprinted, precompressed static files from `python -m app.assets --build` (see app/assets.py)
+    init_assets(app)
+
+    # Bootstrap, Font Awesome and Poppins from app/static/vendor instead of their CDNs (see app/vendor.py)
+    init_vendor(app)
+
+    init_compression(app)
+
+    _check_upload_folder(app)
+
+    # Templates build <picture> srcsets for uploads from the recorded variants (see _image.html)
+    app.jinja_env.globals['image_sources'] = image_sources
+
+    app.register_blueprint(main)
+    return app
+
+def _check_upload_folder(app):
+    """Create the upload folder if needed and fall back to ./uploads if it isn't writable"""
+    folder = app.config['UPLOAD_FOLDER']
+    try:
+        os.makedirs(folder, exist_ok=True)
+        if os.access(folder, os.W_OK):
+            return
+    except OSError as e:
+        logger.error("Error setting up upload folder %s: %s", folder, e)
+    fallback = os.path.abspath('uploads')
+    os.makedirs(fallback, exist_ok=True)
+    app.config['UPLOAD_FOLDER'] = fallback
+    logger.warning("%s is not writable, using alternative upload folder at: %s", folder, fallback)
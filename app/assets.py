@@ -0,0 +1,343 @@
+"""
+Build and serve fingerprinted static assets.
+
+`python -m app.assets --build` writes a copy of every file under app/static
+(except uploads) to app/static/dist with a content hash in its name, e.g.
+css/style.css -> dist/css/style.3f9c2a1b0d.css. Along the way it:
+
+- minifies CSS and JS and joins the files listed in BUNDLES into one file,
+- rewrites url(...) references inside CSS to the hashed names,
+- recompresses large JPEG/PNG images when Pillow is installed,
+- writes .gz and, when the brotli module is installed, .br next to each
+  text file.
+
+The name mapping goes to dist/manifest.json. With a manifest loaded,
+url_for('static', filename='css/style.css') returns the hashed URL, and
+hashed files are served with a year-long immutable Cache-Control and the
+precompressed variant the browser accepts. Without a build (or when a
+source file has changed since the last one) the original files are served
+as before, so development needs no build step.
+"""
+import gzip
+import hashlib
+import io
+import json
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+from flask import request, send_from_directory, url_for
+from app.vendor import VENDOR_DIR
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are written without it
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+SKIP_DIRS = {DIST_DIR, 'images/uploads'}
+HASH_LENGTH = 10
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Bundle name -> source files, joined in order. Every page loads one
+# stylesheet and one script; the self-hosted vendor files (see
+# app/vendor.py) sit in the bundles where layout.html used to load them,
+# so the cascade and script order are unchanged. A bundle is only built
+# when all of its files exist, otherwise the files load one by one.
+BUNDLES = {
+    'css/site.css': ['css/global.css', 'vendor/bootstrap/bootstrap.min.css', 'vendor/poppins/poppins.css',
+                     'vendor/fontawesome/css/all.min.css', 'css/style.css'],
+    'js/site.js': ['js/overflow-fix.js', 'js/dropdown-fix.js', 'vendor/bootstrap/bootstrap.bundle.min.js',
+                   'js/main.js'],
+}
+
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt'}
+# Encodings in order of preference and the suffix of their precompressed files
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+# Images above RECOMPRESS_MIN bytes are scaled down to at most this width
+# (the logo and default avatar are only ever shown small)
+RECOMPRESS_MIN = 100 * 1024
+IMAGE_MAX_WIDTH = {'images/logo.png': 256, 'images/default-avatar.png': 512}
+DEFAULT_IMAGE_MAX_WIDTH = 1920
+JPEG_QUALITY = 80
+
+_CSS_TOKENS = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|/\*.*?\*/)''', re.S)
+_CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+def minify_css(text):
+    """Drop comments and needless whitespace, leaving strings untouched"""
+    out = []
+    pending = ''
+
+    def flush(css):
+        css = re.sub(r'\s+', ' ', css)
+        css = re.sub(r' ?([{};,>]) ?', r'\1', css)
+        out.append(css.replace(': ', ':').replace(';}', '}'))
+
+    for token in _CSS_TOKENS.split(text):
+        if token.startswith('/*'):
+            pending += ' '
+        elif token[:1] in ('"', "'"):
+            flush(pending)
+            pending = ''
+            out.append(token)
+        else:
+            pending += token
+    flush(pending)
+    return ''.join(out).strip()
+
+def minify_js(text):
+    """Strip indentation, blank lines and whole-line comments
+
+    Deliberately conservative: statements and line breaks stay as written,
+    so automatic semicolon insertion behaves exactly as in the source, and
+    lines inside template literals are kept verbatim.
+    """
+    lines = []
+    in_comment = in_template = False
+    for line in text.splitlines():
+        if in_template:
+            lines.append(line)
+            in_template = line.count('`') % 2 == 0
+            continue
+        stripped = line.strip()
+        if in_comment:
+            in_comment = '*/' not in stripped
+            if not in_comment and not stripped.endswith('*/'):
+                lines.append(stripped[stripped.index('*/') + 2:].strip())
+            continue
+        if stripped.startswith('/*'):
+            if '*/' not in stripped:
+                in_comment = True
+                continue
+            if stripped.endswith('*/'):
+                continue
+        if not stripped or stripped.startswith('//'):
+            continue
+        lines.append(stripped)
+        in_template = stripped.count('`') % 2 == 1
+    return '\n'.join(lines) + '\n'
+
+def _recompress_image(path, name):
+    """Smaller bytes for a large JPEG/PNG, or None to copy the file as it is"""
+    if Image is None or os.path.getsize(path) < RECOMPRESS_MIN:
+        return None
+    with Image.open(path) as image:
+        fmt = image.format
+        if fmt not in ('JPEG', 'PNG'):
+            return None
+        max_width = IMAGE_MAX_WIDTH.get(name, DEFAULT_IMAGE_MAX_WIDTH)
+        if image.width > max_width:
+            image = image.resize((max_width, round(image.height * max_width / image.width)), Image.LANCZOS)
+        buffer = io.BytesIO()
+        if fmt == 'JPEG':
+            image.convert('RGB').save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+        else:
+            image.save(buffer, 'PNG', optimize=True)
+    data = buffer.getvalue()
+    return data if len(data) < os.path.getsize(path) else None
+
+def _hashed_name(name, data):
+    stem, ext = posixpath.splitext(name)
+    return f'{DIST_DIR}/{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}'
+
+def _rewrite_css_urls(text, name, manifest, output=None):
+    """Point url(...) references in the CSS file `name`, written out as `output`, at the hashed files"""
+    base = posixpath.dirname(name)
+    output_dir = posixpath.dirname(_hashed_name(output or name, b''))
+
+    def replace(match):
+        quote, target = match.groups()
+        if re.match(r'^(?:[a-z]+:|/|#)', target):
+            return match.group(0)  # data:, absolute and fragment URLs
+        path = target.split('?')[0]
+        resolved = posixpath.normpath(posixpath.join(base, path))
+        if resolved not in manifest:
+            return match.group(0)
+        return f'url({quote}{posixpath.relpath(manifest[resolved], output_dir)}{quote})'
+    return _CSS_URL.sub(replace, text)
+
+def _write(static_folder, name, data):
+    path = os.path.join(static_folder, name)
+    if os.path.exists(path):
+        return False  # same hash, same content
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    if posixpath.splitext(name)[1] in COMPRESSIBLE:
+        variants = [('.gz', gzip.compress(data, 9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data, quality=11)))
+        for suffix, compressed in variants:
+            if len(compressed) < len(data):
+                with open(path + suffix, 'wb') as f:
+                    f.write(compressed)
+    return True
+
+def _source_files(static_folder):
+    for directory, dirnames, filenames in os.walk(static_folder):
+        relative = os.path.relpath(directory, static_folder).replace(os.sep, '/')
+        relative = '' if relative == '.' else relative
+        dirnames[:] = sorted(d for d in dirnames if posixpath.join(relative, d) not in SKIP_DIRS)
+        for filename in sorted(filenames):
+            if not filename.startswith('.'):
+                yield posixpath.join(relative, filename)
+
+def build(static_folder, clean=False):
+    """Write the fingerprinted files and manifest; returns the manifest
+
+    Earlier builds are left in place (unless `clean`), so pages cached
+    with the old hashed URLs keep working while a deploy rolls out.
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    if clean and os.path.isdir(dist):
+        shutil.rmtree(dist)
+    manifest = {}
+    sources = list(_source_files(static_folder))
+
+    def emit(name, data):
+        hashed = _hashed_name(name, data)
+        _write(static_folder, hashed, data)
+        manifest[name] = hashed
+
+    def read(name):
+        with open(os.path.join(static_folder, name), 'rb') as f:
+            return f.read()
+
+    # Everything but CSS first, so the stylesheets can refer to the hashed names
+    for name in sources:
+        ext = posixpath.splitext(name)[1]
+        if ext == '.css':
+            continue
+        if name.endswith('.min' + ext):
+            emit(name, read(name))  # already minified (vendor files)
+        elif ext == '.js':
+            emit(name, minify_js(read(name).decode('utf-8')).encode('utf-8'))
+        elif ext in ('.jpg', '.jpeg', '.png'):
+            emit(name, _recompress_image(os.path.join(static_folder, name), name) or read(name))
+        else:
+            emit(name, read(name))
+    for name in sources:
+        if name.endswith('.css'):
+            text = _rewrite_css_urls(read(name).decode('utf-8'), name, manifest)
+            emit(name, (text if name.endswith('.min.css') else minify_css(text)).encode('utf-8'))
+
+    for bundle, members in BUNDLES.items():
+        missing = [m for m in members if m not in manifest]
+        if missing:
+            logger.warning("Not bundling %s: %s missing (run python -m app.vendor --build)", bundle, ', '.join(missing))
+            continue
+        parts = []
+        for member in members:
+            text = read(member).decode('utf-8')
+            if bundle.endswith('.css'):
+                text = _rewrite_css_urls(text, member, manifest, output=bundle)
+                parts.append(text if member.endswith('.min.css') else minify_css(text))
+            else:
+                parts.append(text if member.endswith('.min.js') else minify_js(text))
+        # A semicolon keeps one script's last statement from running into the next
+        emit(bundle, ('\n' if bundle.endswith('.css') else ';\n').join(parts).encode('utf-8'))
+
+    os.makedirs(dist, exist_ok=True)
+    with open(os.path.join(dist, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return manifest
+
+def load_manifest(static_folder):
+    """The manifest of the last build, or None if there is none or a source changed since"""
+    path = os.path.join(static_folder, DIST_DIR, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    built_at = os.path.getmtime(path)
+    with open(path) as f:
+        manifest = json.load(f)
+    # A built bundle's files are in the manifest too, so this covers them
+    for name in set(manifest) - set(BUNDLES):
+        source = os.path.join(static_folder, name)
+        if not os.path.exists(source) or os.path.getmtime(source) > built_at:
+            logger.warning("Static file %s changed since the last asset build; serving unbundled files "
+                           "(run python -m app.assets --build)", name)
+            return None
+    return manifest
+
+def _accepted_encoding(path):
+    """The preferred precompressed variant of `path` the client accepts, if one exists"""
+    for encoding, suffix in ENCODINGS:
+        if request.accept_encodings[encoding] and os.path.exists(path + suffix):
+            return encoding, suffix
+    return None, ''
+
+def init_app(app):
+    """Load the manifest and route url_for('static') and static requests through it"""
+    app.config.setdefault('ASSETS_FINGERPRINT', True)
+    manifest = load_manifest(app.static_folder) if app.config['ASSETS_FINGERPRINT'] else None
+    app.extensions['assets_manifest'] = manifest or {}
+    if manifest:
+        logger.info("Serving %d fingerprinted static files", len(manifest))
+
+    @app.url_defaults
+    def fingerprint_static(endpoint, values):
+        if endpoint == 'static':
+            hashed = app.extensions['assets_manifest'].get(values.get('filename'))
+            if hashed:
+                values['filename'] = hashed
+
+    def serve_static(filename):
+        if not filename.startswith(DIST_DIR + '/'):
+            return app.send_static_file(filename)
+        encoding, suffix = _accepted_encoding(os.path.join(app.static_folder, filename))
+        response = send_from_directory(app.static_folder, filename + suffix,
+                                       mimetype=mimetypes.guess_type(filename)[0], max_age=IMMUTABLE_MAX_AGE)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+    app.view_functions['static'] = serve_static
+
+    def member_url(member):
+        # Vendor files that were never built come from their CDN
+        if member.startswith(VENDOR_DIR + '/'):
+            return app.jinja_env.globals['vendor_url'](member[len(VENDOR_DIR) + 1:])
+        return url_for('static', filename=member)
+
+    def asset_urls(name):
+        """URLs to load a bundle: the built file, or its sources when there is no build"""
+        if name in BUNDLES and name not in app.extensions['assets_manifest']:
+            return [member_url(member) for member in BUNDLES[name]]
+        return [url_for('static', filename=name)]
+    app.jinja_env.globals['asset_urls'] = asset_urls
+
+if __name__ == '__main__':
+    import argparse
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    parser = argparse.ArgumentParser(description='Fingerprinted static assets')
+    parser.add_argument('--build', action='store_true', help='write app/static/dist and its manifest')
+    parser.add_argument('--clean', action='store_true', help='remove earlier builds first')
+    parser.add_argument('--directory', default=os.path.join(os.path.dirname(__file__), 'static'))
+    args = parser.parse_args()
+
+    if args.build:
+        manifest = build(args.directory, clean=args.clean)
+        source_bytes = built_bytes = 0
+        for name, hashed in manifest.items():
+            members = BUNDLES.get(name, [name])
+            source_bytes += sum(os.path.getsize(os.path.join(args.directory, m)) for m in members)
+            built_bytes += os.path.getsize(os.path.join(args.directory, hashed))
+        print(f"Built {len(manifest)} static files: {source_bytes} -> {built_bytes} bytes "
+              f"(brotli {'on' if brotli is not None else 'not installed'})")
+    else:
+        parser.print_help()
@@ -0,0 +1,237 @@
+"""
+Rendered page cache for the public listing and detail pages.
+
+Pages are cached only for anonymous visitors with no pending flash
+messages, keyed on the endpoint, its URL arguments, the query string and
+the session language. Each cache namespace ('jobs', 'marketplace', ...)
+carries a generation number; write routes call invalidate(namespace) to
+bump it, which makes every older entry for that namespace unreachable.
+
+Entries live in an in-process LRU. Setting PAGE_CACHE_DIR adds an on-disk
+backend that is shared between worker processes, including the
+generation numbers, so an invalidation in one worker reaches the others.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request, session, make_response
+
+DEFAULT_MAXSIZE = 512
+DEFAULT_TTL = 300  # seconds
+
+class MemoryBackend:
+    """LRU of (expiry, entry) tuples"""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return item[1]
+
+    def set(self, key, entry, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+class DiskBackend:
+    """One pickle file per entry under `directory`, written atomically"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        # Keys start with their namespace, which prefixes the file name so invalidate can find them
+        namespace = key.split('|', 1)[0]
+        return os.path.join(self.directory, f"{namespace}-{hashlib.sha1(key.encode('utf-8')).hexdigest()}.page")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                expires, stored_key, entry = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if stored_key != key:
+            return None
+        if expires <= time.time():
+            self._remove(self._path(key))
+            return None
+        return entry
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def set(self, key, entry, ttl):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((time.time() + ttl, key, entry), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def generation(self, namespace):
+        try:
+            with open(os.path.join(self.directory, namespace + '.gen')) as f:
+                return int(f.read() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def bump_generation(self, namespace):
+        # Not atomic across processes, but any change of the number is enough to invalidate
+        value = self.generation(namespace) + 1
+        path = os.path.join(self.directory, namespace + '.gen')
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(value))
+        os.replace(tmp_path, path)
+
+        # Entries of older generations can no longer be reached
+        prefix = namespace + '-'
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix) and name.endswith('.page'):
+                self._remove(os.path.join(self.directory, name))
+        return value
+
+class PageCache:
+    """Two-level page cache: in-process LRU in front of an optional disk backend"""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL, directory=None):
+        self.ttl = ttl
+        self.memory = MemoryBackend(maxsize)
+        self.disk = DiskBackend(directory) if directory else None
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def generation(self, namespace):
+        if self.disk is not None:
+            return self.disk.generation(namespace)
+        return self._generations.get(namespace, 0)
+
+    def invalidate(self, namespace):
+        """Make every cached page in `namespace` stale"""
+        with self._lock:
+            self.invalidations += 1
+            if self.disk is not None:
+                self.disk.bump_generation(namespace)
+            else:
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    def get(self, key):
+        entry = self.memory.get(key)
+        if entry is None and self.disk is not None:
+            entry = self.disk.get(key)
+            if entry is not None:
+                self.memory.set(key, entry, self.ttl)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def set(self, key, entry):
+        self.memory.set(key, entry, self.ttl)
+        if self.disk is not None:
+            self.disk.set(key, entry, self.ttl)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.memory),
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+                'disk': self.disk.directory if self.disk is not None else None,
+            }
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_page_cache():
+    """Return the process-wide page cache, configured from app config on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                config = current_app.config
+                _cache = PageCache(maxsize=config.get('PAGE_CACHE_SIZE', DEFAULT_MAXSIZE),
+                                   ttl=config.get('PAGE_CACHE_TTL', DEFAULT_TTL),
+                                   directory=config.get('PAGE_CACHE_DIR'))
+    return _cache
+
+def invalidate(*namespaces):
+    """Drop cached pages for the given namespaces after a write"""
+    cache = get_page_cache()
+    for namespace in namespaces:
+        cache.invalidate(namespace)
+
+def _is_cacheable():
+    return (current_app.config.get('PAGE_CACHE_ENABLED', True)
+            and request.method == 'GET'
+            and 'user_id' not in session
+            and '_flashes' not in session)
+
+def cached_page(namespace):
+    """Cache the view's rendered response for anonymous visitors under `namespace`"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not _is_cacheable():
+                return view(*args, **kwargs)
+
+            cache = get_page_cache()
+            key = '|'.join((
+                namespace,
+                str(cache.generation(namespace)),
+                request.endpoint,
+                repr(sorted(kwargs.items())),
+                repr(sorted(request.args.items(multi=True))),
+                session.get('language', 'en'),
+            ))
+            entry = cache.get(key)
+            if entry is not None:
+                body, status, headers = entry
+                response = make_response(body, status, headers)
+                response.headers['X-Page-Cache'] = 'HIT'
+                # Cached pages keep the view's ETag/Last-Modified, so revalidation still gets a 304
+                return response.make_conditional(request)
+
+            response = make_response(view(*args, **kwargs))
+            # Only plain successful pages; redirects, 304s and error pages carry flashes or per-request state
+            if response.status_code == 200 and not response.direct_passthrough and '_flashes' not in session:
+                headers = [(k, v) for k, v in response.headers.items() if k.lower() not in ('set-cookie', 'content-length')]
+                cache.set(key, (response.get_data(), response.status_code, headers))
+            response.headers['X-Page-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,238 @@
+"""
+WSGI middleware that compresses responses the client accepts compressed.
+
+Brotli is used when the brotli module is installed and the client accepts
+it, otherwise gzip. Dynamic pages are compressed as they stream, chunk by
+chunk, so nothing is buffered. Responses that already carry a
+Content-Encoding (the precompressed files app/assets.py serves from
+static/dist) pass through untouched, as do images, fonts and other types
+that do not shrink, bodies under COMPRESS_MIN_SIZE, HEAD and range
+requests.
+
+Shared responses with a validator (static files outside a build) are
+compressed once per encoding and kept in a small in-memory cache, so only
+dynamic HTML costs CPU on every request.
+"""
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_MIN_SIZE = 1024    # bytes; smaller bodies barely shrink and fit in one packet anyway
+DEFAULT_LEVEL = 6          # gzip level
+DEFAULT_BR_QUALITY = 4     # brotli quality for on-the-fly compression (11 is for build time)
+CACHE_ENTRIES = 128        # compressed static bodies kept per process
+CACHE_MAX_BODY = 1024 * 1024
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml',
+                      'application/manifest+json', 'image/svg+xml')
+
+class _Gzip:
+    def __init__(self, level):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        # Sync-flush so each streamed chunk reaches the client right away
+        return self._z.compress(data) + self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._z.flush(zlib.Z_FINISH)
+
+class _Brotli:
+    def __init__(self, quality):
+        self._c = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._c.process(data) + self._c.flush()
+
+    def finish(self):
+        return self._c.finish()
+
+def compress(data, encoding, level=DEFAULT_LEVEL, br_quality=DEFAULT_BR_QUALITY):
+    """Compress a whole body the way the middleware would"""
+    compressor = _Brotli(br_quality) if encoding == 'br' else _Gzip(level)
+    return compressor.compress(data) + compressor.finish()
+
+def negotiate(accept_encoding):
+    """'br', 'gzip' or None for an Accept-Encoding header value"""
+    accepted = parse_accept_header(accept_encoding or '')
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+class CompressionMiddleware:
+    """Compress the responses of the wrapped WSGI app"""
+
+    def __init__(self, app, min_size=DEFAULT_MIN_SIZE, level=DEFAULT_LEVEL, br_quality=DEFAULT_BR_QUALITY):
+        self.app = app
+        self.min_size = min_size
+        self.level = level
+        self.br_quality = br_quality
+        self._cache = OrderedDict()  # _cache_key() -> compressed body
+        self._lock = threading.Lock()
+        self._compressed = 0
+        self._skipped = 0
+        self._cache_hits = 0
+        self._bytes_in = 0
+        self._bytes_out = 0
+        self._cpu_seconds = 0.0
+
+    def _compressor(self, encoding):
+        return _Brotli(self.br_quality) if encoding == 'br' else _Gzip(self.level)
+
+    def _should_compress(self, status, headers):
+        if headers.get('Content-Encoding') or 'no-transform' in headers.get('Cache-Control', ''):
+            return False
+        if status[:3] in ('204', '206', '304') or status.startswith(('1', '3')):
+            return False
+        return self._compressible(headers)
+
+    def _compressible(self, headers):
+        if not headers.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES):
+            return False
+        length = headers.get('Content-Length')
+        return length is None or int(length) >= self.min_size
+
+    def __call__(self, environ, start_response):
+        encoding = negotiate(environ.get('HTTP_ACCEPT_ENCODING'))
+        if environ.get('REQUEST_METHOD') == 'HEAD' or 'HTTP_RANGE' in environ:
+            encoding = None
+        state = {}
+
+        def compressing_start_response(status, response_headers, exc_info=None):
+            headers = Headers(response_headers)
+            if self._should_compress(status, headers):
+                headers['Vary'] = _add_vary(headers.get('Vary', ''))
+                if encoding is not None:
+                    state['cache_key'] = _cache_key(environ, headers, encoding)
+                    etag = headers.get('ETag')
+                    if etag and not etag.startswith('W/'):
+                        # Byte-identical only within one encoding; weak still matches If-None-Match
+                        headers['ETag'] = 'W/' + etag
+                    state['encoding'] = encoding
+                    state['length'] = headers.get('Content-Length')
+                    headers['Content-Encoding'] = encoding
+                    del headers['Content-Length']
+                    cached = self._cached(state.get('cache_key'))
+                    if cached is not None:
+                        state['cached'] = cached
+                        headers['Content-Length'] = str(len(cached))
+            return start_response(status, headers.to_wsgi_list(), exc_info)
+
+        app_iter = self.app(environ, compressing_start_response)
+        if 'encoding' not in state:
+            with self._lock:
+                self._skipped += 1
+            return app_iter
+        if 'cached' in state:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+            with self._lock:
+                self._cache_hits += 1
+            return [state['cached']]
+        return self._stream(app_iter, state)
+
+    def _cached(self, key):
+        if key is None:
+            return None
+        with self._lock:
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+            return body
+
+    def _stream(self, app_iter, state):
+        compressor = self._compressor(state['encoding'])
+        key = state.get('cache_key')
+        keep = [] if key and state['length'] and int(state['length']) <= CACHE_MAX_BODY else None
+        bytes_in = bytes_out = 0
+        cpu = 0.0
+        finished = False
+        try:
+            for chunk in app_iter:
+                if not chunk:
+                    continue
+                started = time.thread_time()
+                out = compressor.compress(chunk)
+                cpu += time.thread_time() - started
+                bytes_in += len(chunk)
+                bytes_out += len(out)
+                if keep is not None:
+                    keep.append(out)
+                if out:
+                    yield out
+            started = time.thread_time()
+            out = compressor.finish()
+            cpu += time.thread_time() - started
+            bytes_out += len(out)
+            if keep is not None:
+                keep.append(out)
+            finished = True
+            yield out
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+            with self._lock:
+                self._compressed += 1
+                self._bytes_in += bytes_in
+                self._bytes_out += bytes_out
+                self._cpu_seconds += cpu
+                if keep is not None and finished:
+                    self._cache[key] = b''.join(keep)
+                    while len(self._cache) > CACHE_ENTRIES:
+                        self._cache.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'compressed': self._compressed,
+                'skipped': self._skipped,
+                'cache_hits': self._cache_hits,
+                'cached_bodies': len(self._cache),
+                'bytes_in': self._bytes_in,
+                'bytes_out': self._bytes_out,
+                'ratio': round(self._bytes_out / self._bytes_in, 3) if self._bytes_in else None,
+                'cpu_ms': round(self._cpu_seconds * 1000, 1),
+                'brotli': brotli is not None,
+            }
+
+def _cache_key(environ, headers, encoding):
+    """Key for keeping the compressed body of a shared, versioned response, else None"""
+    if 'private' in headers.get('Cache-Control', '') or 'cookie' in headers.get('Vary', '').lower() \
+            or 'Set-Cookie' in headers:
+        return None
+    etag = headers.get('ETag', '')
+    validator = etag if etag and not etag.startswith('W/') else headers.get('Last-Modified')
+    if not validator:
+        return None
+    return (environ.get('PATH_INFO'), environ.get('QUERY_STRING'), validator, headers.get('Content-Length'), encoding)
+
+def _add_vary(value):
+    fields = [f.strip() for f in value.split(',') if f.strip()]
+    if not any(f.lower() in ('accept-encoding', '*') for f in fields):
+        fields.append('Accept-Encoding')
+    return ', '.join(fields)
+
+def init_app(app):
+    """Wrap app.wsgi_app with CompressionMiddleware configured from app.config"""
+    app.config.setdefault('COMPRESS_ENABLED', True)
+    app.config.setdefault('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE)
+    app.config.setdefault('COMPRESS_LEVEL', DEFAULT_LEVEL)
+    app.config.setdefault('COMPRESS_BR_QUALITY', DEFAULT_BR_QUALITY)
+    if not app.config['COMPRESS_ENABLED']:
+        return None
+    middleware = CompressionMiddleware(app.wsgi_app, min_size=app.config['COMPRESS_MIN_SIZE'],
+                                       level=app.config['COMPRESS_LEVEL'],
+                                       br_quality=app.config['COMPRESS_BR_QUALITY'])
+    app.wsgi_app = middleware
+    app.extensions['compression'] = middleware
+    return middleware
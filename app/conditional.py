@@ -0,0 +1,94 @@
+"""
+Conditional GET support (ETag / Last-Modified) for listing and detail pages.
+
+Validators are derived from the rows a page shows: their ids, the newest
+posted/reported date and anything else that changes the markup (page
+cursors, language, who is logged in). Views compute them right after the
+query and, if the browser's If-None-Match / If-Modified-Since still
+matches, answer 304 without rendering the template.
+"""
+import hashlib
+import os
+from collections import namedtuple
+from datetime import datetime, timezone
+from flask import current_app, request, session, make_response
+
+Validators = namedtuple('Validators', ['etag', 'last_modified'])
+
+_release = None
+
+def _release_id():
+    """Changes whenever templates or views change, so a deploy invalidates old ETags"""
+    global _release
+    if _release is None:
+        release = os.environ.get('GRAMEENCONNECT_RELEASE')
+        if not release:
+            paths = [os.path.join(current_app.root_path, 'views.py')]
+            template_dir = os.path.join(current_app.root_path, current_app.template_folder)
+            if os.path.isdir(template_dir):
+                paths += [os.path.join(template_dir, name) for name in os.listdir(template_dir)]
+            release = str(max((os.path.getmtime(path) for path in paths if os.path.exists(path)), default=0))
+        _release = release
+    return _release
+
+def _parse_date(value):
+    """Parse a stored TIMESTAMP (string or datetime) to a naive UTC-treated datetime"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.replace(microsecond=0, tzinfo=None)
+    try:
+        return datetime.strptime(str(value)[:19], '%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        return None
+
+def page_validators(rows, date_column, *extra):
+    """ETag and Last-Modified for a page showing `rows`; `extra` adds other inputs to the markup"""
+    dates = [d for d in (_parse_date(row[date_column]) for row in rows) if d is not None]
+    seed = '|'.join([
+        _release_id(),
+        request.full_path,
+        session.get('language', 'en'),
+        str(session.get('user_id')),
+        str(session.get('fullname')),
+        str(session.get('profile_image')),
+        ','.join(str(row['id']) for row in rows),
+        ','.join(str(row[date_column]) for row in rows),
+        *(str(value) for value in extra),
+    ])
+    etag = hashlib.sha1(seed.encode('utf-8')).hexdigest()
+    return Validators(etag, max(dates) if dates else None)
+
+def is_not_modified(validators):
+    """Whether the request's conditional headers still match (If-None-Match wins over If-Modified-Since)"""
+    if request.method not in ('GET', 'HEAD') or '_flashes' in session:
+        # A pending flash message has to be rendered into the page
+        return False
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(validators.etag)
+    since = request.if_modified_since
+    if since is not None and validators.last_modified is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        return validators.last_modified <= since
+    return False
+
+def add_validators(response, validators):
+    """Attach the validators and revalidation headers to a response"""
+    response = make_response(response)
+    response.set_etag(validators.etag, weak=True)
+    if validators.last_modified is not None:
+        response.last_modified = validators.last_modified
+    # Pages differ per language and user, so only the browser may keep them, and must revalidate
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Cookie')
+    return response
+
+def not_modified(validators):
+    """An empty 304 response carrying the same validators"""
+    return add_validators(current_app.response_class(status=304), validators)
+
+def conditional(validators, render):
+    """304 if the client's copy is current, otherwise `render()` with validators attached"""
+    if is_not_modified(validators):
+        return not_modified(validators)
+    return add_validators(render(), validators)
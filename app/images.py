@@ -0,0 +1,383 @@
+"""
+Image pipeline for uploaded pictures.
+
+Uploads are spooled to disk and processed by a background task (see
+app/tasks.py): decoded, turned upright from their EXIF orientation, stripped
+of metadata and saved as a few width variants (thumb/card/full) in WebP and
+JPEG, with a checksum of the original. Variants live in the blob store
+(see app/storage.py) next to the upload's hash, and the full JPEG's name is
+what the content tables store; every variant is recorded in the
+image_variants table, from which templates build a srcset. Until the task
+finishes, image_uploads.status is 'pending' and templates show a
+placeholder.
+
+Pillow is optional: without it uploads are stored unchanged and templates
+fall back to a plain <img src>.
+
+    python -m app.images --backfill   # variants for uploads outside the blob store
+"""
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from flask import current_app, url_for
+from app import storage
+from app.cache import invalidate as invalidate_pages
+from app.uploads import UploadRejected, receive
+from app.models.database import get_db, get_db_connection
+from app.models.writer import run_write
+from app.tasks import enqueue, get_task_pool, handler
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow is optional
+    Image = None
+
+# Target widths in pixels; an image is never scaled up, so small uploads get fewer variants
+VARIANTS = [('thumb', 160), ('card', 480), ('full', 1280)]
+FORMATS = [('webp', 'image/webp'), ('jpeg', 'image/jpeg')]
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+SAVE_OPTIONS = {
+    'webp': {'quality': 80, 'method': 4},
+    'jpeg': {'quality': 82, 'optimize': True, 'progressive': True},
+}
+# Decoding a 16 MB upload can still be a huge bitmap; refuse anything past ~40 megapixels
+MAX_PIXELS = 40_000_000
+
+# table whose `image` column names uploads: page cache namespace of the pages that show it
+SHOWN_IN = {'products': 'marketplace', 'issues': 'issues'}
+
+Variant = namedtuple('Variant', ['name', 'format', 'width', 'height', 'filename', 'size'])
+
+class InvalidImage(UploadRejected):
+    """The upload could not be decoded as an image"""
+
+def available():
+    """Whether Pillow is installed and uploads can be processed"""
+    return Image is not None
+
+def _open(source, load=True):
+    """Open bytes or a path as an image; with load=False only the header is read"""
+    try:
+        image = Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+        if image.width * image.height > MAX_PIXELS:
+            raise InvalidImage(f'The image is too large ({image.width}x{image.height} pixels).')
+        if not load:
+            return image
+        image.load()
+    except InvalidImage:
+        raise
+    except Exception as e:
+        logger.info("Could not decode image: %s", e)
+        raise InvalidImage('The uploaded file is not a valid image.') from e
+    # Apply the camera rotation before the EXIF block (with GPS and all) is dropped
+    return ImageOps.exif_transpose(image)
+
+def _flatten(image, fmt):
+    """Mode the encoder accepts; JPEG has no alpha, so transparency goes on white"""
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    if fmt == 'webp' and has_alpha:
+        return image.convert('RGBA')
+    if has_alpha:
+        rgba = image.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+def _write_atomic(path, data):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def make_variants(source, directory, stem):
+    """Decode `source` (bytes or a path) and write its variants as `<stem>-<variant>.<ext>` in `directory`"""
+    image = _open(source)
+    variants = []
+    widths = [min(target, image.width) for _, target in VARIANTS]
+    for i, (name, _) in enumerate(VARIANTS):
+        width = widths[i]
+        # A small image collapses several sizes into one; the widest name ('full') always exists
+        if i + 1 < len(widths) and width >= widths[i + 1]:
+            continue
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for fmt, _ in FORMATS:
+            buffer = io.BytesIO()
+            # No exif=/icc_profile= arguments, so no metadata is carried over
+            _flatten(resized, fmt).save(buffer, fmt.upper(), **SAVE_OPTIONS[fmt])
+            filename = f'{stem}-{name}.{EXTENSIONS[fmt]}'
+            _write_atomic(os.path.join(directory, filename), buffer.getvalue())
+            variants.append(Variant(name, fmt, width, height, filename, buffer.tell()))
+    return variants
+
+def record_variants(conn, image, variants):
+    """Store the variants of `image` (the name kept in the content table)"""
+    conn.execute('DELETE FROM image_variants WHERE image = ?', (image,))
+    conn.executemany(
+        'INSERT INTO image_variants (image, variant, format, width, height, filename, bytes) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        [(image, v.name, v.format, v.width, v.height, v.filename, v.size) for v in variants])
+
+def primary_filename(stem):
+    """The variant saved in the content table: the full-size JPEG"""
+    return f"{stem}-{VARIANTS[-1][0]}.{EXTENSIONS['jpeg']}"
+
+def _record_processed(conn, image, variants, checksum, size):
+    record_variants(conn, image, variants)
+    conn.execute('UPDATE blobs SET size = ? WHERE name = ?', (sum(v.size for v in variants), image))
+    conn.execute('''
+        UPDATE image_uploads SET status = 'done', checksum = ?, bytes = ?, processed_at = ?
+        WHERE image = ?
+    ''', (checksum, size, datetime.now(), image))
+
+def _showing(conn, image):
+    """Page cache namespaces of the pages that show `image`"""
+    return [namespace for table, namespace in SHOWN_IN.items()
+            if conn.execute(f'SELECT 1 FROM {table} WHERE image = ? LIMIT 1', (image,)).fetchone()]
+
+def _queue_spooled(conn, image, upload):
+    """Record a spooled upload and queue its task; None if the same bytes are already stored"""
+    # Also restarts a stored blob's grace period, so garbage collection keeps it for the row about to use it
+    storage.add_blob(conn, image, upload.digest, upload.size)
+    existing = conn.execute('SELECT status FROM image_uploads WHERE image = ?', (image,)).fetchone()
+    if existing is not None and existing[0] != 'failed':
+        return None
+    conn.execute('''INSERT OR REPLACE INTO image_uploads (image, status, source, checksum, bytes, created_at)
+                    VALUES (?, 'pending', ?, ?, ?, ?)''', (image, upload.path, upload.digest, upload.size,
+                                                          datetime.now()))
+    return enqueue(conn, 'image_variants', {'image': image, 'source': upload.path,
+                                            'sha256': upload.digest, 'size': upload.size})
+
+def save_image(file):
+    """Accept an uploaded image and return the name to store in the DB
+
+    The upload is hashed while it streams to disk, so identical bytes map to
+    the same blob and are stored once (see app/storage.py). With Pillow it is
+    spooled to UPLOAD_SPOOL_FOLDER and a background task creates the
+    variants; the full JPEG's name is returned right away. Without Pillow
+    the file itself becomes the blob.
+    """
+    config = current_app.config
+    root = config['UPLOAD_FOLDER']
+
+    if not available():
+        # Spooled next to the blobs so the final rename stays on one filesystem
+        upload = receive(file, os.path.join(root, storage.BLOB_DIR))
+        name = storage.blob_stem(upload.digest) + upload.suffix
+        # Recorded first: once the blob row is fresh, garbage collection won't remove the file put() reuses
+        run_write(lambda conn: storage.add_blob(conn, name, upload.digest, upload.size))
+        storage.put(upload.path, root, name)
+        return name
+
+    upload = receive(file, config['UPLOAD_SPOOL_FOLDER'])
+    try:
+        # Only the header is read here, so bad files still fail the request, not the task
+        _open(upload.path, load=False).close()
+    except InvalidImage:
+        os.remove(upload.path)
+        raise
+
+    image = primary_filename(storage.blob_stem(upload.digest))
+    task_id = run_write(lambda conn: _queue_spooled(conn, image, upload))
+    if task_id is None:
+        os.remove(upload.path)
+        logger.debug("Upload matches stored image %s", image)
+    else:
+        get_task_pool().notify()
+        _forget(image)
+        logger.debug("Queued image task %s for %s", task_id, image)
+    return image
+
+def store_spooled(conn, upload, root):
+    """Store a received upload as a blob right away (for imports); returns its name"""
+    if not available():
+        name = storage.blob_stem(upload.digest) + upload.suffix
+        storage.add_blob(conn, name, upload.digest, upload.size)
+        storage.put(upload.path, root, name)
+        return name
+
+    image = primary_filename(storage.blob_stem(upload.digest))
+    try:
+        storage.add_blob(conn, image, upload.digest, upload.size)
+        existing = conn.execute('SELECT status FROM image_uploads WHERE image = ?', (image,)).fetchone()
+        if existing is None or existing[0] != 'done':
+            variants = make_variants(upload.path, root, storage.blob_stem(upload.digest))
+            conn.execute('''INSERT OR REPLACE INTO image_uploads (image, status, source, created_at)
+                            VALUES (?, 'pending', ?, ?)''', (image, upload.path, datetime.now()))
+            _record_processed(conn, image, variants, upload.digest, upload.size)
+    finally:
+        os.remove(upload.path)
+    return image
+
+def _mark_failed(payload, error):
+    run_write(lambda conn: conn.execute(
+        "UPDATE image_uploads SET status = 'failed', processed_at = ? WHERE image = ?",
+        (datetime.now(), payload['image'])))
+    _forget(payload['image'])
+
+@handler('image_variants', on_failure=_mark_failed)
+def process_upload(payload):
+    """Task: make the variants of a spooled upload and record them"""
+    image, source = payload['image'], payload['source']
+    size = os.path.getsize(source)
+    checksum = payload.get('sha256') or _file_digest(source)
+    stem = image[:-len(f"-{VARIANTS[-1][0]}.{EXTENSIONS['jpeg']}")]
+    try:
+        # Pillow reads the file itself, so the encoded bytes are never held in memory as a whole
+        variants = make_variants(source, current_app.config['UPLOAD_FOLDER'], stem)
+    except InvalidImage as e:
+        # Decoding will not get better on a retry
+        _mark_failed(payload, str(e))
+        return {'error': str(e)}
+
+    def record(conn):
+        _record_processed(conn, image, variants, checksum, size)
+        return _showing(conn, image)
+    namespaces = run_write(record)
+    _remember(image, variants, pending=False)
+    # Cached pages still show the placeholder
+    invalidate_pages(*namespaces)
+    os.remove(source)
+    written = sum(v.size for v in variants)
+    logger.info("Saved %d image variants for %s (%d bytes in, %d bytes out)", len(variants), image, size, written)
+    return {'variants': len(variants), 'bytes_in': size, 'bytes_out': written, 'sha256': checksum}
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# Variants never change once written, so lookups are cached per process. Images
+# without variants are cached for a short while in case a backfill adds them,
+# and pending uploads only briefly so the page updates once their task is done.
+MISSING_TTL = 300  # seconds
+PENDING_TTL = 2  # seconds
+_variants = {}
+_variants_lock = threading.Lock()
+
+def _remember(image, variants, pending):
+    if variants:
+        expires = None
+    else:
+        expires = time.time() + (PENDING_TTL if pending else MISSING_TTL)
+    with _variants_lock:
+        _variants[image] = (expires, tuple(variants), pending)
+
+def _forget(image):
+    with _variants_lock:
+        _variants.pop(image, None)
+
+def _lookup(image):
+    cached = _variants.get(image)
+    if cached is not None and (cached[0] is None or cached[0] > time.time()):
+        return cached[1], cached[2]
+
+    conn = get_db()
+    rows = conn.execute(
+        'SELECT variant, format, width, height, filename, bytes FROM image_variants '
+        'WHERE image = ? ORDER BY width', (image,)).fetchall()
+    variants = [Variant(*row) for row in rows]
+    pending = False
+    if not variants:
+        upload = conn.execute('SELECT status FROM image_uploads WHERE image = ?', (image,)).fetchone()
+        pending = upload is not None
+    _remember(image, variants, pending)
+    return tuple(variants), pending
+
+def get_variants(image):
+    """The recorded variants of `image`, narrowest first (empty for unprocessed uploads)"""
+    if not image:
+        return ()
+    return _lookup(image)[0]
+
+def pending_images(rows, column='image'):
+    """The images of `rows` still waiting for variants, for page_validators: the ETag changes once they are done"""
+    return tuple(row[column] for row in rows if row[column] and _lookup(row[column])[1])
+
+def image_sources(image):
+    """Template helper: srcset per MIME type plus the fallback src and intrinsic size
+
+    Returns None when the image has no variants, so templates can keep their
+    plain <img src>, and {'pending': True} while (or if) its task has not
+    produced any.
+    """
+    if not image:
+        return None
+    variants, pending = _lookup(image)
+    if not variants:
+        return {'pending': True} if pending else None
+
+    def url(filename):
+        return url_for('static', filename='images/uploads/' + filename)
+    sources = [(mime, ', '.join(f'{url(v.filename)} {v.width}w' for v in variants if v.format == fmt))
+               for fmt, mime in FORMATS]
+    largest = max((v for v in variants if v.format == 'jpeg'), key=lambda v: v.width)
+    smallest = min((v for v in variants if v.format == 'jpeg'), key=lambda v: v.width)
+    return {
+        'sources': [(mime, srcset) for mime, srcset in sources if srcset],
+        'src': url(largest.filename),
+        'thumb': url(smallest.filename),
+        'width': largest.width,
+        'height': largest.height,
+    }
+
+def backfill(conn, directory):
+    """Create variants for uploads that have none yet; returns (processed, failed)"""
+    names = set()
+    for table, column in (('issues', 'image'), ('products', 'image'),
+                          ('users', 'profile_image'), ('users', 'banner_image')):
+        names.update(row[0] for row in conn.execute(
+            f"SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL AND {column} != ''"))
+    done = {row[0] for row in conn.execute('SELECT DISTINCT image FROM image_variants')}
+    # Uploads handed to the task queue are (or will be) processed there
+    done.update(row[0] for row in conn.execute('SELECT image FROM image_uploads'))
+
+    processed = failed = 0
+    for image in sorted(names - done):
+        path = os.path.join(directory, image)
+        try:
+            # Keep the stored name (and the original file) so nothing referencing it breaks
+            variants = make_variants(path, directory, os.path.splitext(image)[0])
+        except (OSError, InvalidImage) as e:
+            logger.warning("Skipping %s: %s", image, e)
+            failed += 1
+            continue
+        record_variants(conn, image, variants)
+        conn.commit()
+        processed += 1
+        logger.info("%s: %d bytes -> %s", image, os.path.getsize(path), ', '.join(f'{v.filename} {v.size}' for v in variants))
+    return processed, failed
+
+if __name__ == '__main__':
+    import argparse
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    parser = argparse.ArgumentParser(description='Image variants for uploads')
+    parser.add_argument('--backfill', action='store_true', help='create variants for existing uploads')
+    parser.add_argument('--directory', default=os.path.join(os.path.dirname(__file__), 'static', 'images', 'uploads'))
+    args = parser.parse_args()
+    if not available():
+        parser.error('Pillow is not installed')
+    if args.backfill:
+        conn = get_db_connection()
+        processed, failed = backfill(conn, args.directory)
+        conn.close()
+        print(f"Created variants for {processed} images ({failed} skipped)")
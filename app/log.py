@@ -0,0 +1,125 @@
+"""
+Logging for the app's modules.
+
+Modules log to logging.getLogger(__name__), so every logger sits below
+'app', which is also Flask's app.logger. init_app() gives 'app' a
+QueueHandler: a request only merges the message arguments and puts the
+record on a queue, and a listener thread formats it and writes it to
+stderr. Messages take %-style arguments, so a disabled level costs one
+isEnabledFor() check and nothing is formatted.
+
+LOG_LEVEL (GRAMEENCONNECT_LOG_LEVEL, default INFO) sets the level. With
+LOG_TRACE on (GRAMEENCONNECT_LOG_TRACE=1), a request that sends an
+X-Debug-Trace header is logged at DEBUG whatever the level. Its records
+carry a trace id, which is returned in the X-Trace-Id response header.
+Only turn LOG_TRACE on where clients can't set that header themselves,
+such as behind a proxy that strips it.
+"""
+import atexit
+import copy
+import logging
+import os
+import queue
+import secrets
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, has_request_context, request
+
+LOGGER = 'app'
+FORMAT = '%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s'
+TRACE_FORMAT = '%(asctime)s %(levelname)s [%(process)d] %(name)s: [trace %(trace)s] %(message)s'
+TRACE_HEADER = 'X-Debug-Trace'
+
+logger = logging.getLogger(__name__)
+
+class _Formatter(logging.Formatter):
+    def __init__(self):
+        super().__init__(FORMAT)
+        self._trace = logging.Formatter(TRACE_FORMAT)
+
+    def format(self, record):
+        return self._trace.format(record) if record.trace else super().format(record)
+
+class _TraceFilter(logging.Filter):
+    """Pass records at or above `level`, and everything logged while serving a traced request"""
+
+    def __init__(self, level):
+        super().__init__()
+        self.level = level
+
+    def filter(self, record):
+        record.trace = g.get('trace_id') if has_request_context() else None
+        return record.levelno >= self.level or record.trace is not None
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record):
+        # Only merge the arguments here, while they still hold what was logged; the listener formats
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+_handler = None
+_listener = None
+_lock = threading.Lock()
+
+def _start_listener():
+    global _listener
+    _handler.queue = queue.SimpleQueue()
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(_Formatter())
+    _listener = QueueListener(_handler.queue, output)
+    _listener.start()
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+def _reset_after_fork():
+    # The listener thread doesn't survive fork(); a forked worker starts its own
+    global _lock
+    _lock = threading.Lock()
+    if _handler is not None:
+        _start_listener()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def configure(level, trace=False):
+    """Route the 'app' loggers through the queue at `level`; with `trace`, traced requests log at DEBUG"""
+    global _handler
+    level = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+    with _lock:
+        if _handler is None:
+            _handler = _QueueHandler(None)
+            _start_listener()
+            atexit.register(_stop_listener)
+            root = logging.getLogger(LOGGER)
+            root.addHandler(_handler)
+            root.propagate = False
+        _handler.filters = [_TraceFilter(level)]
+        logging.getLogger(LOGGER).setLevel(logging.DEBUG if trace else level)
+    return _handler
+
+def _begin_trace():
+    if request.headers.get(TRACE_HEADER):
+        g.trace_id = secrets.token_hex(4)
+        g.trace_start = time.perf_counter()
+        logger.debug("%s %s", request.method, request.full_path)
+
+def _end_trace(response):
+    if g.get('trace_id'):
+        logger.debug("%s %s -> %s in %.1f ms", request.method, request.path, response.status_code,
+                     (time.perf_counter() - g.trace_start) * 1000)
+        response.headers['X-Trace-Id'] = g.trace_id
+    return response
+
+def init_app(app):
+    """Configure logging from LOG_LEVEL and LOG_TRACE and register per-request tracing"""
+    app.config.setdefault('LOG_LEVEL', os.environ.get('GRAMEENCONNECT_LOG_LEVEL', 'INFO'))
+    app.config.setdefault('LOG_TRACE', os.environ.get('GRAMEENCONNECT_LOG_TRACE') == '1')
+    configure(app.config['LOG_LEVEL'], trace=app.config['LOG_TRACE'])
+    if app.config['LOG_TRACE']:
+        app.before_request(_begin_trace)
+        app.after_request(_end_trace)
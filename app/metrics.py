@@ -0,0 +1,444 @@
+"""
+Request metrics in the Prometheus text format, served at /metrics.
+
+Hooks on the app time every request. Database connections from the pool
+and the writer are opened with InstrumentedConnection, whose cursors
+charge the time spent executing and fetching to the request that ran them
+(or to '(background)' outside a request). Templates are timed per
+top-level render. Per endpoint this gives a latency histogram, request
+counts by status, bytes out (before compression), SQL query counts and
+time, and a queries-per-request histogram that shows N+1 patterns.
+
+With METRICS_SAMPLE_RATE above 0, that share of requests also keeps its
+list of statements; a sampled request slower than METRICS_SLOW_MS is
+logged with its queries grouped by statement, and the slowest are listed
+at /debug/db-pool.
+
+Each process counts on its own. With METRICS_DIR set (gunicorn.conf.py
+does), workers write their counts there every few seconds and /metrics
+adds up all of them, keeping the counts of workers that have exited.
+"""
+import atexit
+import bisect
+import contextvars
+import glob
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from flask import g, request
+from jinja2 import Template
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'grameenconnect_'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_SLOW_MS = 500
+DEFAULT_WRITE_INTERVAL = 5  # seconds between a worker's snapshots in METRICS_DIR
+SLOWEST_KEPT = 10
+BACKGROUND = '(background)'
+
+COUNTERS = {
+    'http_requests_total': 'Requests served, by endpoint, method and status',
+    'http_response_bytes_total': 'Response body bytes before compression, by endpoint',
+    'sql_queries_total': 'SQL statements executed, by endpoint',
+    'sql_query_seconds_total': 'Time spent executing SQL and fetching rows, by endpoint',
+}
+# name: (help, bucket upper bounds)
+HISTOGRAMS = {
+    'http_request_duration_seconds': ('Request latency, by endpoint',
+                                      (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)),
+    'sql_queries_per_request': ('SQL statements per request, by endpoint',
+                                (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)),
+    'template_render_seconds': ('Template render time, by template',
+                                (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1)),
+}
+
+class Metrics:
+    """Counters and histograms keyed on (name, label pairs)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._histograms = {}
+        self._slowest = []
+        self._writer = None
+
+    def inc(self, name, labels, value=1):
+        with self._lock:
+            self._counters[name, labels] += value
+
+    def observe(self, name, labels, value):
+        bounds = HISTOGRAMS[name][1]
+        with self._lock:
+            buckets = self._histograms.get((name, labels))
+            if buckets is None:
+                # One slot per bound plus +Inf, then the sum
+                buckets = self._histograms[name, labels] = [0] * (len(bounds) + 1) + [0.0]
+            buckets[bisect.bisect_left(bounds, value)] += 1
+            buckets[-1] += value
+
+    def record(self, endpoint, method, status, seconds, size, usage):
+        """Count one finished request"""
+        labels = (('endpoint', endpoint),)
+        with self._lock:
+            self._counters['http_requests_total', labels + (('method', method), ('status', str(status)))] += 1
+            self._counters['http_response_bytes_total', labels] += size
+            self._counters['sql_queries_total', labels] += usage.queries
+            self._counters['sql_query_seconds_total', labels] += usage.sql_seconds
+        self.observe('http_request_duration_seconds', labels, seconds)
+        self.observe('sql_queries_per_request', labels, usage.queries)
+
+    def keep_slow(self, entry):
+        with self._lock:
+            self._slowest.append(entry)
+            self._slowest.sort(key=lambda e: e['ms'], reverse=True)
+            del self._slowest[SLOWEST_KEPT:]
+
+    def snapshot(self):
+        with self._lock:
+            return {'counters': [[name, labels, value] for (name, labels), value in self._counters.items()],
+                    'histograms': [[name, labels, list(buckets)]
+                                   for (name, labels), buckets in self._histograms.items()]}
+
+    def stats(self):
+        """Totals since the process started and the slowest sampled requests"""
+        with self._lock:
+            requests = sum(v for (name, _), v in self._counters.items() if name == 'http_requests_total')
+            queries = sum(v for (name, _), v in self._counters.items() if name == 'sql_queries_total')
+            return {'requests': int(requests), 'sql_queries': int(queries), 'slowest': list(self._slowest)}
+
+    def write(self, directory):
+        """Write this process's snapshot to `directory`"""
+        _write_json(os.path.join(directory, f'{os.getpid()}.json'), self.snapshot())
+
+    def write_every(self, directory, interval):
+        """Start a thread that writes the snapshot every `interval` seconds, once per process"""
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is not None:
+                return
+            self._writer = threading.Thread(target=self._write_loop, args=(directory, interval),
+                                            name='metrics-writer', daemon=True)
+        self._writer.start()
+
+    def _write_loop(self, directory, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.write(directory)
+            except OSError as e:
+                logger.error("Error writing metrics to %s: %s", directory, e)
+
+    def render(self, directory=None):
+        """The metrics in the Prometheus text format, summed over all workers if `directory` is set"""
+        if directory is None:
+            return _format(self.snapshot())
+        os.makedirs(directory, exist_ok=True)
+        self.write(directory)
+        return _format(_collect(directory))
+
+def _write_json(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _merge(total, snapshot):
+    for name, labels, value in snapshot['counters']:
+        key = (name, tuple(map(tuple, labels)))
+        total['counters'][key] = total['counters'].get(key, 0) + value
+    for name, labels, buckets in snapshot['histograms']:
+        key = (name, tuple(map(tuple, labels)))
+        current = total['histograms'].get(key)
+        total['histograms'][key] = buckets if current is None else [a + b for a, b in zip(current, buckets)]
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _collect(directory):
+    """Sum every worker's snapshot, folding those of exited workers into retired.json"""
+    with open(os.path.join(directory, '.lock'), 'w') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        retired_path = os.path.join(directory, 'retired.json')
+        retired = {'counters': {}, 'histograms': {}}
+        live = {'counters': {}, 'histograms': {}}
+        exited = []
+        for path in glob.glob(os.path.join(directory, '*.json')):
+            name = os.path.basename(path)[:-5]
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if name == 'retired' or (name.isdigit() and not _pid_alive(int(name))):
+                _merge(retired, snapshot)
+                if name != 'retired':
+                    exited.append(path)
+            else:
+                _merge(live, snapshot)
+        if exited:
+            _write_json(retired_path, _unkey(retired))
+            for path in exited:
+                os.remove(path)
+    _merge(live, _unkey(retired))
+    return _unkey(live)
+
+def _unkey(total):
+    return {'counters': [[n, l, v] for (n, l), v in total['counters'].items()],
+            'histograms': [[n, l, b] for (n, l), b in total['histograms'].items()]}
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+def _labels(pairs):
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}' if pairs else ''
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+def _format(snapshot):
+    lines = []
+    counters = defaultdict(list)
+    for name, labels, value in snapshot['counters']:
+        counters[name].append((labels, value))
+    for name, help_text in COUNTERS.items():
+        lines += [f'# HELP {PREFIX}{name} {help_text}', f'# TYPE {PREFIX}{name} counter']
+        lines += [f'{PREFIX}{name}{_labels(labels)} {_number(value)}' for labels, value in sorted(counters[name])]
+
+    histograms = defaultdict(list)
+    for name, labels, buckets in snapshot['histograms']:
+        histograms[name].append((labels, buckets))
+    for name, (help_text, bounds) in HISTOGRAMS.items():
+        lines += [f'# HELP {PREFIX}{name} {help_text}', f'# TYPE {PREFIX}{name} histogram']
+        for labels, buckets in sorted(histograms[name]):
+            labels = [tuple(pair) for pair in labels]
+            cumulative = 0
+            for bound, count in zip([*map(str, bounds), '+Inf'], buckets):
+                cumulative += count
+                lines.append(f'{PREFIX}{name}_bucket{_labels(labels + [("le", bound)])} {cumulative}')
+            lines.append(f'{PREFIX}{name}_sum{_labels(labels)} {_number(buckets[-1])}')
+            lines.append(f'{PREFIX}{name}_count{_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+def get_metrics():
+    """Return the process-wide metrics"""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics()
+    return _metrics
+
+def _reset_after_fork():
+    # A forked worker counts its own requests and writes its own snapshot
+    global _metrics, _metrics_lock
+    _metrics = None
+    _metrics_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+class _Usage:
+    """What one request spent on SQL and templates"""
+    __slots__ = ('queries', 'sql_seconds', 'render_seconds', 'statements')
+
+    def __init__(self, sample):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.render_seconds = 0.0
+        self.statements = [] if sample else None
+
+# Set for the duration of a request, in the thread (or greenlet) serving it
+_usage = contextvars.ContextVar('metrics_usage', default=None)
+
+class _Cursor(sqlite3.Cursor):
+    """Cursor that charges executing and fetching to the current request"""
+    _statement = None
+
+    def _charge(self, seconds, sql=None):
+        usage = _usage.get()
+        if usage is None:
+            metrics = get_metrics()
+            if sql is not None:
+                metrics.inc('sql_queries_total', (('endpoint', BACKGROUND),))
+            metrics.inc('sql_query_seconds_total', (('endpoint', BACKGROUND),), seconds)
+            return
+        if sql is not None:
+            usage.queries += 1
+            if usage.statements is not None:
+                self._statement = [sql, 0.0]
+                usage.statements.append(self._statement)
+        usage.sql_seconds += seconds
+        if self._statement is not None:
+            self._statement[1] += seconds
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._charge(time.perf_counter() - start, sql)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._charge(time.perf_counter() - start, sql)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            self._charge(time.perf_counter() - start)
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        try:
+            return super().fetchmany(self.arraysize if size is None else size)
+        finally:
+            self._charge(time.perf_counter() - start)
+
+    def fetchall(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self._charge(time.perf_counter() - start)
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            return super().__next__()
+        finally:
+            self._charge(time.perf_counter() - start)
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors record query counts and time (pass as sqlite3.connect(factory=...))"""
+
+    def cursor(self, factory=_Cursor):
+        return super().cursor(factory)
+
+    # Connection.execute() makes its cursor in C without calling cursor(), so route it through ours
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+class _Template(Template):
+    def render(self, *args, **kwargs):
+        usage = _usage.get()
+        if usage is None:
+            return super().render(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            usage.render_seconds += seconds
+            get_metrics().observe('template_render_seconds', (('template', self.name or '(string)'),), seconds)
+
+def _begin(sample_rate):
+    def begin():
+        g.metrics_start = time.perf_counter()
+        g.metrics_token = _usage.set(_Usage(sample_rate > 0 and random.random() < sample_rate))
+    return begin
+
+def _size(response):
+    g.metrics_status = response.status_code
+    g.metrics_size = response.calculate_content_length() or 0
+    return response
+
+def _grouped(statements):
+    """'3x  2.1 ms  SELECT ...' lines, one per distinct statement in first-run order"""
+    groups = {}
+    for sql, seconds in statements:
+        key = re.sub(r'\s+', ' ', sql).strip()[:200]
+        count, total = groups.get(key, (0, 0.0))
+        groups[key] = (count + 1, total + seconds)
+    return [f'{count}x {total * 1000:6.2f} ms  {sql}' for sql, (count, total) in groups.items()]
+
+def _end(slow_ms, directory, interval):
+    def end(exception=None):
+        token = g.pop('metrics_token', None)
+        if token is None:
+            return
+        usage = _usage.get()
+        _usage.reset(token)
+        seconds = time.perf_counter() - g.metrics_start
+        # after_request doesn't run when a view raises; the client gets a 500
+        status = g.get('metrics_status', 500)
+        metrics = get_metrics()
+        metrics.record(request.endpoint or '(unmatched)', request.method, status, seconds,
+                       g.get('metrics_size', 0), usage)
+        if usage.statements is not None and seconds * 1000 >= slow_ms:
+            queries = _grouped(usage.statements)
+            metrics.keep_slow({'ms': round(seconds * 1000, 1), 'method': request.method,
+                               'path': request.full_path.rstrip('?'), 'status': status,
+                               'sql_ms': round(usage.sql_seconds * 1000, 1),
+                               'render_ms': round(usage.render_seconds * 1000, 1), 'queries': queries})
+            logger.warning("Slow request %s %s -> %s in %.1f ms: %d queries in %.1f ms, templates %.1f ms%s",
+                           request.method, request.full_path.rstrip('?'), status, seconds * 1000, usage.queries,
+                           usage.sql_seconds * 1000, usage.render_seconds * 1000,
+                           ''.join('\n  ' + line for line in queries))
+        if directory:
+            metrics.write_every(directory, interval)
+    return end
+
+def _write_at_exit(directory):
+    if _metrics is not None:
+        try:
+            _metrics.write(directory)
+        except OSError:
+            pass
+
+def init_app(app):
+    """Time requests, queries and templates unless METRICS_ENABLED is off"""
+    app.config.setdefault('METRICS_ENABLED', True)
+    app.config.setdefault('METRICS_SAMPLE_RATE',
+                          float(os.environ.get('GRAMEENCONNECT_METRICS_SAMPLE_RATE', 0)))
+    app.config.setdefault('METRICS_SLOW_MS', int(os.environ.get('GRAMEENCONNECT_METRICS_SLOW_MS', DEFAULT_SLOW_MS)))
+    app.config.setdefault('METRICS_DIR', os.environ.get('GRAMEENCONNECT_METRICS_DIR'))
+    app.config.setdefault('METRICS_WRITE_INTERVAL', DEFAULT_WRITE_INTERVAL)
+    if not app.config['METRICS_ENABLED']:
+        return
+    # Picked up by the pool and the writer when they open their connections (see app/models/database.py)
+    app.config['DB_CONNECTION_FACTORY'] = InstrumentedConnection
+    app.jinja_env.template_class = _Template
+    if app.config['METRICS_DIR']:
+        os.makedirs(app.config['METRICS_DIR'], exist_ok=True)
+        # A recycled worker leaves its final counts behind for the others to report
+        atexit.register(_write_at_exit, app.config['METRICS_DIR'])
+    app.before_request(_begin(app.config['METRICS_SAMPLE_RATE']))
+    app.after_request(_size)
+    app.teardown_request(_end(app.config['METRICS_SLOW_MS'], app.config['METRICS_DIR'],
+                              app.config['METRICS_WRITE_INTERVAL']))
@@ -1,161 +1,358 @@
-import sqlite3
-from sqlite3 import Error
-import os
-from datetime import datetime
-
-def get_db_connection():
-    conn = sqlite3.connect('grameenconnect.db')
-    conn.row_factory = sqlite3.Row
-    return conn
-
-def initialize_db():
-    """Initialize the database with required tables if they don't exist"""
-    connection = None
-    try:
-        connection = get_db_connection()
-        
-        # Create users table
-        connection.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                fullname TEXT,
-                village TEXT,
-                contact TEXT NOT NULL,
-                joined_date TIMESTAMP NOT NULL,
-                profile_image TEXT,
-                banner_image TEXT
-            )
-        ''')
-        
-        # Create jobs table (don't drop it)
-        connection.execute('''
-            CREATE TABLE IF NOT EXISTS jobs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                description TEXT NOT NULL,
-                location TEXT,
-                contact TEXT NOT NULL,
-                category TEXT,
-                eligibility TEXT,
-                salary TEXT,
-                deadline TEXT,
-                user_id INTEGER NOT NULL,
-                posted_date TIMESTAMP NOT NULL,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # Create government schemes table
-        connection.execute('''
-            CREATE TABLE IF NOT EXISTS schemes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                description TEXT NOT NULL,
-                eligibility TEXT,
-                how_to_apply TEXT,
-                deadline TEXT,
-                agency TEXT,
-                contact TEXT,
-                website TEXT,
-                posted_date TIMESTAMP NOT NULL
-            )
-        ''')
-        
-        # Create infrastructure issues table
-        connection.execute('''
-            CREATE TABLE IF NOT EXISTS issues (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                description TEXT NOT NULL,
-                location TEXT NOT NULL,
-                category TEXT,
-                image TEXT,
-                user_id INTEGER NOT NULL,
-                reported_date TIMESTAMP NOT NULL,
-                status TEXT NOT NULL,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # Create marketplace products table
-        connection.execute('''
-            CREATE TABLE IF NOT EXISTS products (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                description TEXT,
-                price TEXT NOT NULL,
-                location TEXT,
-                contact TEXT NOT NULL,
-                category TEXT,
-                image TEXT,
-                user_id INTEGER NOT NULL,
-                posted_date TIMESTAMP NOT NULL,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # Create job applications table
-        connection.execute('''
-            CREATE TABLE IF NOT EXISTS job_applications (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                job_id INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                name TEXT NOT NULL,
-                phone TEXT NOT NULL,
-                experience TEXT,
-                message TEXT,
-                application_date TIMESTAMP NOT NULL,
-                status TEXT NOT NULL,
-                FOREIGN KEY (job_id) REFERENCES jobs (id),
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # Insert sample government schemes if table is empty
-        if not connection.execute('SELECT COUNT(*) FROM schemes').fetchone()[0]:
-            sample_schemes = [
-                ('Pradhan Mantri Kisan Samman Nidhi', 
-                 'Financial support of Rs. 6000 per year to eligible farmer families.',
-                 'Small and marginal farmers with combined landholding up to 2 hectares.',
-                 '1. Register online at pmkisan.gov.in or visit local agriculture office.\n2. Submit land records and bank details.',
-                 'Ongoing',
-                 'Ministry of Agriculture & Farmers Welfare',
-                 '1800-115-526',
-                 'https://pmkisan.gov.in/',
-                 datetime.now()),
-                
-                ('Pradhan Mantri Fasal Bima Yojana',
-                 'Crop insurance scheme providing financial support to farmers in case of crop failure.',
-                 'All farmers including sharecroppers and tenant farmers.',
-                 '1. Apply through nearest bank branch, CSC center or online.\n2. Submit land records and pay premium amount.',
-                 'Seasonal (Varies by crop)',
-                 'Ministry of Agriculture & Farmers Welfare',
-                 '1800-110-144',
-                 'https://pmfby.gov.in/',
-                 datetime.now()),
-                
-                ('Pradhan Mantri Awas Yojana - Gramin',
-                 'Housing scheme to provide financial assistance for construction of pucca houses in rural areas.',
-                 'Houseless rural families and those living in dilapidated houses.',
-                 '1. Apply through Gram Panchayat.\n2. Submit income proof and land documents.',
-                 'Ongoing',
-                 'Ministry of Rural Development',
-                 '1800-11-6446',
-                 'https://pmayg.nic.in/',
-                 datetime.now())
-            ]
-            
-            connection.executemany('''
-                INSERT INTO schemes (title, description, eligibility, how_to_apply, deadline, agency, contact, website, posted_date)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', sample_schemes)
-        
-        connection.commit()
-        
-    except Error as e:
-        print(f"Database error: {e}")
-    finally:
-        if connection:
-            connection.close() 
\ No newline at end of file
+import logging
+import sqlite3
+from sqlite3 import Error
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from flask import g, current_app
+from app.models.migrations import run_migrations
+
+logger = logging.getLogger(__name__)
+
+# Absolute path so the database doesn't depend on the working directory
+DEFAULT_DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'grameenconnect.db'))
+DEFAULT_POOL_SIZE = 5
+DEFAULT_POOL_TIMEOUT = 10  # seconds to wait for a free connection
+
+# Per-connection settings for concurrent access; journal_mode=WAL is persistent
+# and is set once by initialize_db()
+CONNECTION_PRAGMAS = (
+    ('busy_timeout', 5000),       # wait up to 5s on a locked database instead of failing
+    ('synchronous', 'NORMAL'),    # safe with WAL, fsyncs only at checkpoints
+    ('cache_size', -16000),       # 16 MB page cache per connection
+    ('mmap_size', 134217728),     # memory-map up to 128 MB of the file for reads
+    ('temp_store', 'MEMORY'),
+)
+
+def get_db_path():
+    """Return the absolute database path from app config, env or the default"""
+    try:
+        path = current_app.config.get('DATABASE')
+    except RuntimeError:
+        # Outside an app context (scripts, initialize_db at import time)
+        path = None
+    path = path or os.environ.get('GRAMEENCONNECT_DB') or DEFAULT_DB_PATH
+    return os.path.abspath(path)
+
+def get_connection_factory():
+    """Return the sqlite3.Connection class the pool and writer open (DB_CONNECTION_FACTORY, see app/metrics.py)"""
+    try:
+        return current_app.config.get('DB_CONNECTION_FACTORY') or sqlite3.Connection
+    except RuntimeError:
+        return sqlite3.Connection
+
+def configure_connection(conn):
+    """Apply the shared pragmas to a freshly opened connection"""
+    for name, value in CONNECTION_PRAGMAS:
+        conn.execute(f'PRAGMA {name} = {value}')
+    return conn
+
+def get_db_connection(path=None):
+    """Open a standalone connection (for scripts and schema setup, not for routes)"""
+    conn = sqlite3.connect(path or get_db_path())
+    conn.row_factory = sqlite3.Row
+    return configure_connection(conn)
+
+class PoolTimeout(Error):
+    """Raised when no pooled connection becomes free within the timeout"""
+
+class ConnectionPool:
+    """A bounded pool of pre-opened SQLite connections shared across threads"""
+
+    def __init__(self, path, size=DEFAULT_POOL_SIZE, timeout=DEFAULT_POOL_TIMEOUT, factory=sqlite3.Connection):
+        self.path = path
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+        self._in_use = 0
+
+        for _ in range(size):
+            self._idle.put(self._connect())
+
+    def _connect(self):
+        # Connections move between request threads, but only one thread uses each at a time
+        conn = sqlite3.connect(self.path, check_same_thread=False, factory=self.factory)
+        conn.row_factory = sqlite3.Row
+        return configure_connection(conn)
+
+    def acquire(self):
+        """Check out a connection, blocking up to `timeout` seconds"""
+        start = time.perf_counter()
+        try:
+            conn = self._idle.get_nowait()
+            waited = False
+        except queue.Empty:
+            waited = True
+            try:
+                conn = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                with self._lock:
+                    self._timeouts += 1
+                raise PoolTimeout(f"No database connection free after {self.timeout}s (pool size {self.size})")
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self._checkouts += 1
+            self._in_use += 1
+            self._wait_time += elapsed
+            if waited:
+                self._waits += 1
+            if elapsed > self._max_wait:
+                self._max_wait = elapsed
+        return conn
+
+    def release(self, conn):
+        """Return a connection to the pool, discarding any uncommitted work"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            # A broken connection is replaced rather than handed out again
+            conn.close()
+            conn = self._connect()
+        with self._lock:
+            self._in_use -= 1
+        self._idle.put(conn)
+
+    def stats(self):
+        """Checkout counts and wait times since the pool was created"""
+        with self._lock:
+            return {
+                'size': self.size,
+                'in_use': self._in_use,
+                'idle': self._idle.qsize(),
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+                'total_wait_ms': round(self._wait_time * 1000, 3),
+                'avg_wait_ms': round(self._wait_time * 1000 / self._checkouts, 3) if self._checkouts else 0.0,
+                'max_wait_ms': round(self._max_wait * 1000, 3),
+            }
+
+    def close(self):
+        """Close all idle connections"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Return the process-wide pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                config = current_app.config
+                _pool = ConnectionPool(get_db_path(),
+                                       size=config.get('DB_POOL_SIZE', DEFAULT_POOL_SIZE),
+                                       timeout=config.get('DB_POOL_TIMEOUT', DEFAULT_POOL_TIMEOUT),
+                                       factory=get_connection_factory())
+    return _pool
+
+def _reset_after_fork():
+    # SQLite connections must not be used across fork(); a forked worker opens its own
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def get_db():
+    """Return this request's connection, checking one out of the pool on first use"""
+    if 'db' not in g:
+        g.db = get_pool().acquire()
+    return g.db
+
+def release_db(exception=None):
+    """Teardown handler that hands the request's connection back to the pool"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        get_pool().release(conn)
+
+def init_app(app):
+    """Register pool configuration and the per-request teardown on the app"""
+    app.config.setdefault('DATABASE', os.environ.get('GRAMEENCONNECT_DB', DEFAULT_DB_PATH))
+    app.config.setdefault('DB_POOL_SIZE', int(os.environ.get('GRAMEENCONNECT_DB_POOL_SIZE', DEFAULT_POOL_SIZE)))
+    app.config.setdefault('DB_POOL_TIMEOUT', DEFAULT_POOL_TIMEOUT)
+    app.teardown_appcontext(release_db)
+
+def initialize_db():
+    """Initialize the database with required tables if they don't exist; returns False on a database error"""
+    connection = None
+    try:
+        connection = get_db_connection()
+        
+        # Let readers proceed while a write is in progress
+        connection.execute('PRAGMA journal_mode = WAL')
+        
+        # Create users table
+        connection.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                password TEXT NOT NULL,
+                fullname TEXT,
+                village TEXT,
+                contact TEXT NOT NULL,
+                joined_date TIMESTAMP NOT NULL,
+                profile_image TEXT,
+                banner_image TEXT
+            )
+        ''')
+        
+        # Create jobs table (don't drop it)
+        connection.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                location TEXT,
+                contact TEXT NOT NULL,
+                category TEXT,
+                eligibility TEXT,
+                salary TEXT,
+                deadline TEXT,
+                user_id INTEGER NOT NULL,
+                posted_date TIMESTAMP NOT NULL,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+        ''')
+        
+        # Create government schemes table
+        connection.execute('''
+            CREATE TABLE IF NOT EXISTS schemes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                eligibility TEXT,
+                how_to_apply TEXT,
+                deadline TEXT,
+                agency TEXT,
+                contact TEXT,
+                website TEXT,
+                posted_date TIMESTAMP NOT NULL
+            )
+        ''')
+        
+        # Create infrastructure issues table
+        connection.execute('''
+            CREATE TABLE IF NOT EXISTS issues (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                location TEXT NOT NULL,
+                category TEXT,
+                image TEXT,
+                user_id INTEGER NOT NULL,
+                reported_date TIMESTAMP NOT NULL,
+                status TEXT NOT NULL,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+        ''')
+        
+        # Create marketplace products table
+        connection.execute('''
+            CREATE TABLE IF NOT EXISTS products (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                description TEXT,
+                price TEXT NOT NULL,
+                location TEXT,
+                contact TEXT NOT NULL,
+                category TEXT,
+                image TEXT,
+                user_id INTEGER NOT NULL,
+                posted_date TIMESTAMP NOT NULL,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+        ''')
+        
+        # Create job applications table
+        connection.execute('''
+            CREATE TABLE IF NOT EXISTS job_applications (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                phone TEXT NOT NULL,
+                experience TEXT,
+                message TEXT,
+                application_date TIMESTAMP NOT NULL,
+                status TEXT NOT NULL,
+                FOREIGN KEY (job_id) REFERENCES jobs (id),
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+        ''')
+        
+        # Insert sample government schemes if table is empty
+        if not connection.execute('SELECT COUNT(*) FROM schemes').fetchone()[0]:
+            sample_schemes = [
+                ('Pradhan Mantri Kisan Samman Nidhi', 
+                 'Financial support of Rs. 6000 per year to eligible farmer families.',
+                 'Small and marginal farmers with combined landholding up to 2 hectares.',
+                 '1. Register online at pmkisan.gov.in or visit local agriculture office.\n2. Submit land records and bank details.',
+                 'Ongoing',
+                 'Ministry of Agriculture & Farmers Welfare',
+                 '1800-115-526',
+                 'https://pmkisan.gov.in/',
+                 datetime.now()),
+                
+                ('Pradhan Mantri Fasal Bima Yojana',
+                 'Crop insurance scheme providing financial support to farmers in case of crop failure.',
+                 'All farmers including sharecroppers and tenant farmers.',
+                 '1. Apply through nearest bank branch, CSC center or online.\n2. Submit land records and pay premium amount.',
+                 'Seasonal (Varies by crop)',
+                 'Ministry of Agriculture & Farmers Welfare',
+                 '1800-110-144',
+                 'https://pmfby.gov.in/',
+                 datetime.now()),
+                
+                ('Pradhan Mantri Awas Yojana - Gramin',
+                 'Housing scheme to provide financial assistance for construction of pucca houses in rural areas.',
+                 'Houseless rural families and those living in dilapidated houses.',
+                 '1. Apply through Gram Panchayat.\n2. Submit income proof and land documents.',
+                 'Ongoing',
+                 'Ministry of Rural Development',
+                 '1800-11-6446',
+                 'https://pmayg.nic.in/',
+                 datetime.now())
+            ]
+            
+            connection.executemany('''
+                INSERT INTO schemes (title, description, eligibility, how_to_apply, deadline, agency, contact, website, posted_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', sample_schemes)
+        
+        connection.commit()
+        
+        # Bring indexes and later schema changes up to date
+        run_migrations(connection)
+        return True
+        
+    except Error as e:
+        logger.error("Database error: %s", e)
+        return False
+    finally:
+        if connection:
+            connection.close()
+
+if __name__ == '__main__':
+    # One-shot schema setup, run before starting the app (see gunicorn.conf.py)
+    import sys
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    if not initialize_db():
+        sys.exit(1)
+    print(f"Database: {get_db_path()} is ready")
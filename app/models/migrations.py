@@ -0,0 +1,192 @@
+"""
+Versioned schema migrations for the GrameenConnect database.
+
+Each migration is a (version, description, steps) tuple; steps are SQL
+strings or callables taking the connection. Applied versions are recorded
+in the schema_version table, so an existing grameenconnect.db is upgraded
+in place by running only the migrations it hasn't seen yet.
+"""
+import logging
+from datetime import datetime
+from app.models.search import create_search_index, ensure_search_index
+from app.storage import refcount_triggers, recount
+from app.models import stats, places
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = [
+    (1, 'Indexes for listing, category filter and per-user lookups', [
+        # Listing pages sort newest first; a backward scan of these gives (date DESC, id DESC)
+        'CREATE INDEX IF NOT EXISTS idx_jobs_posted ON jobs (posted_date)',
+        'CREATE INDEX IF NOT EXISTS idx_jobs_category_posted ON jobs (category, posted_date)',
+        'CREATE INDEX IF NOT EXISTS idx_schemes_posted ON schemes (posted_date)',
+        'CREATE INDEX IF NOT EXISTS idx_issues_reported ON issues (reported_date)',
+        'CREATE INDEX IF NOT EXISTS idx_products_posted ON products (posted_date)',
+        'CREATE INDEX IF NOT EXISTS idx_products_category_posted ON products (category, posted_date)',
+        # Profile page: everything a user posted, newest first
+        'CREATE INDEX IF NOT EXISTS idx_jobs_user ON jobs (user_id, posted_date)',
+        'CREATE INDEX IF NOT EXISTS idx_issues_user ON issues (user_id, reported_date)',
+        'CREATE INDEX IF NOT EXISTS idx_products_user ON products (user_id, posted_date)',
+        'CREATE INDEX IF NOT EXISTS idx_job_applications_user_date ON job_applications (user_id, application_date)',
+    ]),
+    (2, 'One application per user and job', [
+        # Keep the most recent application where older databases have duplicates
+        '''DELETE FROM job_applications
+           WHERE id NOT IN (SELECT MAX(id) FROM job_applications GROUP BY user_id, job_id)''',
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_job_applications_user_job ON job_applications (user_id, job_id)',
+    ]),
+    (3, 'Full-text search indexes for products and jobs', [
+        create_search_index,
+    ]),
+    (4, 'Resized variants of uploaded images', [
+        # `image` is the file name stored in issues.image, products.image or users.*_image
+        '''CREATE TABLE IF NOT EXISTS image_variants (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               image TEXT NOT NULL,
+               variant TEXT NOT NULL,
+               format TEXT NOT NULL,
+               width INTEGER NOT NULL,
+               height INTEGER NOT NULL,
+               filename TEXT NOT NULL,
+               bytes INTEGER NOT NULL,
+               UNIQUE (image, variant, format)
+           )''',
+    ]),
+    (5, 'Durable background task queue and upload processing status', [
+        '''CREATE TABLE IF NOT EXISTS tasks (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               kind TEXT NOT NULL,
+               payload TEXT NOT NULL,
+               status TEXT NOT NULL DEFAULT 'queued',
+               attempts INTEGER NOT NULL DEFAULT 0,
+               error TEXT,
+               result TEXT,
+               created_at TIMESTAMP NOT NULL,
+               run_after TIMESTAMP NOT NULL,
+               started_at TIMESTAMP,
+               finished_at TIMESTAMP,
+               locked_until TIMESTAMP
+           )''',
+        # Workers look for the oldest claimable task; finished ones drop out of this index
+        "CREATE INDEX IF NOT EXISTS idx_tasks_claimable ON tasks (status, id) WHERE status IN ('queued', 'running')",
+        # One row per upload handed to the image pipeline; status is 'pending' until its task finishes
+        '''CREATE TABLE IF NOT EXISTS image_uploads (
+               image TEXT PRIMARY KEY,
+               status TEXT NOT NULL DEFAULT 'pending',
+               source TEXT NOT NULL,
+               checksum TEXT,
+               bytes INTEGER,
+               task_id INTEGER,
+               created_at TIMESTAMP NOT NULL,
+               processed_at TIMESTAMP
+           )''',
+    ]),
+    (6, 'Content-addressed upload blobs with reference counts', [
+        # `name` is what users/issues/products store; `digest` is the SHA-256 of the uploaded bytes
+        '''CREATE TABLE IF NOT EXISTS blobs (
+               name TEXT PRIMARY KEY,
+               digest TEXT NOT NULL,
+               size INTEGER NOT NULL,
+               refcount INTEGER NOT NULL DEFAULT 0,
+               created_at TIMESTAMP NOT NULL
+           )''',
+        'CREATE INDEX IF NOT EXISTS idx_blobs_refcount ON blobs (refcount) WHERE refcount <= 0',
+        *refcount_triggers(),
+        recount,
+    ]),
+    (7, 'Trigger-maintained counters for the site statistics', [
+        '''CREATE TABLE IF NOT EXISTS counters (
+               name TEXT NOT NULL,
+               bucket TEXT NOT NULL,
+               count INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (name, bucket)
+           ) WITHOUT ROWID''',
+        *stats.counter_triggers(),
+        stats.recount,
+    ]),
+    (8, 'Gazetteer places with a spatial index, resolved from free-text locations', [
+        '''CREATE TABLE IF NOT EXISTS places (
+               id INTEGER PRIMARY KEY,
+               name TEXT NOT NULL,
+               district TEXT NOT NULL,
+               state TEXT NOT NULL,
+               lat REAL NOT NULL,
+               lon REAL NOT NULL,
+               UNIQUE (name, district, state)
+           )''',
+        # Normalized names and aliases (see places.normalize) to the place they mean
+        '''CREATE TABLE IF NOT EXISTS place_names (
+               name TEXT PRIMARY KEY,
+               place_id INTEGER NOT NULL REFERENCES places (id)
+           ) WITHOUT ROWID''',
+        'CREATE VIRTUAL TABLE IF NOT EXISTS places_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon)',
+        *(f'ALTER TABLE {table} ADD COLUMN place_id INTEGER REFERENCES places (id)' for table in places.LOCATED),
+        # Radius filters read one range of these per place and merge them newest first
+        'CREATE INDEX IF NOT EXISTS idx_jobs_place_posted ON jobs (place_id, posted_date)',
+        'CREATE INDEX IF NOT EXISTS idx_products_place_posted ON products (place_id, posted_date)',
+        'CREATE INDEX IF NOT EXISTS idx_issues_place_reported ON issues (place_id, reported_date)',
+        places.load_gazetteer,
+    ]),
+    (9, "Count job and product locations under 'location', not 'village'", [
+        # The insert and delete triggers name every breakdown of their table
+        *(f'DROP TRIGGER IF EXISTS counters_{table}_{suffix}'
+          for table in ('jobs', 'products') for suffix in ('i', 'd', 'village_u')),
+        *stats.counter_triggers(),
+        stats.recount,
+    ]),
+]
+
+def ensure_version_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP NOT NULL
+        )
+    ''')
+
+def current_version(conn):
+    """Return the highest applied migration version, 0 for a fresh database"""
+    ensure_version_table(conn)
+    return conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+
+def run_migrations(conn, migrations=MIGRATIONS):
+    """Apply pending migrations in order, each in its own transaction; returns versions applied"""
+    if conn.in_transaction:
+        conn.commit()
+    applied = []
+    version = current_version(conn)
+
+    for number, description, steps in sorted(migrations, key=lambda m: m[0]):
+        if number <= version:
+            continue
+        conn.execute('BEGIN')
+        try:
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute('INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)',
+                         (number, description, datetime.now()))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        logger.info("Applied migration %d: %s", number, description)
+        applied.append(number)
+
+    if current_version(conn) >= 3:
+        # Migration 3 is recorded even where SQLite had no FTS5; try again in case it has now
+        ensure_search_index(conn)
+    return applied
+
+if __name__ == '__main__':
+    from app.models.database import get_db_connection
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    connection = get_db_connection()
+    try:
+        done = run_migrations(connection)
+        print(f"Schema is at version {current_version(connection)} ({len(done)} migration(s) applied)")
+    finally:
+        connection.close()
@@ -0,0 +1,122 @@
+"""
+Keyset (cursor) pagination for the listing pages.
+
+Pages are ordered newest first on (sort column, id). A cursor encodes the
+sort value and id of the row at the edge of the current page, so fetching
+the next page is an index range scan from that point instead of an OFFSET
+that re-reads everything before it.
+"""
+import base64
+import json
+import threading
+import time
+from collections import namedtuple
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+DEFAULT_COUNT_TTL = 60  # seconds a cached total stays valid
+MAX_MERGED_RANGES = 100  # any_of values read as separate index ranges; more fall back to an IN list
+
+Page = namedtuple('Page', ['items', 'next_cursor', 'prev_cursor', 'total'])
+
+def encode_cursor(sort_value, row_id):
+    """Encode a (sort value, id) position as an opaque URL-safe token"""
+    raw = json.dumps([sort_value, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor back to (sort value, id); returns None if it is missing or malformed"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    # Anything else would reach SQLite as a parameter it can't bind (a list or object) or compare
+    if isinstance(sort_value, bool) or not isinstance(sort_value, (str, int, float)):
+        return None
+    if isinstance(row_id, bool) or not isinstance(row_id, int):
+        return None
+    return sort_value, row_id
+
+def in_condition(column, values):
+    """(where, params) for `column` being one of `values`"""
+    return f'{column} IN ({", ".join("?" * len(values))})', tuple(values)
+
+def fetch_page(conn, table, columns, sort_column, where=None, params=(),
+               after=None, before=None, page_size=DEFAULT_PAGE_SIZE, total=None, any_of=None):
+    """Fetch one page of `table` newest first.
+
+    `columns` must include `id` and `sort_column`. Pass the `after` cursor to
+    move to older rows and `before` to move back to newer ones.
+
+    `any_of` is an optional (column, values) pair keeping the rows whose
+    `column` is one of `values`. Each value is read as its own range of an
+    index on (column, sort_column) and SQLite merges the ranges in order, so
+    the page costs the same however many rows match; an IN list would sort
+    every match first.
+    """
+    page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+    conditions = [where] if where else []
+    args = list(params)
+
+    position = decode_cursor(before)
+    backwards = position is not None
+    if not backwards:
+        position = decode_cursor(after)
+
+    if position is not None:
+        conditions.append(f'({sort_column}, id) {">" if backwards else "<"} (?, ?)')
+        args.extend(position)
+
+    order = 'ASC' if backwards else 'DESC'
+    select = f'SELECT {", ".join(columns)} FROM {table}'
+    if any_of and 0 < len(any_of[1]) <= MAX_MERGED_RANGES:
+        column, values = any_of
+        query = ' UNION ALL '.join(f'{select} WHERE ' + ' AND '.join([f'{column} = ?', *conditions]) for _ in values)
+        args = [arg for value in values for arg in (value, *args)]
+    else:
+        if any_of:
+            condition, values = in_condition(*any_of)
+            conditions.append(condition)
+            args.extend(values)
+        query = select
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+    query += f' ORDER BY {sort_column} {order}, id {order} LIMIT ?'
+    args.append(page_size + 1)
+
+    rows = conn.execute(query, args).fetchall()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if backwards:
+        rows.reverse()
+        has_newer, has_older = has_more, True
+    else:
+        has_newer, has_older = position is not None, has_more
+
+    next_cursor = encode_cursor(rows[-1][sort_column], rows[-1]['id']) if rows and has_older else None
+    prev_cursor = encode_cursor(rows[0][sort_column], rows[0]['id']) if rows and has_newer else None
+    return Page(rows, next_cursor, prev_cursor, total)
+
+_counts = {}
+_counts_lock = threading.Lock()
+
+def cached_count(conn, table, where=None, params=(), ttl=DEFAULT_COUNT_TTL):
+    """COUNT(*) for a listing, cached in-process for `ttl` seconds"""
+    key = (table, where, tuple(params))
+    now = time.monotonic()
+    with _counts_lock:
+        hit = _counts.get(key)
+    if hit and hit[1] > now:
+        return hit[0]
+
+    query = f'SELECT COUNT(*) FROM {table}'
+    if where:
+        query += ' WHERE ' + where
+    count = conn.execute(query, params).fetchone()[0]
+    with _counts_lock:
+        _counts[key] = (count, now + ttl)
+    return count
@@ -0,0 +1,185 @@
+"""
+Places: free-text locations resolved to gazetteer entries, for "near me"
+filters.
+
+app/data/gazetteer.csv lists villages and towns with their district, state,
+coordinates and alternative spellings (Hindi names, old names), separated
+by '|'. It is loaded into `places`, `place_names` (every normalized name
+and alias; where two places share one, the earlier row in the file wins)
+and `places_rtree`, an R*Tree over the coordinates.
+
+jobs.location, products.location, issues.location and users.village stay
+as the user typed them; the routes that write them also store the place
+they resolve to in `place_id`. A radius filter finds the places in range
+from the R*Tree, then the rows from their (place_id, date) indexes (see
+fetch_page's any_of).
+
+Reload the gazetteer after editing it, which also re-resolves every row:
+
+    python -m app.models.places --load
+"""
+import csv
+import difflib
+import logging
+import math
+import os
+import re
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'gazetteer.csv')
+
+# table: free-text column that place_id is resolved from
+LOCATED = {'jobs': 'location', 'products': 'location', 'issues': 'location', 'users': 'village'}
+
+MAX_RADIUS_KM = 500
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+MAX_NAME_WORDS = 3  # longest place name, in words, looked for inside a location
+SUGGESTION_CUTOFF = 0.7  # how alike (0-1) a name must be spelled to be suggested
+
+# Commas, punctuation and the danda separate the parts of an address
+_SEPARATORS = re.compile(r'[\s"\'()\[\]:;,.!?।/\\\-]+')
+_NUKTA = '़'
+
+def normalize(text):
+    """Lowercase, NFKC-normalized words of `text`; Devanagari spelled with or without nukta compares equal"""
+    text = unicodedata.normalize('NFKC', text or '').casefold().replace(_NUKTA, '')
+    return [word for word in _SEPARATORS.split(text) if word]
+
+def _candidates(text):
+    """Every run of up to MAX_NAME_WORDS words in `text`, longest first, then last first"""
+    words = normalize(text)
+    return [' '.join(words[i:i + n])
+            for n in range(min(MAX_NAME_WORDS, len(words)), 0, -1)
+            for i in range(len(words) - n, -1, -1)]
+
+def resolve_place(conn, text):
+    """The id of the gazetteer place `text` names, or None.
+
+    A location like 'Gram Panchayat Office, Rampur' resolves through the
+    longest run of its words that is a place name, preferring later words
+    (the village usually follows the building or street).
+    """
+    candidates = _candidates(text)
+    if not candidates:
+        return None
+    found = dict(conn.execute(f'SELECT name, place_id FROM place_names WHERE name IN ({", ".join("?" * len(candidates))})',
+                              candidates).fetchall())
+    return next((found[name] for name in candidates if name in found), None)
+
+def suggest_places(conn, text, limit=3):
+    """Places named or aliased like some part of `text`, closest spelling first, for a location resolve_place misses"""
+    candidates = _candidates(text)
+    if not candidates:
+        return []
+    scores = {}
+    for name, place_id in conn.execute('SELECT name, place_id FROM place_names').fetchall():
+        score = max(difflib.SequenceMatcher(None, candidate, name).ratio() for candidate in candidates)
+        if score >= SUGGESTION_CUTOFF and score > scores.get(place_id, 0):
+            scores[place_id] = score
+    return [get_place(conn, place_id) for place_id in sorted(scores, key=scores.get, reverse=True)[:limit]]
+
+def get_place(conn, place_id):
+    """The places row for `place_id`, or None"""
+    if place_id is None:
+        return None
+    return conn.execute('SELECT id, name, district, state, lat, lon FROM places WHERE id = ?', (place_id,)).fetchone()
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Great-circle (haversine) distance between two points"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def places_within(conn, place, radius_km):
+    """Ids of the places within `radius_km` of `place`, nearest first.
+
+    The R*Tree narrows the search to a bounding box; the exact distance
+    then drops the box's corners.
+    """
+    radius_km = min(radius_km, MAX_RADIUS_KM)
+    dlat = radius_km / KM_PER_DEGREE
+    dlon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(place['lat'])), 0.01))
+    rows = conn.execute('''
+        SELECT p.id, p.lat, p.lon FROM places_rtree r JOIN places p ON p.id = r.id
+        WHERE r.max_lat >= ? AND r.min_lat <= ? AND r.max_lon >= ? AND r.min_lon <= ?
+    ''', (place['lat'] - dlat, place['lat'] + dlat, place['lon'] - dlon, place['lon'] + dlon)).fetchall()
+    distances = ((distance_km(place['lat'], place['lon'], row['lat'], row['lon']), row['id']) for row in rows)
+    return [place_id for distance, place_id in sorted(distances) if distance <= radius_km]
+
+def read_gazetteer(path=GAZETTEER_PATH):
+    """Rows of the gazetteer file as dicts, aliases split into a list"""
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            row['lat'], row['lon'] = float(row['lat']), float(row['lon'])
+            row['aliases'] = [alias for alias in (row.get('aliases') or '').split('|') if alias.strip()]
+            yield row
+
+def load_gazetteer(conn, path=GAZETTEER_PATH):
+    """Bring places, place_names and places_rtree in line with the file, then re-resolve every row.
+
+    Places keep their ids across reloads, matched on (name, district, state).
+    """
+    keep = []
+    conn.execute('DELETE FROM place_names')
+    for row in read_gazetteer(path):
+        place_id = conn.execute('''
+            INSERT INTO places (name, district, state, lat, lon) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (name, district, state) DO UPDATE SET lat = excluded.lat, lon = excluded.lon
+            RETURNING id
+        ''', (row['name'], row['district'], row['state'], row['lat'], row['lon'])).fetchone()[0]
+        keep.append(place_id)
+        conn.executemany('INSERT OR IGNORE INTO place_names (name, place_id) VALUES (?, ?)',
+                         [(' '.join(normalize(name)), place_id) for name in (row['name'], *row['aliases'])
+                          if normalize(name)])
+    conn.execute('CREATE TEMP TABLE IF NOT EXISTS loaded_places (id INTEGER PRIMARY KEY)')
+    conn.execute('DELETE FROM loaded_places')
+    conn.executemany('INSERT OR IGNORE INTO loaded_places (id) VALUES (?)', [(place_id,) for place_id in keep])
+    for table in LOCATED:
+        conn.execute(f'UPDATE {table} SET place_id = NULL WHERE place_id NOT IN (SELECT id FROM loaded_places)')
+    conn.execute('DELETE FROM places WHERE id NOT IN (SELECT id FROM loaded_places)')
+    conn.execute('DROP TABLE loaded_places')
+
+    conn.execute('DELETE FROM places_rtree')
+    conn.execute('INSERT INTO places_rtree (id, min_lat, max_lat, min_lon, max_lon) SELECT id, lat, lat, lon, lon FROM places')
+    logger.info("Loaded %d places from %s", len(keep), path)
+    resolve_all(conn)
+
+def resolve_all(conn):
+    """Set place_id on every row of the LOCATED tables from its free-text location"""
+    for table, column in LOCATED.items():
+        resolved = {}
+        changes = []
+        for row_id, text, place_id in conn.execute(f'SELECT id, {column}, place_id FROM {table}').fetchall():
+            if text not in resolved:
+                resolved[text] = resolve_place(conn, text)
+            if resolved[text] != place_id:
+                changes.append((resolved[text], row_id))
+        conn.executemany(f'UPDATE {table} SET place_id = ? WHERE id = ?', changes)
+        logger.info("%s: %d rows re-resolved, %d distinct locations", table, len(changes), len(resolved))
+
+if __name__ == '__main__':
+    import argparse
+    from app.models.database import get_db_connection
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    parser = argparse.ArgumentParser(description='Gazetteer and place resolution')
+    parser.add_argument('--load', metavar='CSV', nargs='?', const=GAZETTEER_PATH,
+                        help='(re)load the gazetteer (default: app/data/gazetteer.csv) and re-resolve every row')
+    parser.add_argument('--resolve', metavar='TEXT', help='show the place a location resolves to')
+    args = parser.parse_args()
+
+    connection = get_db_connection()
+    try:
+        if args.load:
+            load_gazetteer(connection, args.load)
+            connection.commit()
+        if args.resolve:
+            place = get_place(connection, resolve_place(connection, args.resolve))
+            print(f"{place['name']}, {place['district']}, {place['state']} ({place['lat']}, {place['lon']})"
+                  if place else 'No match')
+    finally:
+        connection.close()
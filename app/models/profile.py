@@ -0,0 +1,44 @@
+"""
+Data for the profile page.
+
+The page itself only shows how many jobs, issues, products and
+applications the user has, which one aggregate query answers from the
+per-user indexes. The items of each tab are fetched a page at a time, by
+keyset pagination, when the tab is opened (see /profile/<tab> in
+app/views.py), so the page costs the same however much a user has posted.
+"""
+from app.models.pagination import fetch_page
+
+COUNTS_QUERY = '''
+    SELECT (SELECT COUNT(*) FROM jobs WHERE user_id = :user_id) AS jobs,
+           (SELECT COUNT(*) FROM issues WHERE user_id = :user_id) AS issues,
+           (SELECT COUNT(*) FROM products WHERE user_id = :user_id) AS products,
+           (SELECT COUNT(*) FROM job_applications WHERE user_id = :user_id) AS applications
+'''
+
+# Applications carry the title of the job they are for; SQLite flattens this into the outer query
+APPLICATIONS = '''(SELECT ja.id, ja.user_id, ja.status, ja.name, ja.experience, ja.message,
+                          ja.application_date, j.title AS job_title
+                   FROM job_applications ja JOIN jobs j ON ja.job_id = j.id)'''
+
+# tab: (table, columns the tab shows, sort column); descriptions are cut to what a one-line item shows
+TABS = {
+    'jobs': ('jobs', ('id', 'title', 'category', 'substr(description, 1, 121) AS description', 'location',
+                      'posted_date'), 'posted_date'),
+    'issues': ('issues', ('id', 'title', 'status', 'substr(description, 1, 121) AS description', 'location',
+                          'reported_date'), 'reported_date'),
+    'products': ('products', ('id', 'name', 'price', 'substr(description, 1, 101) AS description', 'image',
+                              'posted_date'), 'posted_date'),
+    'applications': (APPLICATIONS, ('id', 'job_title', 'status', 'name', 'experience', 'message',
+                                    'application_date'), 'application_date'),
+}
+
+def profile_counts(conn, user_id):
+    """{'jobs': n, 'issues': n, 'products': n, 'applications': n} for `user_id` in one query"""
+    return dict(conn.execute(COUNTS_QUERY, {'user_id': user_id}).fetchone())
+
+def fetch_tab(conn, tab, user_id, after=None, page_size=None):
+    """One page of a profile tab's items, newest first, from the `after` cursor"""
+    table, columns, sort_column = TABS[tab]
+    kwargs = {'page_size': page_size} if page_size else {}
+    return fetch_page(conn, table, columns, sort_column, 'user_id = ?', (user_id,), after=after, **kwargs)
@@ -0,0 +1,201 @@
+"""
+Full-text search over marketplace products and jobs using SQLite FTS5.
+
+The products_fts and jobs_fts tables are external-content indexes kept in
+sync with their source tables by triggers. Results are ranked with bm25,
+weighting matches in the name/title above the rest.
+
+Backfill (re)indexes all existing rows:
+
+    python -m app.models.search --rebuild
+"""
+import logging
+import re
+import sqlite3
+from app.models.pagination import Page, encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# unicode61 treats Devanagari vowel signs and viramas as separators, which
+# splits Hindi words apart (किसान -> क स न); declaring them token characters
+# keeps each word whole
+DEVANAGARI_MARKS = ''.join(chr(c) for c in [*range(0x0900, 0x0904), *range(0x093A, 0x0950),
+                                            *range(0x0951, 0x0958), 0x0962, 0x0963])
+TOKENIZER = f"unicode61 remove_diacritics 2 tokenchars '{DEVANAGARI_MARKS}'"
+
+# Indexed columns per table, in the order bm25 weights are given
+INDEXES = {
+    'products': {
+        'fts': 'products_fts',
+        'columns': ('name', 'description', 'category', 'location'),
+        'weights': (10.0, 2.0, 4.0, 4.0),
+    },
+    'jobs': {
+        'fts': 'jobs_fts',
+        'columns': ('title', 'description', 'location', 'eligibility'),
+        'weights': (10.0, 2.0, 4.0, 1.0),
+    },
+}
+
+MAX_SEARCH_RESULTS = 1000
+
+# Characters with a meaning in FTS5 query syntax; user input is split on them
+_QUERY_SEPARATORS = re.compile(r'[\s"\'()*:^+\-.,;!?।/\\]+')
+
+def create_search_index(conn):
+    """Create the FTS5 tables and sync triggers, then index existing rows"""
+    for table, spec in INDEXES.items():
+        fts = spec['fts']
+        columns = ', '.join(spec['columns'])
+        new_values = ', '.join(f'new.{c}' for c in spec['columns'])
+        old_values = ', '.join(f'old.{c}' for c in spec['columns'])
+        try:
+            conn.execute(f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                    {columns}, content='{table}', content_rowid='id',
+                    tokenize="{TOKENIZER}", prefix='2 3'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            # SQLite built without FTS5; searches fall back to LIKE
+            logger.warning("Full-text search unavailable (%s)", e)
+            return
+
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts} (rowid, {columns}) VALUES (new.id, {new_values});
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {columns} ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+                INSERT INTO {fts} (rowid, {columns}) VALUES (new.id, {new_values});
+            END
+        ''')
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+def rebuild_search_index(conn):
+    """Re-index every row of every searchable table"""
+    for table, spec in INDEXES.items():
+        if has_search_index(conn, table):
+            conn.execute(f"INSERT INTO {spec['fts']} ({spec['fts']}) VALUES ('rebuild')")
+            logger.info("Rebuilt %s", spec['fts'])
+    conn.commit()
+
+def ensure_search_index(conn):
+    """Create the indexes if the migration that adds them ran on a SQLite without FTS5; returns whether they exist
+
+    Runs after every migration run, which also drops what has_search_index
+    remembered about an earlier database or an earlier schema.
+    """
+    _available.clear()
+    if not all(has_search_index(conn, table) for table in INDEXES):
+        create_search_index(conn)
+        conn.commit()
+        _available.clear()
+    return all(has_search_index(conn, table) for table in INDEXES)
+
+_available = {}
+
+def has_search_index(conn, table):
+    """Whether the FTS index for `table` exists in the database (remembered until ensure_search_index runs)"""
+    if table not in _available:
+        row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                           (INDEXES[table]['fts'],)).fetchone()
+        _available[table] = row is not None
+    return _available[table]
+
+def build_match_query(text):
+    """Turn free text into an FTS5 query: every word must match, as a prefix"""
+    terms = [term for term in _QUERY_SEPARATORS.split(text or '') if term]
+    return ' '.join('"%s"*' % term.replace('"', '""') for term in terms)
+
+def search_page(conn, table, columns, text, where=None, params=(),
+                after=None, before=None, page_size=DEFAULT_PAGE_SIZE):
+    """One page of rows matching `text`, best bm25 match first.
+
+    Ranks can't be range-scanned like dates, so the cursors carry the result
+    offset; results are capped at MAX_SEARCH_RESULTS. Returns None when the
+    query has no searchable words or the index is missing.
+    """
+    match = build_match_query(text)
+    if not match or not has_search_index(conn, table):
+        return None
+
+    spec = INDEXES[table]
+    page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+    position = decode_cursor(before)
+    if position is not None:
+        offset = max(0, position[1] - page_size)
+    else:
+        position = decode_cursor(after)
+        offset = position[1] if position is not None else 0
+    offset = min(offset, MAX_SEARCH_RESULTS)
+
+    fts = spec['fts']
+    weights = ', '.join(str(w) for w in spec['weights'])
+    if where:
+        # Extra filters live on the source table, so rank every hit and filter after the join
+        query = f'''
+            SELECT {", ".join(columns)}
+            FROM (SELECT rowid AS hit_id, bm25({fts}, {weights}) AS hit_rank
+                  FROM {fts} WHERE {fts} MATCH ?) AS hits
+            JOIN {table} ON {table}.id = hits.hit_id
+            WHERE {where}
+            ORDER BY hits.hit_rank, hits.hit_id DESC LIMIT ? OFFSET ?
+        '''
+        args = [match, *params, page_size + 1, offset]
+    else:
+        # Rank inside the FTS query and join only the page of hits. A term in
+        # nearly every row would mean scoring the whole table, so ranking is
+        # limited to the newest MAX_SEARCH_RESULTS matches (cheap to find by rowid)
+        cutoff = conn.execute(f'SELECT rowid FROM {fts} WHERE {fts} MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?',
+                              (match, MAX_SEARCH_RESULTS - 1)).fetchone()
+        query = f'''
+            SELECT {", ".join(columns)}
+            FROM (SELECT rowid AS hit_id, bm25({fts}, {weights}) AS hit_rank FROM {fts}
+                  WHERE {fts} MATCH ? AND rowid >= ?
+                  ORDER BY hit_rank LIMIT ? OFFSET ?) AS hits
+            JOIN {table} ON {table}.id = hits.hit_id
+            ORDER BY hits.hit_rank, hits.hit_id DESC
+        '''
+        args = [match, cutoff[0] if cutoff else 0, page_size + 1, offset]
+
+    rows = conn.execute(query, args).fetchall()
+    has_more = len(rows) > page_size and offset + page_size < MAX_SEARCH_RESULTS
+    rows = rows[:page_size]
+
+    next_cursor = encode_cursor('rank', offset + page_size) if has_more else None
+    prev_cursor = encode_cursor('rank', offset) if offset > 0 else None
+    return Page(rows, next_cursor, prev_cursor, None)
+
+if __name__ == '__main__':
+    import argparse
+    from app.models.database import get_db_connection
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    parser = argparse.ArgumentParser(description='Manage the full-text search index')
+    parser.add_argument('--rebuild', action='store_true', help='index all existing products and jobs')
+    args = parser.parse_args()
+
+    connection = get_db_connection()
+    try:
+        if args.rebuild:
+            if all(has_search_index(connection, name) for name in INDEXES):
+                rebuild_search_index(connection)
+            else:
+                # Creating the index also indexes the existing rows
+                ensure_search_index(connection)
+        for name, spec in INDEXES.items():
+            if has_search_index(connection, name):
+                count = connection.execute(f"SELECT COUNT(*) FROM {spec['fts']}_docsize").fetchone()[0]
+                print(f"{spec['fts']}: {count} rows indexed")
+            else:
+                print(f"{spec['fts']}: missing (run initialize_db or --rebuild)")
+    finally:
+        connection.close()
@@ -0,0 +1,103 @@
+"""
+Site statistics kept current by triggers.
+
+The counters table holds one row per (name, bucket). Totals of users,
+jobs, schemes and products are under their table name with bucket '';
+breakdowns are under '<table>.<breakdown>' (users.village, jobs.location,
+products.category and so on) with the column's trimmed text as the
+bucket. Job and product locations are counted as typed, not as the place
+they resolve to, hence 'location' rather than 'village'. Triggers on
+those tables adjust the rows as rows are inserted, deleted or moved to
+another bucket, so reading a statistic is a primary-key lookup however
+large the tables grow. recount() rebuilds the table from the data.
+
+    python -m app.models.stats --recount
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+# table: {breakdown: column}
+COUNTED = {
+    'users': {'village': 'village'},
+    'jobs': {'category': 'category', 'location': 'location'},
+    'schemes': {},
+    'products': {'category': 'category', 'location': 'location'},
+}
+DEFAULT_BREAKDOWN_LIMIT = 10
+
+def _bucket(row, column):
+    return f"TRIM(COALESCE({row}.{column}, ''))"
+
+def _bump(name, bucket, delta):
+    return (f"INSERT INTO counters (name, bucket, count) VALUES ('{name}', {bucket}, {delta}) "
+            f"ON CONFLICT (name, bucket) DO UPDATE SET count = count + {delta};")
+
+def counter_triggers():
+    """SQL for the triggers that keep the counters table in step with COUNTED"""
+    statements = []
+    for table, breakdowns in COUNTED.items():
+        for event, row, delta in (('INSERT', 'NEW', 1), ('DELETE', 'OLD', -1)):
+            bumps = [_bump(table, "''", delta)]
+            bumps += [_bump(f'{table}.{breakdown}', _bucket(row, column), delta)
+                      for breakdown, column in breakdowns.items()]
+            statements.append(f'''CREATE TRIGGER IF NOT EXISTS counters_{table}_{event[0].lower()}
+                AFTER {event} ON {table} BEGIN
+                    {' '.join(bumps)}
+                END''')
+        for breakdown, column in breakdowns.items():
+            statements.append(f'''CREATE TRIGGER IF NOT EXISTS counters_{table}_{breakdown}_u
+                AFTER UPDATE OF {column} ON {table}
+                WHEN {_bucket('OLD', column)} IS NOT {_bucket('NEW', column)} BEGIN
+                    {_bump(f'{table}.{breakdown}', _bucket('OLD', column), -1)}
+                    {_bump(f'{table}.{breakdown}', _bucket('NEW', column), 1)}
+                END''')
+    return statements
+
+def recount(conn):
+    """Rebuild every counter from the counted tables (repairs any drift)"""
+    conn.execute('DELETE FROM counters')
+    for table, breakdowns in COUNTED.items():
+        conn.execute(f"INSERT INTO counters (name, bucket, count) SELECT '{table}', '', COUNT(*) FROM {table}")
+        for breakdown, column in breakdowns.items():
+            conn.execute(f'''
+                INSERT INTO counters (name, bucket, count)
+                SELECT '{table}.{breakdown}', {_bucket(table, column)}, COUNT(*) FROM {table} GROUP BY 2
+            ''')
+
+def totals(conn):
+    """{'users': n, 'jobs': n, 'schemes': n, 'products': n}"""
+    counts = dict.fromkeys(COUNTED, 0)
+    counts.update(conn.execute(
+        f"SELECT name, count FROM counters WHERE bucket = '' AND name IN ({', '.join('?' * len(COUNTED))})",
+        tuple(COUNTED)).fetchall())
+    return counts
+
+def breakdown(conn, table, by, limit=DEFAULT_BREAKDOWN_LIMIT):
+    """[(category, village or location, count), ...] for `table`, largest first; '' collects rows without one"""
+    return [tuple(row) for row in conn.execute(
+        'SELECT bucket, count FROM counters WHERE name = ? AND count > 0 ORDER BY count DESC, bucket LIMIT ?',
+        (f'{table}.{by}', limit))]
+
+def site_stats(conn, limit=DEFAULT_BREAKDOWN_LIMIT):
+    """Totals plus the `limit` largest buckets of each breakdown, as the /stats endpoint returns"""
+    return {'totals': totals(conn),
+            'breakdowns': {table: {by: dict(breakdown(conn, table, by, limit)) for by in breakdowns}
+                           for table, breakdowns in COUNTED.items() if breakdowns}}
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    from app.models.database import get_db_connection
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    parser = argparse.ArgumentParser(description='Site statistics counters')
+    parser.add_argument('--recount', action='store_true', help='rebuild the counters from the tables')
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    if args.recount:
+        recount(conn)
+        conn.commit()
+    print(json.dumps(site_stats(conn), indent=2, ensure_ascii=False))
+    conn.close()
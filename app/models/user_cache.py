@@ -0,0 +1,114 @@
+"""
+Cache of user rows for the inject_user context processor and profile routes.
+
+Lookups are memoized on flask.g for the rest of the request and backed by
+a process-wide LRU with a TTL, so a page view costs at most one users
+query and none on a hit. Routes that update a user must call
+invalidate_user(); other worker processes see the change once the TTL runs
+out.
+"""
+import threading
+import time
+from collections import OrderedDict
+from flask import g, current_app
+from app.models.database import get_db
+
+DEFAULT_MAXSIZE = 1024
+DEFAULT_TTL = 300  # seconds
+
+class UserCache:
+    """Thread-safe LRU of user dicts keyed by id, each entry expiring after `ttl` seconds"""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._seq = 0  # bumped on every invalidation
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+    def sequence(self):
+        """Invalidation counter; pass it to put() to detect a racing update"""
+        with self._lock:
+            return self._seq
+
+    def put(self, user_id, user, seq=None):
+        with self._lock:
+            if seq is not None and seq != self._seq:
+                # The row may have changed while it was being read; don't cache it
+                return
+            self._entries[user_id] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._seq += 1
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_user_cache():
+    """Return the process-wide user cache, sized from app config on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                config = current_app.config
+                _cache = UserCache(maxsize=config.get('USER_CACHE_SIZE', DEFAULT_MAXSIZE),
+                                   ttl=config.get('USER_CACHE_TTL', DEFAULT_TTL))
+    return _cache
+
+def get_user(user_id):
+    """Return the user row as a new dict, or None if there is no such user"""
+    if user_id is None:
+        return None
+    memo = g.setdefault('user_memo', {})
+    if user_id not in memo:
+        cache = get_user_cache()
+        user = cache.get(user_id)
+        if user is None:
+            seq = cache.sequence()
+            row = get_db().execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
+            user = dict(row) if row else None
+            if user is not None:
+                cache.put(user_id, user, seq)
+        memo[user_id] = user
+    user = memo[user_id]
+    # Callers add keys (e.g. is_authenticated), so never hand out the cached dict itself
+    return dict(user) if user is not None else None
+
+def invalidate_user(user_id):
+    """Drop a user from the cache after their row changes"""
+    get_user_cache().invalidate(user_id)
+    g.setdefault('user_memo', {}).pop(user_id, None)
@@ -0,0 +1,143 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+from app.models.database import get_db_path, get_connection_factory, configure_connection
+
+logger = logging.getLogger(__name__)
+
+# Result of a single write statement
+WriteResult = namedtuple('WriteResult', ['lastrowid', 'rowcount'])
+
+DEFAULT_MAX_BATCH = 64
+DEFAULT_WRITE_TIMEOUT = 30  # seconds a request waits for its write to commit
+
+class WriteQueue:
+    """Serializes all writes through one connection on a dedicated thread.
+
+    Whatever is queued while a transaction is running is committed together
+    in the next one, so a burst of writes costs one commit instead of many.
+    Each write runs in its own savepoint, so a failing statement only fails
+    its own caller and not the rest of the batch.
+    """
+
+    def __init__(self, path, max_batch=DEFAULT_MAX_BATCH, factory=sqlite3.Connection):
+        self.path = path
+        self.factory = factory
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._batches = 0
+        self._failures = 0
+        self._commit_time = 0.0
+        self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, fn):
+        """Queue fn(conn) to run in the writer thread; returns a Future"""
+        future = Future()
+        self._queue.put((fn, future))
+        return future
+
+    def _run(self):
+        # isolation_level=None so transactions and savepoints are managed explicitly
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False, factory=self.factory)
+        conn.row_factory = sqlite3.Row
+        configure_connection(conn)
+
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write_batch(conn, batch)
+
+    def _write_batch(self, conn, batch):
+        start = time.perf_counter()
+        results = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for fn, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute('SAVEPOINT write')
+                try:
+                    results.append((future, fn(conn), None))
+                    conn.execute('RELEASE write')
+                except Exception as e:
+                    conn.execute('ROLLBACK TO write')
+                    conn.execute('RELEASE write')
+                    results.append((future, None, e))
+            conn.execute('COMMIT')
+        except Exception as e:
+            # The transaction itself failed, so nothing in the batch was written
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            logger.error("Writer batch of %d failed: %s", len(batch), e)
+            results = [(future, None, e) for fn, future in batch if not future.done()]
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._batches += 1
+            self._writes += len(results)
+            self._failures += sum(1 for _, _, error in results if error is not None)
+            self._commit_time += elapsed
+
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def stats(self):
+        """Write and batch counts since the writer started"""
+        with self._lock:
+            return {
+                'pending': self._queue.qsize(),
+                'writes': self._writes,
+                'batches': self._batches,
+                'failures': self._failures,
+                'avg_batch_size': round(self._writes / self._batches, 2) if self._batches else 0.0,
+                'total_commit_ms': round(self._commit_time * 1000, 3),
+            }
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer():
+    """Return the process-wide writer, starting its thread on first use"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = WriteQueue(get_db_path(), factory=get_connection_factory())
+    return _writer
+
+def _reset_after_fork():
+    # The writer thread doesn't survive fork(); a forked worker starts its own
+    global _writer, _writer_lock
+    _writer = None
+    _writer_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def run_write(fn, timeout=DEFAULT_WRITE_TIMEOUT):
+    """Run fn(conn) in the writer thread and wait until it is committed"""
+    return get_writer().submit(fn).result(timeout=timeout)
+
+def execute_write(sql, params=(), timeout=DEFAULT_WRITE_TIMEOUT):
+    """Execute one INSERT/UPDATE/DELETE through the writer and wait for the commit"""
+    def write(conn):
+        cursor = conn.execute(sql, params)
+        return WriteResult(cursor.lastrowid, cursor.rowcount)
+    return run_write(write, timeout=timeout)
@@ -0,0 +1,266 @@
+"""
+Password hashing with a tunable cost.
+
+Passwords are stored as '<method>$<cost>$<salt>$<hash>', with the salt and
+hash in unpadded base64:
+
+    scrypt$n=16384,r=8,p=1$...$...        (default; memory-hard)
+    pbkdf2_sha256$i=600000$...$...
+
+hash_password() uses the method and cost in the app config (PASSWORD_HASH,
+PASSWORD_SCRYPT_N/R/P, PASSWORD_PBKDF2_ITERATIONS). verify_password()
+accepts any stored format, compares in constant time and, when the stored
+hash was made with another method or cost, returns a new one for the
+caller to store. Rows from before hashing hold the plain password: they
+still verify, are always rehashed on the user's next login, and can be
+hashed all at once with
+
+    python -m app.passwords --hash-plaintext
+
+A hash takes tens of milliseconds of CPU by design, so hashing runs on a
+small pool of PASSWORD_HASH_THREADS threads (hashlib releases the GIL
+while it works) and at most that many hashes run at once per process,
+whatever the number of request threads. Up to PASSWORD_HASH_QUEUE more
+wait for a thread; beyond that HasherBusy is raised, so a burst of logins is
+turned away quickly instead of taking the CPU from every other request.
+"""
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_METHOD = 'scrypt'
+DEFAULT_SCRYPT_N = 2 ** 14  # ~16 MB and ~50 ms per hash
+DEFAULT_SCRYPT_R = 8
+DEFAULT_SCRYPT_P = 1
+DEFAULT_PBKDF2_ITERATIONS = 600000
+DEFAULT_THREADS = 2
+DEFAULT_QUEUE = 16
+SALT_BYTES = 16
+HASH_BYTES = 32
+LATENCY_WINDOW = 500  # recent hashes kept for latency percentiles
+
+class HasherBusy(Exception):
+    """Every hashing thread is busy and the queue is full"""
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+def _unb64(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+def _scrypt(password, salt, n, r, p):
+    # OpenSSL needs room for 128 * r * (n + p + 2) bytes; hashlib's default cap is 32 MB
+    return hashlib.scrypt(password, salt=salt, n=n, r=r, p=p, dklen=HASH_BYTES,
+                          maxmem=128 * r * (n + p + 2) + 2 ** 20)
+
+def _pbkdf2_sha256(password, salt, i):
+    return hashlib.pbkdf2_hmac('sha256', password, salt, i, dklen=HASH_BYTES)
+
+# method: derive(password bytes, salt bytes, **cost) -> hash bytes
+METHODS = {'scrypt': _scrypt, 'pbkdf2_sha256': _pbkdf2_sha256}
+
+def policy(config):
+    """(method, cost) new hashes are made with, from the app config"""
+    method = config.get('PASSWORD_HASH', DEFAULT_METHOD)
+    if method == 'scrypt':
+        return method, {'n': config.get('PASSWORD_SCRYPT_N', DEFAULT_SCRYPT_N),
+                        'r': config.get('PASSWORD_SCRYPT_R', DEFAULT_SCRYPT_R),
+                        'p': config.get('PASSWORD_SCRYPT_P', DEFAULT_SCRYPT_P)}
+    if method == 'pbkdf2_sha256':
+        return method, {'i': config.get('PASSWORD_PBKDF2_ITERATIONS', DEFAULT_PBKDF2_ITERATIONS)}
+    raise ValueError(f"Unknown PASSWORD_HASH {method!r}; use one of {', '.join(METHODS)}")
+
+def make_hash(password, method, cost):
+    """A new salted hash of `password` as a storable string"""
+    salt = os.urandom(SALT_BYTES)
+    digest = METHODS[method](password.encode('utf-8'), salt, **cost)
+    encoded_cost = ','.join(f'{key}={value}' for key, value in cost.items())
+    return f'{method}${encoded_cost}${_b64(salt)}${_b64(digest)}'
+
+def parse_hash(stored):
+    """(method, cost, salt, hash) of a stored hash, or None for anything else (a plain-text password)"""
+    parts = (stored or '').split('$')
+    if len(parts) != 4 or parts[0] not in METHODS:
+        return None
+    try:
+        cost = {key: int(value) for key, value in (item.split('=', 1) for item in parts[1].split(','))}
+        return parts[0], cost, _unb64(parts[2]), _unb64(parts[3])
+    except ValueError:
+        return None
+
+def check_password(stored, password, method, cost):
+    """(matches, needs_rehash) for `password` against a stored hash or plain-text password"""
+    parsed = parse_hash(stored)
+    if parsed is None:
+        return hmac.compare_digest((stored or '').encode('utf-8'), password.encode('utf-8')), True
+    stored_method, stored_cost, salt, digest = parsed
+    try:
+        candidate = METHODS[stored_method](password.encode('utf-8'), salt, **stored_cost)
+    except (TypeError, ValueError) as e:
+        logger.error("Unusable %s password hash (%s)", stored_method, e)
+        return False, False
+    return hmac.compare_digest(candidate, digest), (stored_method, stored_cost) != (method, cost)
+
+class Hasher:
+    """Runs hashing on `threads` threads, turning work away once `queue` more are waiting"""
+
+    def __init__(self, threads=DEFAULT_THREADS, queue=DEFAULT_QUEUE):
+        self.threads = threads
+        self.queue = queue
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(threads + queue)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._times = deque(maxlen=LATENCY_WINDOW)
+
+    def run(self, fn, *args):
+        """fn(*args) on a hashing thread; waits for and returns its result, or raises HasherBusy"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HasherBusy()
+        with self._lock:
+            self._pending += 1
+        submitted = time.perf_counter()
+        try:
+            return self._executor.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+                self._times.append(time.perf_counter() - submitted)
+
+    def stats(self):
+        with self._lock:
+            times = sorted(self._times)
+            return {
+                'threads': self.threads,
+                'queue': self.queue,
+                'pending': self._pending,
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'ms_p50': round(times[len(times) // 2] * 1000, 1) if times else 0.0,
+                'ms_p95': round(times[min(len(times) - 1, int(len(times) * 0.95))] * 1000, 1) if times else 0.0,
+            }
+
+_hasher = None
+_hasher_lock = threading.Lock()
+
+def get_hasher():
+    """Return the process-wide hasher, sized from the app config"""
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                config = current_app.config
+                _hasher = Hasher(threads=config.get('PASSWORD_HASH_THREADS', DEFAULT_THREADS),
+                                 queue=config.get('PASSWORD_HASH_QUEUE', DEFAULT_QUEUE))
+    return _hasher
+
+def _reset_after_fork():
+    # Executor threads don't survive fork(); a forked worker starts its own
+    global _hasher, _hasher_lock
+    _hasher = None
+    _hasher_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def hash_password(password):
+    """A hash of `password` with the configured method and cost; raises HasherBusy"""
+    return get_hasher().run(make_hash, password, *policy(current_app.config))
+
+_dummy_hashes = {}
+
+def _verify(stored, password, method, cost):
+    if stored is None:
+        # Unknown user: check against a hash of the same cost so the answer takes as long
+        key = (method, tuple(cost.items()))
+        if key not in _dummy_hashes:
+            _dummy_hashes[key] = make_hash(os.urandom(SALT_BYTES).hex(), method, cost)
+        check_password(_dummy_hashes[key], password, method, cost)
+        return False, None
+    matches, needs_rehash = check_password(stored, password, method, cost)
+    return matches, make_hash(password, method, cost) if matches and needs_rehash else None
+
+def verify_password(stored, password):
+    """(matches, new hash or None) for `password` against `stored`, None when the user doesn't exist
+
+    A new hash comes back when the stored one was made with another method
+    or cost (or is a plain-text password); store it in its place. Raises HasherBusy.
+    """
+    return get_hasher().run(_verify, stored, password, *policy(current_app.config))
+
+def init_app(app):
+    """Configure the hash method, cost and pool size, from GRAMEENCONNECT_* variables where set"""
+    app.config.setdefault('PASSWORD_HASH', os.environ.get('GRAMEENCONNECT_PASSWORD_HASH', DEFAULT_METHOD))
+    app.config.setdefault('PASSWORD_SCRYPT_N', int(os.environ.get('GRAMEENCONNECT_SCRYPT_N', DEFAULT_SCRYPT_N)))
+    app.config.setdefault('PASSWORD_SCRYPT_R', DEFAULT_SCRYPT_R)
+    app.config.setdefault('PASSWORD_SCRYPT_P', DEFAULT_SCRYPT_P)
+    app.config.setdefault('PASSWORD_PBKDF2_ITERATIONS',
+                          int(os.environ.get('GRAMEENCONNECT_PBKDF2_ITERATIONS', DEFAULT_PBKDF2_ITERATIONS)))
+    app.config.setdefault('PASSWORD_HASH_THREADS',
+                          int(os.environ.get('GRAMEENCONNECT_PASSWORD_HASH_THREADS', DEFAULT_THREADS)))
+    app.config.setdefault('PASSWORD_HASH_QUEUE', DEFAULT_QUEUE)
+    # Fail at startup rather than on the first login
+    policy(app.config)
+
+def hash_plaintext(conn, method, cost, batch=100):
+    """Hash every password still stored in plain text; returns how many were hashed"""
+    hashed = 0
+    last_id = 0
+    while True:
+        rows = conn.execute('SELECT id, password FROM users WHERE id > ? ORDER BY id LIMIT ?',
+                            (last_id, batch)).fetchall()
+        if not rows:
+            return hashed
+        last_id = rows[-1][0]
+        updates = [(make_hash(password, method, cost), user_id, password)
+                   for user_id, password in rows if parse_hash(password) is None]
+        # Skip rows changed meanwhile, e.g. rehashed by a login
+        conn.executemany('UPDATE users SET password = ? WHERE id = ? AND password = ?', updates)
+        conn.commit()
+        hashed += len(updates)
+        if updates:
+            logger.info("Hashed %d plain-text passwords (up to user %d)", hashed, last_id)
+
+if __name__ == '__main__':
+    import argparse
+    from app.models.database import get_db_connection, get_db_path
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    parser = argparse.ArgumentParser(description='Password hashes')
+    parser.add_argument('--hash-plaintext', action='store_true',
+                        help='hash the passwords still stored in plain text, with the GRAMEENCONNECT_* cost settings')
+    args = parser.parse_args()
+
+    settings = {}
+    for key, env, default in (('PASSWORD_HASH', 'GRAMEENCONNECT_PASSWORD_HASH', DEFAULT_METHOD),
+                              ('PASSWORD_SCRYPT_N', 'GRAMEENCONNECT_SCRYPT_N', DEFAULT_SCRYPT_N),
+                              ('PASSWORD_PBKDF2_ITERATIONS', 'GRAMEENCONNECT_PBKDF2_ITERATIONS',
+                               DEFAULT_PBKDF2_ITERATIONS)):
+        value = os.environ.get(env, default)
+        settings[key] = value if key == 'PASSWORD_HASH' else int(value)
+    method, cost = policy(settings)
+
+    connection = get_db_connection()
+    try:
+        counts = connection.execute('SELECT COUNT(*), SUM(password NOT LIKE ? AND password NOT LIKE ?) FROM users',
+                                    ('scrypt$%', 'pbkdf2_sha256$%')).fetchone()
+        print(f"Database: {get_db_path()}")
+        print(f"{counts[0]} users, {counts[1] or 0} with plain-text passwords")
+        if args.hash_plaintext:
+            print(f"Hashed {hash_plaintext(connection, method, cost)} with {method} {cost}")
+    finally:
+        connection.close()
@@ -0,0 +1,227 @@
+"""
+Content-addressed storage for uploads.
+
+An upload is hashed (SHA-256) while it is streamed to disk (see
+app/uploads.py) and stored once under a sharded path inside UPLOAD_FOLDER,
+blobs/<aa>/<bb>/<digest><suffix>. Uploading the same bytes again reuses
+the stored blob.
+
+The blobs table has one row per stored blob, keyed by the name that
+users/issues/products keep in their image columns. Triggers on those
+tables keep blobs.refcount up to date. collect_garbage() deletes blobs
+nobody references any more, including their image variants, and stray
+files under blobs/ whose names are blob or variant names. Other files in
+the upload folder are never touched.
+
+    python -m app.storage --import      # move existing uploads into the blob store
+    python -m app.storage --gc [--dry-run]
+"""
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+BLOB_DIR = 'blobs'
+GC_GRACE = timedelta(hours=1)  # uploads get a blob row before the row referencing it is written
+
+# blobs/<aa>/<bb>/<digest><suffix>, and the image variants made from it (<digest>-<variant>.<ext>)
+_BLOB_FILE = re.compile(rf'^{BLOB_DIR}/([0-9a-f]{{2}})/([0-9a-f]{{2}})/\1\2[0-9a-f]{{60}}(-[a-z]+)?\.[a-z0-9]+$')
+
+# (table, column) pairs that hold upload names
+REFERENCES = [('users', 'profile_image'), ('users', 'banner_image'), ('issues', 'image'), ('products', 'image')]
+
+def blob_stem(digest):
+    """Sharded path of a blob, relative to UPLOAD_FOLDER, without suffix"""
+    return f'{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}'
+
+def is_blob(name):
+    return bool(name) and name.startswith(BLOB_DIR + '/')
+
+def put(path, root, name):
+    """Move the spooled file at `path` to `root/name` unless that blob exists; True if stored"""
+    target = os.path.join(root, name)
+    if os.path.exists(target):
+        os.remove(path)
+        return False
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(path, target)
+    return True
+
+def add_blob(conn, name, digest, size):
+    """Record a blob (refcount 0 until a row references it); False if already recorded
+
+    Reusing a recorded blob restarts its grace period, so collect_garbage
+    leaves it alone until the row that is about to reference it is written.
+    """
+    now = datetime.now()
+    cursor = conn.execute(
+        'INSERT OR IGNORE INTO blobs (name, digest, size, refcount, created_at) VALUES (?, ?, ?, 0, ?)',
+        (name, digest, size, now))
+    if cursor.rowcount == 1:
+        return True
+    conn.execute('UPDATE blobs SET created_at = ? WHERE name = ?', (now, name))
+    return False
+
+def refcount_triggers():
+    """SQL for the triggers that keep blobs.refcount in step with REFERENCES"""
+    statements = []
+    for table, column in REFERENCES:
+        prefix = f'blobs_{table}_{column}'
+        statements += [
+            f'''CREATE TRIGGER IF NOT EXISTS {prefix}_ai AFTER INSERT ON {table}
+                WHEN NEW.{column} IS NOT NULL BEGIN
+                    UPDATE blobs SET refcount = refcount + 1 WHERE name = NEW.{column};
+                END''',
+            f'''CREATE TRIGGER IF NOT EXISTS {prefix}_ad AFTER DELETE ON {table}
+                WHEN OLD.{column} IS NOT NULL BEGIN
+                    UPDATE blobs SET refcount = refcount - 1 WHERE name = OLD.{column};
+                END''',
+            f'''CREATE TRIGGER IF NOT EXISTS {prefix}_au AFTER UPDATE OF {column} ON {table}
+                WHEN OLD.{column} IS NOT NEW.{column} BEGIN
+                    UPDATE blobs SET refcount = refcount - 1 WHERE name = OLD.{column};
+                    UPDATE blobs SET refcount = refcount + 1 WHERE name = NEW.{column};
+                END''',
+        ]
+    return statements
+
+def _references():
+    """A query of every upload name the referencing tables hold, one row per reference"""
+    return ' UNION ALL '.join(f'SELECT {column} AS name FROM {table}' for table, column in REFERENCES)
+
+def recount(conn):
+    """Recompute every refcount from the referencing tables (repairs any drift)"""
+    conn.execute(f'''
+        UPDATE blobs SET refcount = (SELECT COUNT(*) FROM ({_references()}) refs WHERE refs.name = blobs.name)
+    ''')
+
+def referenced_names(conn):
+    names = set()
+    for table, column in REFERENCES:
+        names.update(row[0] for row in conn.execute(
+            f"SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL AND {column} != ''"))
+    return names
+
+def _blob_files(conn, name):
+    """The blob itself plus any image variants made from it"""
+    files = {name}
+    files.update(row[0] for row in conn.execute('SELECT filename FROM image_variants WHERE image = ?', (name,)))
+    return files
+
+def _remove(path):
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+        return size
+    except OSError:
+        return 0
+
+def collect_garbage(conn, root, grace=GC_GRACE, dry_run=False):
+    """Delete unreferenced blobs and stray upload files; returns (files removed, bytes reclaimed)
+
+    With dry_run nothing is written, not even the repaired refcounts.
+    """
+    if not dry_run:
+        recount(conn)
+        conn.commit()
+    cutoff = datetime.now() - grace
+    removed = reclaimed = 0
+    # Counted from the referencing tables, so a dry run sees what recount() would have stored
+    unreferenced = f'''
+        SELECT name FROM blobs
+        WHERE created_at < ? AND name NOT IN (SELECT name FROM ({_references()}) refs WHERE name IS NOT NULL)
+    '''
+
+    for name in [row[0] for row in conn.execute(unreferenced, (cutoff,))]:
+        if not dry_run:
+            # Hold the write lock from the check to the unlink, so an upload reusing the blob
+            # (add_blob restarts its grace period) or a row referencing it either lands first or waits
+            conn.execute('BEGIN IMMEDIATE')
+            if conn.execute(f'SELECT 1 FROM ({unreferenced}) WHERE name = ?', (cutoff, name)).fetchone() is None:
+                conn.rollback()
+                continue
+        files = _blob_files(conn, name)
+        for filename in files:
+            path = os.path.join(root, filename)
+            if os.path.exists(path):
+                size = os.path.getsize(path) if dry_run else _remove(path)
+                logger.info("%s orphaned blob file %s (%d bytes)", 'Would remove' if dry_run else 'Removed', filename, size)
+                removed += 1
+                reclaimed += size
+        if not dry_run:
+            conn.execute('DELETE FROM image_variants WHERE image = ?', (name,))
+            conn.execute('DELETE FROM image_uploads WHERE image = ?', (name,))
+            conn.execute('DELETE FROM blobs WHERE name = ?', (name,))
+            conn.commit()
+
+    # Blob and variant files under blobs/ that no row, blob or variant accounts for (an upload
+    # that failed before its blob was recorded); nothing else in the upload folder is ours to remove
+    keep = referenced_names(conn)
+    keep.update(row[0] for row in conn.execute('SELECT name FROM blobs'))
+    keep.update(row[0] for row in conn.execute('SELECT filename FROM image_variants'))
+    for directory, _, filenames in os.walk(os.path.join(root, BLOB_DIR)):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            if name in keep or not _BLOB_FILE.match(name):
+                continue
+            if datetime.fromtimestamp(os.path.getmtime(path)) >= cutoff:
+                continue  # may belong to an upload still in progress
+            size = os.path.getsize(path) if dry_run else _remove(path)
+            logger.info("%s stray blob file %s (%d bytes)", 'Would remove' if dry_run else 'Removed', name, size)
+            removed += 1
+            reclaimed += size
+    return removed, reclaimed
+
+def import_legacy(conn, root):
+    """Move uploads stored under their old per-user names into the blob store
+
+    Rows are pointed at the blob. The old files are left where they are for
+    you to remove once the import is checked; collect_garbage only cleans blobs/.
+    Returns the number of distinct files imported.
+    """
+    from app import images, uploads
+
+    imported = 0
+    for old_name in sorted(n for n in referenced_names(conn) if not is_blob(n)):
+        path = os.path.join(root, old_name)
+        if not os.path.exists(path):
+            logger.warning("Skipping missing upload %s", old_name)
+            continue
+        try:
+            with open(path, 'rb') as f:
+                upload = uploads.receive(f, os.path.join(root, BLOB_DIR))
+            name = images.store_spooled(conn, upload, root)
+        except uploads.UploadRejected as e:
+            logger.warning("Skipping %s: %s", old_name, e)
+            continue
+        for table, column in REFERENCES:
+            conn.execute(f'UPDATE {table} SET {column} = ? WHERE {column} = ?', (name, old_name))
+        conn.commit()
+        imported += 1
+        logger.info("%s -> %s", old_name, name)
+    return imported
+
+if __name__ == '__main__':
+    import argparse
+    from app.models.database import get_db_connection
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    parser = argparse.ArgumentParser(description='Content-addressed upload storage')
+    parser.add_argument('--import', dest='import_legacy', action='store_true',
+                        help='move existing uploads into the blob store')
+    parser.add_argument('--gc', action='store_true', help='remove unreferenced blobs and stray blob files')
+    parser.add_argument('--dry-run', action='store_true', help='with --gc, only report what would be removed, writing nothing')
+    parser.add_argument('--grace-minutes', type=int, default=int(GC_GRACE.total_seconds() // 60))
+    parser.add_argument('--directory', default=os.path.join(os.path.dirname(__file__), 'static', 'images', 'uploads'))
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    if args.import_legacy:
+        print(f"Imported {import_legacy(conn, args.directory)} uploads into the blob store")
+    if args.gc:
+        removed, reclaimed = collect_garbage(conn, args.directory, timedelta(minutes=args.grace_minutes), args.dry_run)
+        verb = 'would reclaim' if args.dry_run else 'reclaimed'
+        print(f"{removed} files, {verb} {reclaimed} bytes ({reclaimed / 1024 / 1024:.2f} MB)")
+    conn.close()
@@ -0,0 +1,286 @@
+"""
+Background tasks backed by a durable queue in the database.
+
+Routes queue a task with enqueue(conn, kind, payload) inside their
+run_write(), call get_task_pool().notify() and return right away; a small
+pool of worker threads claims queued tasks from the tasks table and runs
+the handler registered for their kind with @handler(kind). A claimed task
+holds a lease: if its worker (or the whole process) dies, the lease runs
+out and another worker picks the task up again. Failures are retried with
+a backoff until MAX_ATTEMPTS, after which the task is marked failed and the
+handler's on_failure callback, if any, runs.
+
+Workers start on the first request, so tasks left over from a previous run
+are drained after a restart. Several processes can run workers against the
+same database; claiming is a single UPDATE, so each task runs once at a time.
+Idle workers look for ready tasks with a plain SELECT and only go through
+the writer when there is one to claim.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from flask import current_app
+from app.models.database import get_db_path, get_db_connection
+from app.models.writer import run_write
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 2
+LEASE_SECONDS = 300    # how long a claimed task may run before others may retry it
+POLL_INTERVAL = 2.0    # seconds between checks for tasks queued by other processes
+MAX_ATTEMPTS = 3
+RETRY_DELAYS = [5, 30, 120]  # seconds before attempt 2, 3, ...
+LATENCY_WINDOW = 500   # recent tasks kept for latency percentiles
+
+# kind -> (fn(payload) -> result, on_failure(payload, error) or None)
+HANDLERS = {}
+
+def handler(kind, on_failure=None):
+    """Register fn(payload) as the handler for tasks of `kind`"""
+    def decorator(fn):
+        HANDLERS[kind] = (fn, on_failure)
+        return fn
+    return decorator
+
+def enqueue(conn, kind, payload, delay=0):
+    """Insert a task using `conn` (inside the caller's write); returns its id
+
+    Call it from a run_write() function so the task commits together with
+    the rows it refers to.
+    """
+    now = datetime.now()
+    cursor = conn.execute(
+        'INSERT INTO tasks (kind, payload, status, attempts, created_at, run_after) VALUES (?, ?, ?, 0, ?, ?)',
+        (kind, json.dumps(payload), 'queued', now, now + timedelta(seconds=delay)))
+    return cursor.lastrowid
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+class TaskPool:
+    """Worker threads that claim and run tasks from the tasks table"""
+
+    def __init__(self, path, workers=DEFAULT_WORKERS, app=None):
+        self.path = path
+        self.workers = workers
+        self.app = app
+        self._wakeup = threading.Condition()
+        self._pending_wakeups = 0
+        self._lock = threading.Lock()
+        self._threads = []
+        self._completed = 0
+        self._failed = 0
+        self._retried = 0
+        self._running = 0
+        # Seconds from enqueue to start, and from start to finish, of recent tasks
+        self._wait_times = deque(maxlen=LATENCY_WINDOW)
+        self._run_times = deque(maxlen=LATENCY_WINDOW)
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'task-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def alive(self):
+        """Number of worker threads still running"""
+        return sum(1 for thread in self._threads if thread.is_alive())
+
+    def notify(self):
+        """Wake one idle worker; called after a task is enqueued in this process"""
+        with self._wakeup:
+            self._pending_wakeups += 1
+            self._wakeup.notify()
+
+    def _claim(self, conn):
+        now = datetime.now()
+        # A read doesn't block writers; an idle poll shouldn't take the write lock
+        ready = conn.execute('''
+            SELECT 1 FROM tasks
+            WHERE (status = 'queued' AND run_after <= ?) OR (status = 'running' AND locked_until < ?)
+            LIMIT 1
+        ''', (now, now)).fetchone()
+        if ready is None:
+            return None
+
+        def claim(conn):
+            return conn.execute('''
+                UPDATE tasks SET status = 'running', attempts = attempts + 1, started_at = ?, locked_until = ?
+                WHERE id = (
+                    SELECT id FROM tasks
+                    WHERE (status = 'queued' AND run_after <= ?) OR (status = 'running' AND locked_until < ?)
+                    ORDER BY id LIMIT 1)
+                RETURNING id, kind, payload, attempts, created_at
+            ''', (now, now + timedelta(seconds=LEASE_SECONDS), now, now)).fetchall()
+        rows = run_write(claim)
+        return rows[0] if rows else None
+
+    def _finish(self, task_id, status, result=None, error=None, run_after=None):
+        def finish(conn):
+            conn.execute('''
+                UPDATE tasks SET status = ?, result = ?, error = ?, finished_at = ?, locked_until = NULL,
+                                 run_after = COALESCE(?, run_after)
+                WHERE id = ?
+            ''', (status, json.dumps(result) if result is not None else None, error,
+                  datetime.now() if status in ('done', 'failed') else None, run_after, task_id))
+        run_write(finish)
+
+    def _run(self):
+        # Claims go through the writer, which takes the database path and connection factory
+        # from the app config if this thread is the first to use it
+        if self.app is not None:
+            with self.app.app_context():
+                self._work()
+        else:
+            self._work()
+
+    def _work(self):
+        conn = get_db_connection(self.path)
+        while True:
+            try:
+                task = self._claim(conn)
+            except Exception as e:
+                logger.error("Task claim failed: %s", e)
+                task = None
+            if task is None:
+                with self._wakeup:
+                    if not self._pending_wakeups:
+                        self._wakeup.wait(POLL_INTERVAL)
+                    self._pending_wakeups = max(0, self._pending_wakeups - 1)
+                continue
+            try:
+                if self.app is not None:
+                    # A context per task, so nothing a handler keeps in `g` outlives it
+                    with self.app.app_context():
+                        self._execute(task)
+                else:
+                    self._execute(task)
+            except Exception:
+                # Recording the outcome failed (say the write timed out); the lease runs out and it is retried
+                logger.exception("Task %s: could not record its outcome", task[0])
+
+    def _execute(self, task):
+        task_id, kind, payload, attempts, created_at = task
+        payload = json.loads(payload)
+        fn, on_failure = HANDLERS.get(kind, (None, None))
+        started = time.perf_counter()
+        created = created_at if isinstance(created_at, datetime) else datetime.fromisoformat(str(created_at))
+        with self._lock:
+            self._running += 1
+            self._wait_times.append(max(0.0, (datetime.now() - created).total_seconds()))
+        outcome = None
+        try:
+            outcome = self._attempt(task_id, kind, payload, attempts, fn, on_failure)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._run_times.append(time.perf_counter() - started)
+                if outcome == 'completed':
+                    self._completed += 1
+                elif outcome == 'failed':
+                    self._failed += 1
+                elif outcome == 'retried':
+                    self._retried += 1
+
+    def _attempt(self, task_id, kind, payload, attempts, fn, on_failure):
+        """Run the handler and record what happened; returns 'completed', 'retried' or 'failed'"""
+        try:
+            if fn is None:
+                raise LookupError(f'no handler registered for task kind {kind!r}')
+            result = fn(payload)
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+            if attempts < MAX_ATTEMPTS and fn is not None:
+                delay = RETRY_DELAYS[min(attempts, len(RETRY_DELAYS)) - 1]
+                logger.warning("Task %s (%s) failed, retrying in %ss: %s", task_id, kind, delay, error)
+                self._finish(task_id, 'queued', error=error, run_after=datetime.now() + timedelta(seconds=delay))
+                outcome = 'retried'
+            else:
+                logger.error("Task %s (%s) failed for good: %s", task_id, kind, error)
+                self._finish(task_id, 'failed', error=error)
+                if on_failure is not None:
+                    try:
+                        on_failure(payload, error)
+                    except Exception as hook_error:
+                        logger.error("on_failure for task %s raised: %s", task_id, hook_error)
+                outcome = 'failed'
+        else:
+            self._finish(task_id, 'done', result=result)
+            outcome = 'completed'
+        return outcome
+
+    def wait_idle(self, timeout=30):
+        """Block until no task is queued or running (for scripts and benchmarks)"""
+        deadline = time.monotonic() + timeout
+        conn = get_db_connection(self.path)
+        try:
+            while time.monotonic() < deadline:
+                busy = conn.execute(
+                    "SELECT COUNT(*) FROM tasks WHERE status IN ('queued', 'running')").fetchone()[0]
+                if not busy:
+                    return True
+                time.sleep(0.05)
+            return False
+        finally:
+            conn.close()
+
+    def stats(self):
+        """Queue depth by status and latency of recently finished tasks"""
+        conn = get_db_connection(self.path)
+        try:
+            depth = dict(conn.execute('SELECT status, COUNT(*) FROM tasks GROUP BY status').fetchall())
+        finally:
+            conn.close()
+        with self._lock:
+            waits = list(self._wait_times)
+            runs = list(self._run_times)
+            return {
+                'workers': self.workers,
+                'queued': depth.get('queued', 0),
+                'running': depth.get('running', 0),
+                'done': depth.get('done', 0),
+                'failed': depth.get('failed', 0),
+                'running_here': self._running,
+                'completed': self._completed,
+                'retried': self._retried,
+                'failed_here': self._failed,
+                'wait_ms_p50': round(_percentile(waits, 0.5) * 1000, 1),
+                'wait_ms_p95': round(_percentile(waits, 0.95) * 1000, 1),
+                'run_ms_p50': round(_percentile(runs, 0.5) * 1000, 1),
+                'run_ms_p95': round(_percentile(runs, 0.95) * 1000, 1),
+            }
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_task_pool():
+    """Return the process-wide task pool, starting its workers on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                app = current_app._get_current_object()
+                pool = TaskPool(get_db_path(), workers=app.config.get('TASK_WORKERS', DEFAULT_WORKERS), app=app)
+                pool.start()
+                _pool = pool
+    return _pool
+
+def _reset_after_fork():
+    # Worker threads don't survive fork(); a forked process starts its own with its first request
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def init_app(app):
+    """Configure the worker count and start the workers with the first request"""
+    app.config.setdefault('TASK_WORKERS', int(os.environ.get('GRAMEENCONNECT_TASK_WORKERS', DEFAULT_WORKERS)))
+    app.before_first_request(get_task_pool)
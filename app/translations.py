@@ -1,567 +1,69 @@
-"""
-Translations for GrameenConnect in English and Hindi
-"""
-
-translations = {
-    'en': {
-        # Navigation
-        'home': 'Home',
-        'jobs': 'Jobs',
-        'govt_schemes': 'Govt. Schemes',
-        'report_issues': 'Report Issues',
-        'marketplace': 'Marketplace',
-        'login': 'Login',
-        'register': 'Register',
-        'logout': 'Logout',
-        'profile': 'Profile',
-        'settings': 'Settings',
-        
-        # Homepage
-        'tagline': 'Bridging the digital divide in rural communities',
-        'find_jobs': 'Find Jobs',
-        'explore_schemes': 'Explore Schemes',
-        'get_started': 'Get Started',
-        'our_services': 'Our Services',
-        'services_tagline': 'Connecting rural communities with essential services and opportunities',
-        'jobs_available': 'Jobs Available',
-        'active_users': 'Active Users',
-        'govt_schemes': 'Govt. Schemes',
-        'local_products': 'Local Products',
-        'how_it_works': 'How It Works',
-        'how_it_works_tagline': 'Get started with GrameenConnect in 3 simple steps',
-        'create_account': 'Create Account',
-        'create_account_desc': 'Sign up to access all features and services',
-        'explore_services': 'Explore Services',
-        'explore_services_desc': 'Browse through jobs, schemes, and local products',
-        'connect_engage': 'Connect & Engage',
-        'connect_engage_desc': 'Interact with your community and access opportunities',
-        'opportunities': 'opportunities',
-        'schemes': 'schemes',
-        'community_members': 'community members',
-        'discover_opportunities': 'Discover Local Opportunities',
-        'view_all_jobs': 'View All Jobs',
-        'digital_inclusion': 'Digital Inclusion',
-        'empowering_rural': 'Empowering Rural India',
-        'language': 'Language',
-        
-        # Services
-        'local_job_board': 'Local Job Board',
-        'job_board_desc': 'Find and post local job opportunities in agriculture, labor, tutoring and more.',
-        'explore_jobs': 'Explore Jobs',
-        'government_schemes': 'Government Schemes',
-        'schemes_desc': 'Access information about government schemes, eligibility criteria and application process.',
-        'view_schemes': 'View Schemes',
-        'infrastructure_issues': 'Infrastructure Issues',
-        'issues_desc': 'Report local infrastructure issues like roads, water supply and electricity problems.',
-        'report_issues_btn': 'Report Issues',
-        'local_marketplace': 'Local Marketplace',
-        'marketplace_desc': 'Buy and sell local products, handmade goods and agricultural produce.',
-        'visit_marketplace': 'Visit Marketplace',
-        
-        # Call to action
-        'join_today': 'Join GrameenConnect Today',
-        'connect_community': 'Connect with your community, access government services, and find new opportunities.',
-        'register_now': 'Register Now',
-        'thank_you': 'Thank you for being a part of our community!',
-        
-        # Footer
-        'about_platform': 'A platform designed to bridge the digital divide in rural areas.',
-        'contact': 'Contact',
-        'copyright': '© 2025 GrameenConnect Made By Team X',
-        'quick_links': 'Quick Links',
-        'address': 'Rural Community Center, Patna, Bihar',
-        
-        # Jobs Page
-        'job_details': 'Job Details',
-        'job_description': 'Job Description',
-        'eligibility_criteria': 'Eligibility Criteria',
-        'salary': 'Salary',
-        'location': 'Location',
-        'application_deadline': 'Application Deadline',
-        'posted_date': 'Posted',
-        'posted_on': 'Posted on',
-        'contact_information': 'Contact Information',
-        'contact_person': 'Contact Person',
-        'apply_before_deadline': 'Make sure to apply before the deadline',
-        'how_to_apply': 'How to Apply',
-        'apply_contact_info': 'Please contact the employer directly using the provided contact information and mention that you found the job on GrameenConnect.',
-        'call_employer': 'Call Employer',
-        'call_now': 'Call Now',
-        'send_sms': 'Send SMS',
-        'back_to_jobs': 'Back to All Jobs',
-        'view_details': 'View Details',
-        'job_contact': 'Contact',
-        'edit_job': 'Edit Job',
-        'delete_job': 'Delete Job',
-        'confirm_delete': 'Confirm Delete',
-        'delete_job_confirmation': 'Are you sure you want to delete this job? This action cannot be undone.',
-        'delete': 'Delete',
-        'cancel': 'Cancel',
-        'search_jobs': 'Search jobs...',
-        'filter': 'Filter',
-        'try_different_search': 'Try a different search or category filter.',
-        
-        # Job Applications
-        'apply_for_job': 'Apply for Job',
-        'apply': 'Apply',
-        'already_applied': 'You have already applied for this job. You can update your application below.',
-        'relevant_experience': 'Relevant Experience',
-        'experience_placeholder': 'Describe your experience related to this job...',
-        'message_to_employer': 'Message to Employer',
-        'message_placeholder': 'Why are you interested in this job? Why should you be hired?',
-        'submit_application': 'Submit Application',
-        'application_submitted': 'Your application has been submitted!',
-        'application_status': 'Application Status',
-        'application_date': 'Application Date',
-        'status_pending': 'Pending',
-        'status_reviewing': 'Under Review',
-        'status_accepted': 'Accepted',
-        'status_rejected': 'Rejected',
-        'update_application': 'Update Application',
-        'my_applications': 'My Job Applications',
-        'browse_jobs': 'Browse Jobs',
-        'view_job': 'View Job',
-        'no_applications': 'No Applications Yet',
-        'no_applications_message': 'You haven\'t applied to any jobs yet. Browse available jobs and submit your application.',
-        'job_deadline': 'Deadline',
-        'no_job_applications': 'You haven\'t applied to any jobs yet',
-        
-        # Job Posting Form
-        'post_new_job': 'Post a New Job',
-        'job_title': 'Job Title',
-        'job_title_placeholder': 'E.g., Farm Helper, Tutor, Electrician',
-        'job_category': 'Category',
-        'select_category': 'Select a category',
-        'job_description_label': 'Job Description',
-        'job_description_placeholder': 'Describe the job responsibilities, requirements, duration, etc.',
-        'eligibility_label': 'Eligibility Criteria',
-        'eligibility_placeholder': 'Education, skills, experience, etc. required for this job',
-        'salary_label': 'Salary/Compensation',
-        'salary_placeholder': 'E.g., ₹15,000/month, ₹500/day, etc.',
-        'deadline_label': 'Application Deadline',
-        'location_label': 'Location',
-        'location_placeholder': 'E.g., Village name, Landmark, etc.',
-        'use_current_location': 'Use Current',
-        'contact_label': 'Contact Information',
-        'contact_placeholder': 'Phone number or other contact information',
-        'post_job_button': 'Post Job',
-        'cancel_button': 'Cancel',
-        'no_jobs_found': 'No jobs found.',
-        'be_first_to_post': 'Be the first to post a job!',
-        'filter_by_category': 'Filter by Category',
-        'all_categories': 'All',
-        
-        # Job Categories
-        'agriculture': 'Agriculture',
-        'labor': 'Labor',
-        'tutoring': 'Tutoring',
-        'skilled_trade': 'Skilled Trade',
-        'other': 'Other',
-        
-        # Marketplace
-        'marketplace_tagline': 'Buy and sell local products directly from your community',
-        'list_new_product': 'List New Product',
-        'login_to_sell': 'Login to Sell Products',
-        'browse_by_category': 'Browse by Category',
-        'search_products': 'Search Products',
-        'search_placeholder': 'Search for products...',
-        'all': 'All',
-        'handicrafts': 'Handicrafts',
-        'food': 'Food',
-        'clothing': 'Clothing',
-        'contact_seller': 'Contact Seller',
-        'no_products_found': 'No products found',
-        'no_products_message': 'There are currently no products listed in the marketplace.',
-        'be_first_to_list': 'Be the first to list a product!',
-        
-        # Auth
-        'welcome_back': 'Welcome Back',
-        'login_tagline': 'Sign in to access your account and services',
-        'access_jobs': 'Access Jobs and Opportunities',
-        'sell_products': 'Sell Your Products',
-        'report_issues': 'Report Community Issues',
-        'access_your_account': 'Access your personal account',
-        'username': 'Username',
-        'password': 'Password',
-        'enter_username': 'Enter your username',
-        'enter_password': 'Enter your password',
-        'no_account': 'Don\'t have an account?',
-        'join_community': 'Join Our Community',
-        'register_tagline': 'Create an account to access all features',
-        'connect_with_community': 'Connect with your community',
-        'post_jobs_products': 'Post jobs and sell products',
-        'access_community_support': 'Access community support',
-        'fill_details': 'Fill in your details to get started',
-        'choose_username': 'Choose a username',
-        'choose_password': 'Choose a password',
-        'full_name': 'Full Name',
-        'enter_full_name': 'Enter your full name',
-        'village_town': 'Village/Town',
-        'enter_village': 'Enter your village or town',
-        'contact_number': 'Contact Number',
-        'enter_contact': 'Enter your contact number',
-        'already_have_account': 'Already have an account?',
-
-        # User Profile
-        'personal_info': 'Personal Information',
-        'user_profile': 'User Profile',
-        'edit_profile': 'Edit Profile',
-        'profile_updated': 'Profile updated successfully!',
-        'jobs_posted': 'Jobs Posted',
-        'issues_reported': 'Issues Reported',
-        'products_listed': 'Products Listed',
-        'applications': 'Applications',
-        'fullname': 'Full Name',
-        'village': 'Village/Town',
-        'joined': 'Member Since',
-        'not_provided': 'Not provided',
-        'not_available': 'Not available',
-        'village_not_specified': 'Village not specified',
-        'no_jobs_posted': 'You haven\'t posted any jobs yet.',
-        'no_issues_reported': 'You haven\'t reported any issues yet.',
-        'no_products_listed': 'You haven\'t listed any products yet.',
-        'send_message': 'Send Message',
-        'print_details': 'Print Details',
-        'recently': 'Recently',
-        'similar_jobs': 'Similar Jobs',
-        'check_jobs_page': 'Check out more jobs on our',
-        'jobs_page': 'jobs page',
-        'report_new_issue': 'Report New Issue',
-        'back_to_profile': 'Back to Profile',
-        'username_not_editable': 'Username cannot be changed',
-        'contact_required': 'Contact number is required',
-        'join_date_not_editable': 'Join date cannot be modified',
-        'profile_image': 'Profile Image',
-        'current_profile_image': 'Current Profile Image',
-        'profile_image_desc': 'Upload a profile image (JPG, PNG or GIF, max 5MB)',
-        'banner_image': 'Banner Image',
-        'current_banner_image': 'Current Banner Image',
-        'banner_image_desc': 'Upload a banner for your profile (JPG, PNG or GIF, max 5MB)',
-
-        # Settings Page
-        'settings_desc': 'Manage your account settings and preferences',
-        'username_cannot_change': 'Username cannot be changed once set',
-        'preferred_language': 'Preferred Language',
-        'change_password': 'Change Password',
-        'current_password': 'Current Password',
-        'new_password': 'New Password',
-        'confirm_password': 'Confirm Password',
-        'save_changes': 'Save Changes',
-
-        # Call to Action Section
-        'join_our_community': 'Join Our Growing Rural Community',
-        'connect_with_opportunities': 'Connect with jobs, schemes, and your local community all in one place.',
-        'register_now': 'Register Now',
-        'join_platform': 'Join GrameenConnect Today',
-        'join_platform_desc': 'Connect with opportunities, access government schemes, and engage with your community.',
-        'connect_villagers': 'Connect & Engage',
-        'connect_villagers_desc': 'Interact with your community and access opportunities.',
-        'logged_in_message': 'Thank you for being a part of our growing community!',
-
-        # Government Schemes
-        'govt_schemes': 'Government Schemes',
-        'government_programs': 'Government Programs',
-        'explore_schemes_by_category': 'Explore Schemes by Category',
-        'education': 'Education',
-        'housing': 'Housing',
-        'health': 'Health',
-        'women_and_child': 'Women & Child',
-        'eligibility': 'Eligibility',
-        'view_details': 'View Details',
-        'no_schemes_found': 'No Schemes Found',
-        'no_schemes_message': 'No schemes found for the selected category. Try selecting a different category.',
-        'view_all_schemes': 'View All Schemes',
-        'deadline': 'Deadline',
-        'department': 'Department',
-
-        # Job page new elements
-        'find_your_next_opportunity': 'Find Your Next Opportunity',
-        'connect_with_local_employers': 'Connect with local employers and discover jobs in your community',
-        'browse_jobs': 'Browse Jobs',
-        'login_to_apply': 'Login to Apply',
-        'opportunities': 'Opportunities',
-        'available_jobs': 'Available Jobs',
-    },
-    
-    'hi': {
-        # Navigation
-        'home': 'होम',
-        'jobs': 'नौकरियां',
-        'govt_schemes': 'सरकारी योजनाएं',
-        'report_issues': 'समस्या रिपोर्ट करें',
-        'marketplace': 'बाज़ार',
-        'login': 'लॉग इन',
-        'register': 'रजिस्टर',
-        'logout': 'लॉग आउट',
-        'profile': 'प्रोफाइल',
-        'settings': 'सेटिंग्स',
-        
-        # Homepage
-        'tagline': 'ग्रामीण समुदायों में डिजिटल अंतर को पाटना',
-        'find_jobs': 'नौकरियां खोजें',
-        'explore_schemes': 'योजनाएं देखें',
-        'get_started': 'शुरू करें',
-        'our_services': 'हमारी सेवाएं',
-        'services_tagline': 'ग्रामीण समुदायों को आवश्यक सेवाओं और अवसरों से जोड़ना',
-        'jobs_available': 'उपलब्ध नौकरियां',
-        'active_users': 'सक्रिय उपयोगकर्ता',
-        'govt_schemes': 'सरकारी योजनाएं',
-        'local_products': 'स्थानीय उत्पाद',
-        'how_it_works': 'यह कैसे काम करता है',
-        'how_it_works_tagline': '3 सरल चरणों में ग्रामीण कनेक्ट के साथ शुरुआत करें',
-        'create_account': 'खाता बनाएं',
-        'create_account_desc': 'सभी सुविधाओं और सेवाओं का उपयोग करने के लिए साइन अप करें',
-        'explore_services': 'सेवाओं का अन्वेषण करें',
-        'explore_services_desc': 'नौकरियों, योजनाओं और स्थानीय उत्पादों का अन्वेषण करें',
-        'connect_engage': 'जुड़ें और सहभागी बनें',
-        'connect_engage_desc': 'अपने समुदाय के साथ संपर्क करें और अवसरों तक पहुंचें',
-        'opportunities': 'अवसर',
-        'schemes': 'योजनाएं',
-        'community_members': 'समुदाय सदस्य',
-        'discover_opportunities': 'स्थानीय अवसर खोजें',
-        'view_all_jobs': 'सभी नौकरियां देखें',
-        'digital_inclusion': 'डिजिटल समावेश',
-        'empowering_rural': 'ग्रामीण भारत को सशक्त बनाना',
-        'language': 'भाषा',
-        
-        # Services
-        'local_job_board': 'स्थानीय नौकरी बोर्ड',
-        'job_board_desc': 'कृषि, श्रम, ट्यूशन और अन्य क्षेत्रों में स्थानीय नौकरी के अवसर खोजें और पोस्ट करें।',
-        'explore_jobs': 'नौकरियां देखें',
-        'government_schemes': 'सरकारी योजनाएं',
-        'schemes_desc': 'सरकारी योजनाओं, पात्रता मानदंड और आवेदन प्रक्रिया के बारे में जानकारी प्राप्त करें।',
-        'view_schemes': 'योजनाएं देखें',
-        'infrastructure_issues': 'बुनियादी समस्याएं',
-        'issues_desc': 'सड़क, पानी की आपूर्ति और बिजली जैसी बुनियादी ढांचे की समस्याओं की रिपोर्ट करें।',
-        'report_issues_btn': 'समस्या रिपोर्ट करें',
-        'local_marketplace': 'स्थानीय बाज़ार',
-        'marketplace_desc': 'स्थानीय उत्पाद, हस्तनिर्मित वस्तुएं और कृषि उपज खरीदें और बेचें।',
-        'visit_marketplace': 'बाज़ार देखें',
-        
-        # Call to action
-        'join_today': 'आज ही ग्रामीण कनेक्ट से जुड़ें',
-        'connect_community': 'अपने समुदाय से जुड़ें, सरकारी सेवाओं का उपयोग करें, और नए अवसर पाएं।',
-        'register_now': 'अभी रजिस्टर करें',
-        'thank_you': 'हमारे समुदाय का हिस्सा बनने के लिए धन्यवाद!',
-        
-        # Footer
-        'about_platform': 'ग्रामीण क्षेत्रों में डिजिटल अंतर को पाटने के लिए डिज़ाइन किया गया एक प्लेटफॉर्म।',
-        'contact': 'संपर्क',
-        'copyright': '© 2025 ग्रामीण कनेक्ट',
-        'quick_links': 'त्वरित लिंक',
-        'address': 'ग्रामीण सामुदायिक केंद्र, पटना, बिहार',
-        
-        # Jobs Page
-        'job_details': 'नौकरी विवरण',
-        'job_description': 'नौकरी का विवरण',
-        'eligibility_criteria': 'योग्यता मानदंड',
-        'salary': 'वेतन',
-        'location': 'स्थान',
-        'application_deadline': 'आवेदन की अंतिम तिथि',
-        'posted_date': 'पोस्ट किया गया',
-        'posted_on': 'इस दिन पोस्ट किया गया',
-        'contact_information': 'संपर्क जानकारी',
-        'contact_person': 'संपर्क व्यक्ति',
-        'apply_before_deadline': 'अंतिम तिथि से पहले आवेदन करना सुनिश्चित करें',
-        'how_to_apply': 'आवेदन कैसे करें',
-        'apply_contact_info': 'कृपया नियोक्ता से सीधे दिए गए संपर्क जानकारी का उपयोग करके संपर्क करें और बताएं कि आपने नौकरी ग्रामीण कनेक्ट पर पाई है।',
-        'call_employer': 'नियोक्ता को कॉल करें',
-        'call_now': 'अभी कॉल करें',
-        'send_sms': 'एसएमएस भेजें',
-        'back_to_jobs': 'सभी नौकरियों पर वापस जाएं',
-        'view_details': 'विवरण देखें',
-        'job_contact': 'संपर्क',
-        'edit_job': 'नौकरी संपादित करें',
-        'delete_job': 'नौकरी हटाएं',
-        'confirm_delete': 'हटाने की पुष्टि करें',
-        'delete_job_confirmation': 'क्या आप वाकई इस नौकरी को हटाना चाहते हैं? यह कार्रवाई पूर्ववत नहीं की जा सकती है।',
-        'delete': 'हटाएं',
-        'cancel': 'रद्द करें',
-        'search_jobs': 'नौकरियां खोजें...',
-        'filter': 'फ़िल्टर',
-        'try_different_search': 'एक अलग खोज या श्रेणी फ़िल्टर का प्रयास करें।',
-        
-        # Job Applications
-        'apply_for_job': 'नौकरी के लिए आवेदन करें',
-        'apply': 'आवेदन करें',
-        'already_applied': 'आपने पहले ही इस नौकरी के लिए आवेदन कर दिया है। आप नीचे अपना आवेदन अपडेट कर सकते हैं।',
-        'relevant_experience': 'प्रासंगिक अनुभव',
-        'experience_placeholder': 'इस नौकरी से संबंधित अपने अनुभव का वर्णन करें...',
-        'message_to_employer': 'नियोक्ता को संदेश',
-        'message_placeholder': 'आप इस नौकरी में क्यों रुचि रखते हैं? आपको क्यों नियुक्त किया जाना चाहिए?',
-        'submit_application': 'आवेदन जमा करें',
-        'application_submitted': 'आपका आवेदन जमा कर दिया गया है!',
-        'application_status': 'आवेदन स्थिति',
-        'application_date': 'आवेदन तिथि',
-        'status_pending': 'लंबित',
-        'status_reviewing': 'समीक्षा के अंतर्गत',
-        'status_accepted': 'स्वीकृत',
-        'status_rejected': 'अस्वीकृत',
-        'update_application': 'आवेदन अपडेट करें',
-        'my_applications': 'मेरे नौकरी आवेदन',
-        'browse_jobs': 'नौकरियां ब्राउज़ करें',
-        'view_job': 'नौकरी देखें',
-        'no_applications': 'अभी तक कोई आवेदन नहीं',
-        'no_applications_message': 'आपने अभी तक किसी नौकरी के लिए आवेदन नहीं किया है। उपलब्ध नौकरियां ब्राउज़ करें और अपना आवेदन जमा करें।',
-        'job_deadline': 'अंतिम तिथि',
-        'no_job_applications': 'आपने अभी तक किसी नौकरी के लिए आवेदन नहीं किया है',
-        
-        # Job Posting Form
-        'post_new_job': 'नई नौकरी पोस्ट करें',
-        'job_title': 'नौकरी का शीर्षक',
-        'job_title_placeholder': 'जैसे, खेत सहायक, ट्यूटर, इलेक्ट्रीशियन',
-        'job_category': 'श्रेणी',
-        'select_category': 'श्रेणी चुनें',
-        'job_description_label': 'नौकरी का विवरण',
-        'job_description_placeholder': 'नौकरी की जिम्मेदारियों, आवश्यकताओं, अवधि आदि का वर्णन करें।',
-        'eligibility_label': 'योग्यता मानदंड',
-        'eligibility_placeholder': 'इस नौकरी के लिए आवश्यक शिक्षा, कौशल, अनुभव आदि।',
-        'salary_label': 'वेतन/मुआवजा',
-        'salary_placeholder': 'जैसे, ₹15,000/महीना, ₹500/दिन, आदि।',
-        'deadline_label': 'आवेदन की अंतिम तिथि',
-        'location_label': 'स्थान',
-        'location_placeholder': 'जैसे, गांव का नाम, लैंडमार्क, आदि।',
-        'use_current_location': 'वर्तमान स्थान',
-        'contact_label': 'संपर्क जानकारी',
-        'contact_placeholder': 'फोन नंबर या अन्य संपर्क जानकारी',
-        'post_job_button': 'नौकरी पोस्ट करें',
-        'cancel_button': 'रद्द करें',
-        'no_jobs_found': 'कोई नौकरी नहीं मिली।',
-        'be_first_to_post': 'नौकरी पोस्ट करने वाले पहले व्यक्ति बनें!',
-        'filter_by_category': 'श्रेणी के अनुसार फ़िल्टर करें',
-        'all_categories': 'सभी',
-        
-        # Job Categories
-        'agriculture': 'कृषि',
-        'labor': 'श्रमिक',
-        'tutoring': 'ट्यूशन',
-        'skilled_trade': 'कुशल व्यापार',
-        'other': 'अन्य',
-        
-        # Marketplace
-        'marketplace_tagline': 'अपने समुदाय से सीधे स्थानीय उत्पाद खरीदें और बेचें',
-        'list_new_product': 'नया उत्पाद सूचीबद्ध करें',
-        'login_to_sell': 'उत्पाद बेचने के लिए लॉगिन करें',
-        'browse_by_category': 'श्रेणी के अनुसार ब्राउज़ करें',
-        'search_products': 'उत्पाद खोजें',
-        'search_placeholder': 'उत्पादों के लिए खोजें...',
-        'all': 'सभी',
-        'handicrafts': 'हस्तशिल्प',
-        'food': 'खाद्य',
-        'clothing': 'कपड़े',
-        'contact_seller': 'विक्रेता से संपर्क करें',
-        'no_products_found': 'कोई उत्पाद नहीं मिला',
-        'no_products_message': 'वर्तमान में बाज़ार में कोई उत्पाद सूचीबद्ध नहीं है।',
-        'be_first_to_list': 'उत्पाद सूचीबद्ध करने वाले पहले व्यक्ति बनें!',
-        
-        # Auth
-        'welcome_back': 'वापसी पर स्वागत है',
-        'login_tagline': 'अपने खाते और सेवाओं तक पहुंचने के लिए साइन इन करें',
-        'access_jobs': 'नौकरियों और अवसरों तक पहुंचें',
-        'sell_products': 'अपने उत्पाद बेचें',
-        'report_issues': 'सामुदायिक समस्याओं की रिपोर्ट करें',
-        'access_your_account': 'अपने व्यक्तिगत खाते तक पहुंचें',
-        'username': 'उपयोगकर्ता नाम',
-        'password': 'पासवर्ड',
-        'enter_username': 'अपना उपयोगकर्ता नाम दर्ज करें',
-        'enter_password': 'अपना पासवर्ड दर्ज करें',
-        'no_account': 'खाता नहीं है?',
-        'join_community': 'हमारे समुदाय से जुड़ें',
-        'register_tagline': 'सभी सुविधाओं तक पहुंचने के लिए एक खाता बनाएं',
-        'connect_with_community': 'अपने समुदाय से जुड़ें',
-        'post_jobs_products': 'नौकरियां पोस्ट करें और उत्पाद बेचें',
-        'access_community_support': 'सामुदायिक समर्थन तक पहुंचें',
-        'fill_details': 'शुरू करने के लिए अपना विवरण भरें',
-        'choose_username': 'एक उपयोगकर्ता नाम चुनें',
-        'choose_password': 'एक पासवर्ड चुनें',
-        'full_name': 'पूरा नाम',
-        'enter_full_name': 'अपना पूरा नाम दर्ज करें',
-        'village_town': 'गांव/शहर',
-        'enter_village': 'अपना गांव या शहर दर्ज करें',
-        'contact_number': 'संपर्क नंबर',
-        'enter_contact': 'अपना संपर्क नंबर दर्ज करें',
-        'already_have_account': 'पहले से ही खाता है?',
-
-        # User Profile
-        'personal_info': 'व्यक्तिगत जानकारी',
-        'user_profile': 'प्रयोगकर्ता प्रोफाइल',
-        'edit_profile': 'प्रोफाइल संपादित करें',
-        'profile_updated': 'प्रोफाइल सफलतापूर्वक अपडेट की गई!',
-        'jobs_posted': 'पोस्ट की गई नौकरियां',
-        'issues_reported': 'रिपोर्ट की गई समस्याएं',
-        'products_listed': 'सूचीबद्ध उत्पाद',
-        'applications': 'आवेदन',
-        'fullname': 'पूरा नाम',
-        'village': 'गांव/शहर',
-        'joined': 'सदस्य बने',
-        'not_provided': 'प्रदान नहीं किया गया',
-        'not_available': 'उपलब्ध नहीं',
-        'village_not_specified': 'गांव निर्दिष्ट नहीं',
-        'no_jobs_posted': 'आपने अभी तक कोई नौकरी पोस्ट नहीं की है।',
-        'no_issues_reported': 'आपने अभी तक कोई समस्या रिपोर्ट नहीं की है।',
-        'no_products_listed': 'आपने अभी तक कोई उत्पाद सूचीबद्ध नहीं किया है।',
-        'send_message': 'संदेश भेजें',
-        'print_details': 'प्रिंट विवरण',
-        'recently': 'हाल ही में',
-        'similar_jobs': 'समान नौकरियां',
-        'check_jobs_page': 'अधिक नौकरियां देखने के लिए हमारा',
-        'jobs_page': 'नौकरी पेज',
-        'report_new_issue': 'नई समस्या रिपोर्ट करें',
-        'back_to_profile': 'प्रोफाइल पर वापस जाएं',
-        'username_not_editable': 'उपयोगकर्ता नाम बदला नहीं जा सकता',
-        'contact_required': 'संपर्क नंबर आवश्यक है',
-        'join_date_not_editable': 'सदस्य बनने की तिथि संशोधित नहीं की जा सकती',
-        'profile_image': 'प्रोफ़ाइल छवि',
-        'current_profile_image': 'वर्तमान प्रोफ़ाइल छवि',
-        'profile_image_desc': 'प्रोफ़ाइल छवि अपलोड करें (JPG, PNG या GIF, अधिकतम 5MB)',
-        'banner_image': 'बैनर छवि',
-        'current_banner_image': 'वर्तमान बैनर छवि',
-        'banner_image_desc': 'अपनी प्रोफ़ाइल के लिए बैनर अपलोड करें (JPG, PNG या GIF, अधिकतम 5MB)',
-
-        # Settings Page
-        'settings_desc': 'अपने खाता सेटिंग्स और प्राथमिकताएं प्रबंधित करें',
-        'username_cannot_change': 'उपयोगकर्ता नाम एक बार सेट होने के बाद बदला नहीं जा सकता',
-        'preferred_language': 'पसंदीदा भाषा',
-        'change_password': 'पासवर्ड बदलें',
-        'current_password': 'वर्तमान पासवर्ड',
-        'new_password': 'नया पासवर्ड',
-        'confirm_password': 'पासवर्ड की पुष्टि करें',
-        'save_changes': 'परिवर्तन सहेजें',
-
-        # Call to Action Section
-        'join_our_community': 'हमारे बढ़ते ग्रामीण समुदाय से जुड़ें',
-        'connect_with_opportunities': 'नौकरियों, योजनाओं और अपने स्थानीय समुदाय से एक ही स्थान पर जुड़ें।',
-        'register_now': 'अभी रजिस्टर करें',
-        'join_platform': 'आज ही ग्रामीण कनेक्ट से जुड़ें',
-        'join_platform_desc': 'अवसरों से जुड़ें, सरकारी योजनाओं तक पहुंचें, और अपने समुदाय के साथ जुड़ें।',
-        'connect_villagers': 'जुड़ें और सहभागी बनें',
-        'connect_villagers_desc': 'अपने समुदाय के साथ संपर्क करें और अवसरों तक पहुंचें।',
-        'logged_in_message': 'हमारे बढ़ते समुदाय का हिस्सा बनने के लिए धन्यवाद!',
-
-        # Government Schemes
-        'govt_schemes': 'सरकारी योजनाएं',
-        'government_programs': 'सरकारी कार्यक्रम',
-        'explore_schemes_by_category': 'श्रेणी के अनुसार योजनाओं का अन्वेषण करें',
-        'education': 'शिक्षा',
-        'housing': 'आवास',
-        'health': 'स्वास्थ्य',
-        'women_and_child': 'महिला और बाल',
-        'eligibility': 'पात्रता',
-        'view_details': 'विवरण देखें',
-        'no_schemes_found': 'कोई योजना नहीं मिली',
-        'no_schemes_message': 'चयनित श्रेणी के लिए कोई योजना नहीं मिली। एक अलग श्रेणी का चयन करें।',
-        'view_all_schemes': 'सभी योजनाएं देखें',
-        'deadline': 'अंतिम तिथि',
-        'department': 'विभाग',
-
-        # Job page new elements
-        'find_your_next_opportunity': 'अपना अगला अवसर खोजें',
-        'connect_with_local_employers': 'स्थानीय नियोक्ताओं से जुड़ें और अपने समुदाय में नौकरियां खोजें',
-        'browse_jobs': 'नौकरियां देखें',
-        'login_to_apply': 'आवेदन करने के लिए लॉगिन करें',
-        'opportunities': 'अवसर',
-        'available_jobs': 'उपलब्ध नौकरियां',
-    }
-
-} 
-
+"""
+Translations for GrameenConnect.
+
+Each language lives in app/locales/<lang>.json and is compiled into an
+immutable catalog the first time it is requested, so adding a language
+means dropping in a data file and only the languages actually used are
+ever loaded. The bound translate function and the template context are
+built once per language and reused on every render.
+"""
+import json
+import os
+import re
+import threading
+from types import MappingProxyType
+
+LOCALES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'locales')
+DEFAULT_LANGUAGE = 'en'
+
+# Language codes like 'hi' or 'pt_BR'; anything else never touches the filesystem
+_LANGUAGE_CODE = re.compile(r'^[a-z]{2,3}(_[A-Z]{2})?$')
+
+_catalogs = {}
+_contexts = {}
+_lock = threading.Lock()
+
+def available_languages():
+    """Language codes that have a data file in app/locales"""
+    return sorted(name[:-5] for name in os.listdir(LOCALES_DIR)
+                  if name.endswith('.json') and _LANGUAGE_CODE.match(name[:-5]))
+
+def resolve_language(lang):
+    """Return `lang` if it has a data file, otherwise the default language"""
+    if lang in _catalogs:
+        return lang
+    if lang and _LANGUAGE_CODE.match(lang) and os.path.exists(os.path.join(LOCALES_DIR, f'{lang}.json')):
+        return lang
+    return DEFAULT_LANGUAGE
+
+def get_catalog(lang):
+    """Return the read-only catalog for `lang`, falling back to English"""
+    lang = resolve_language(lang)
+    catalog = _catalogs.get(lang)
+    if catalog is None:
+        with _lock:
+            if lang not in _catalogs:
+                with open(os.path.join(LOCALES_DIR, f'{lang}.json'), encoding='utf-8') as f:
+                    _catalogs[lang] = MappingProxyType(json.load(f))
+            catalog = _catalogs[lang]
+    return catalog
+
+def get_translator(lang):
+    """Return the cached `_` function for `lang`; unknown keys translate to themselves"""
+    return get_template_context(lang)['_']
+
+def get_template_context(lang):
+    """The {'t': catalog, '_': translate} mapping injected into every template, built once per language"""
+    context = _contexts.get(lang)
+    if context is None:
+        lang = resolve_language(lang)
+        catalog = get_catalog(lang)
+        lookup = catalog.get
+
+        def translate(key):
+            return lookup(key, key)
+
+        context = MappingProxyType({'t': catalog, '_': translate})
+        # Keyed by the resolved code only, so arbitrary session values can't grow the cache
+        context = _contexts.setdefault(lang, context)
+    return context
@@ -0,0 +1,92 @@
+"""
+Shared handling of uploaded files.
+
+receive() streams an upload from Werkzeug's buffer to a temp file in
+chunks, hashing as it goes, so memory use stays at one chunk per upload
+however large the file is. The type is decided by the file's magic bytes,
+not its name, before anything is written, and each type has its own size
+limit, checked as the bytes arrive. Callers move the finished temp file
+into place with an atomic rename (see app/storage.py).
+"""
+import hashlib
+import os
+import tempfile
+from collections import namedtuple
+from flask import current_app, has_app_context
+
+CHUNK_SIZE = 64 * 1024
+SNIFF_BYTES = 16
+
+# MIME type -> (file suffix, magic byte check on the first SNIFF_BYTES)
+IMAGE_TYPES = {
+    'image/jpeg': ('.jpg', lambda head: head.startswith(b'\xff\xd8\xff')),
+    'image/png': ('.png', lambda head: head.startswith(b'\x89PNG\r\n\x1a\n')),
+    'image/gif': ('.gif', lambda head: head[:6] in (b'GIF87a', b'GIF89a')),
+    'image/webp': ('.webp', lambda head: head[:4] == b'RIFF' and head[8:12] == b'WEBP'),
+}
+
+# Per-type limits in bytes; MAX_CONTENT_LENGTH still caps the whole request
+DEFAULT_LIMITS = {
+    'image/jpeg': 12 * 1024 * 1024,
+    'image/png': 16 * 1024 * 1024,
+    'image/gif': 8 * 1024 * 1024,
+    'image/webp': 12 * 1024 * 1024,
+}
+
+Upload = namedtuple('Upload', ['path', 'digest', 'size', 'mimetype', 'suffix'])
+
+class UploadRejected(ValueError):
+    """The upload is not an accepted type or is too large; the message is shown to the user"""
+
+def sniff(head, types=IMAGE_TYPES):
+    """MIME type of a file from its first bytes, or None if it is not one of `types`"""
+    for mimetype, (_, matches) in types.items():
+        if matches(head):
+            return mimetype
+    return None
+
+def _limit(mimetype):
+    limits = current_app.config.get('UPLOAD_LIMITS', DEFAULT_LIMITS) if has_app_context() else DEFAULT_LIMITS
+    return limits.get(mimetype, DEFAULT_LIMITS[mimetype])
+
+def _format_size(size):
+    if size >= 1024 * 1024:
+        return f'{size / (1024 * 1024):.0f} MB'
+    return f'{size / 1024:.0f} KB'
+
+def receive(file, directory, types=IMAGE_TYPES):
+    """Stream an uploaded FileStorage (or open binary file) into a temp file in `directory`
+
+    Raises UploadRejected for an unknown type or an oversized file, leaving
+    nothing behind. Returns an Upload whose path the caller must move or
+    remove.
+    """
+    stream = getattr(file, 'stream', file)
+    head = stream.read(SNIFF_BYTES)
+    mimetype = sniff(head, types)
+    if mimetype is None:
+        raise UploadRejected('Invalid file type. Only JPG, PNG, GIF and WebP images are allowed.')
+    suffix = types[mimetype][0]
+    limit = _limit(mimetype)
+
+    os.makedirs(directory, exist_ok=True)
+    digest = hashlib.sha256(head)
+    size = len(head)
+    fd, path = tempfile.mkstemp(dir=directory, suffix=suffix)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(head)
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > limit:
+                    raise UploadRejected(f'The file is too large. {mimetype.split("/")[1].upper()} images '
+                                         f'may be at most {_format_size(limit)}.')
+                digest.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return Upload(path, digest.hexdigest(), size, mimetype, suffix)
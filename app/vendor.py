@@ -0,0 +1,351 @@
+"""
+Self-hosted copies of the third-party CSS, JS and fonts the templates use.
+
+    python -m app.vendor --fetch    # download the pinned upstream files into .vendor-cache/
+    python -m app.vendor --build    # write trimmed copies to app/static/vendor/
+
+--build scans app/templates, app/static/js and the Python sources for the
+class names they use, then:
+
+- drops every Bootstrap rule whose selector needs a class or id that
+  appears nowhere (the Bootstrap JS bundle is scanned too, so classes it
+  toggles at runtime such as .show or .collapsing are kept),
+- does the same for Font Awesome and subsets its webfonts to the glyphs
+  of the icons that are left,
+- copies the Bootstrap JS bundle and the Poppins faces as they are.
+
+The output is committed, so pages load no third-party file and work
+offline. Rerun --build after using a class or icon that was not used
+before. vendor_url() falls back to the CDN for any file that has not been
+built.
+"""
+import logging
+import os
+import re
+import shutil
+import urllib.request
+from flask import url_for
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CACHE_DIR = os.path.join(ROOT, '.vendor-cache')
+VENDOR_DIR = 'vendor'  # inside the static folder
+
+# The templates were written against 5.3.0-alpha1. Every class and data-bs-*
+# attribute they use is in the 5.3.0 release; .navbar-dark and .text-muted
+# are deprecated there but still styled.
+BOOTSTRAP = 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist'
+FONT_AWESOME = 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0'
+POPPINS = 'https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700&display=swap'
+
+# Cache path -> upstream URL
+UPSTREAM = {
+    'bootstrap/bootstrap.min.css': f'{BOOTSTRAP}/css/bootstrap.min.css',
+    'bootstrap/bootstrap.bundle.min.js': f'{BOOTSTRAP}/js/bootstrap.bundle.min.js',
+    'fontawesome/css/all.min.css': f'{FONT_AWESOME}/css/all.min.css',
+    'fontawesome/webfonts/fa-solid-900.ttf': f'{FONT_AWESOME}/webfonts/fa-solid-900.ttf',
+    'fontawesome/webfonts/fa-regular-400.ttf': f'{FONT_AWESOME}/webfonts/fa-regular-400.ttf',
+    'fontawesome/webfonts/fa-brands-400.ttf': f'{FONT_AWESOME}/webfonts/fa-brands-400.ttf',
+}
+
+# Built file (relative to static/vendor) -> CDN URL used until it is built
+FALLBACKS = {
+    'bootstrap/bootstrap.min.css': f'{BOOTSTRAP}/css/bootstrap.min.css',
+    'bootstrap/bootstrap.bundle.min.js': f'{BOOTSTRAP}/js/bootstrap.bundle.min.js',
+    'fontawesome/css/all.min.css': f'{FONT_AWESOME}/css/all.min.css',
+    'poppins/poppins.css': POPPINS,
+}
+
+# (directory, suffix, recursive): files whose words count as used class names
+SCAN = [('app/templates', '.html', True), ('app/static/js', '.js', True), ('app', '.py', False), ('', '.py', False)]
+
+# Google Fonts picks the font format from the User-Agent; this one gets woff2
+BROWSER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+
+_WORD = re.compile(r'[A-Za-z_][\w-]*')
+# 'bg-{{ ... }}' in templates and 'alert-' + type in scripts build class names at runtime
+_DYNAMIC_PREFIX = re.compile(r'''([A-Za-z][\w-]*-)(?:\{\{|\{%|['"]\s*\+)''')
+_FONT_FACE = re.compile(r'@font-face\{[^}]*\}')
+_CSS_URL = re.compile(r'''url\(\s*['"]?([^'")]+)['"]?\s*\)''')
+
+def _download(url, path):
+    request = urllib.request.Request(url, headers={'User-Agent': BROWSER_AGENT})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        data = response.read()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return data
+
+def fetch(cache=CACHE_DIR):
+    """Download the pinned upstream files, and Poppins with its stylesheet pointed at local copies"""
+    for name, url in UPSTREAM.items():
+        data = _download(url, os.path.join(cache, name))
+        logger.info("Fetched %s (%d bytes)", name, len(data))
+
+    request = urllib.request.Request(POPPINS, headers={'User-Agent': BROWSER_AGENT})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        css = response.read().decode('utf-8')
+
+    def localize(match):
+        url = match.group(1)
+        name = f'fonts/{url.rsplit("/", 1)[1]}'
+        _download(url, os.path.join(cache, 'poppins', name))
+        return f'url({name})'
+    css = _CSS_URL.sub(localize, css)
+    with open(os.path.join(cache, 'poppins', 'poppins.css'), 'w') as f:
+        f.write(css)
+    logger.info("Fetched Poppins (%d faces)", css.count('@font-face'))
+
+def used_words(root=ROOT, extra=()):
+    """(words, dynamic prefixes) found in the templates, scripts and sources"""
+    words, prefixes = set(), set()
+    paths = list(extra)
+    for directory, suffix, recursive in SCAN:
+        directory = os.path.join(root, directory)
+        walk = os.walk(directory) if recursive else [(directory, None, os.listdir(directory))]
+        for parent, _, filenames in walk:
+            paths += [os.path.join(parent, f) for f in filenames if f.endswith(suffix)]
+    for path in paths:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            text = f.read()
+        words.update(_WORD.findall(text))
+        prefixes.update(_DYNAMIC_PREFIX.findall(text))
+    return words, prefixes
+
+def _split_rules(css):
+    """Top-level (prelude, body) pairs of a stylesheet; statements such as @charset have body None"""
+    rules = []
+    depth, start, i = 0, 0, 0
+    prelude = ''
+    while i < len(css):
+        c = css[i]
+        if c in '"\'':
+            i += 1
+            while css[i] != c:
+                i += 2 if css[i] == '\\' else 1
+            i += 1
+            continue
+        if css.startswith('/*', i):
+            i = css.index('*/', i + 2) + 2
+            continue
+        if c == ';' and depth == 0:
+            rules.append((re.sub(r'/\*.*?\*/', '', css[start:i], flags=re.S).strip(), None))
+            start = i + 1
+        elif c == '{':
+            if depth == 0:
+                prelude = re.sub(r'/\*.*?\*/', '', css[start:i], flags=re.S).strip()
+                start = i + 1
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                rules.append((prelude, css[start:i]))
+                start = i + 1
+        i += 1
+    return rules
+
+def _split_selectors(prelude):
+    """Split a selector list on commas outside parentheses"""
+    selectors, depth, start = [], 0, 0
+    for i, c in enumerate(prelude):
+        if c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif c == ',' and depth == 0:
+            selectors.append(prelude[start:i].strip())
+            start = i + 1
+    selectors.append(prelude[start:].strip())
+    return selectors
+
+def _selector_used(selector, words, prefixes):
+    """True unless the selector needs a class or id that never appears
+
+    Arguments of :not(), :is() and friends are ignored, so a rule is only
+    dropped when something it requires is certainly absent.
+    """
+    plain = re.sub(r'\[[^\]]*\]', '', selector)
+    while True:
+        stripped = re.sub(r':[\w-]+\([^()]*\)', '', plain)
+        if stripped == plain:
+            break
+        plain = stripped
+    for name in re.findall(r'[.#](-?[A-Za-z_][\w-]*)', plain):
+        if name not in words and not any(name.startswith(p) for p in prefixes):
+            return False
+    return True
+
+def purge(css, words, prefixes):
+    """The stylesheet without the rules no used selector can match"""
+    out = []
+    for prelude, body in _split_rules(css):
+        if body is None:
+            out.append(prelude + ';')
+        elif prelude.startswith(('@media', '@supports', '@layer', '@container')):
+            inner = purge(body, words, prefixes)
+            if inner:
+                out.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@'):
+            out.append(f'{prelude}{{{body}}}')  # @font-face, @keyframes, @page
+        else:
+            selectors = [s for s in _split_selectors(prelude) if _selector_used(s, words, prefixes)]
+            if selectors:
+                out.append(f'{",".join(selectors)}{{{body}}}')
+    return ''.join(out)
+
+def _with_license(original, purged):
+    """Put the upstream license comment back at the top, after any @charset"""
+    match = re.search(r'/\*!.*?\*/', original, re.S)
+    if not match:
+        return purged
+    charset = re.match(r'@charset "[^"]*";', purged)
+    if charset:
+        return charset.group(0) + match.group(0) + '\n' + purged[charset.end():]
+    return match.group(0) + '\n' + purged
+
+def _codepoints(css):
+    """Characters named by content: "\\f015" in the rules"""
+    points = set()
+    for value in re.findall(r'content:\s*"([^"]*)"', css):
+        points.update(int(code, 16) for code in re.findall(r'\\([0-9a-fA-F]{1,6})', value))
+        points.update(ord(c) for c in re.sub(r'\\[0-9a-fA-F]{1,6}', '', value))
+    return points
+
+def subset_font(source, target, codepoints):
+    """Write a woff2 of `source` with only the glyphs for `codepoints`"""
+    from fontTools import subset
+
+    options = subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = []
+    options.name_IDs = []
+    options.notdef_outline = True
+    font = subset.load_font(source, options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    subset.save_font(font, target, options)
+
+def _read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+def _build_bootstrap(cache, out_dir, words, prefixes, record):
+    source = os.path.join(cache, 'bootstrap', 'bootstrap.min.css')
+    css = _read(source)
+    target = os.path.join(out_dir, 'bootstrap', 'bootstrap.min.css')
+    _write(target, _with_license(css, purge(css, words, prefixes)))
+    record('bootstrap/bootstrap.min.css', source, target)
+
+    source = os.path.join(cache, 'bootstrap', 'bootstrap.bundle.min.js')
+    target = os.path.join(out_dir, 'bootstrap', 'bootstrap.bundle.min.js')
+    shutil.copyfile(source, target)
+    record('bootstrap/bootstrap.bundle.min.js', source, target)
+
+def _build_fontawesome(cache, out_dir, words, prefixes, record):
+    """The rules for the icons in use, then only their glyphs in each font"""
+    source = os.path.join(cache, 'fontawesome', 'css', 'all.min.css')
+    css = _read(source)
+    purged = purge(css, words, prefixes)
+    codepoints = _codepoints(purged)
+
+    def subset_face(match):
+        # Subset from the TrueType file (some upstream woff2 files do not decode with
+        # Python's brotli) and ship the result as woff2
+        face = match.group(0)
+        ttf = [u for u in _CSS_URL.findall(face) if u.endswith('.ttf')]
+        font = os.path.normpath(os.path.join(os.path.dirname(source), ttf[0])) if ttf else None
+        if font is None or not os.path.exists(font):
+            return ''  # a face we do not ship, such as the v4 compatibility font
+        relative = os.path.relpath(font, os.path.join(cache, 'fontawesome'))[:-len('.ttf')] + '.woff2'
+        target = os.path.join(out_dir, 'fontawesome', relative)
+        subset_font(font, target, codepoints)
+        record(f'fontawesome/{relative}', font, target)
+        return re.sub(r'src:[^;}]*', f'src:url({ttf[0][:-len(".ttf")]}.woff2) format("woff2")', face)
+    target = os.path.join(out_dir, 'fontawesome', 'css', 'all.min.css')
+    _write(target, _with_license(css, _FONT_FACE.sub(subset_face, purged)))
+    record('fontawesome/css/all.min.css', source, target)
+    logger.info("Kept %d Font Awesome glyphs", len(codepoints))
+
+def _build_poppins(cache, out_dir, words, prefixes, record):
+    source = os.path.join(cache, 'poppins')
+    shutil.copytree(source, os.path.join(out_dir, 'poppins'), dirs_exist_ok=True)
+    for parent, _, filenames in os.walk(source):
+        for filename in filenames:
+            path = os.path.join(parent, filename)
+            name = 'poppins/' + os.path.relpath(path, source).replace(os.sep, '/')
+            record(name, path, os.path.join(out_dir, name))
+
+# Package -> (file that must be in the cache, builder)
+BUILDERS = {
+    'bootstrap': ('bootstrap/bootstrap.min.css', _build_bootstrap),
+    'fontawesome': ('fontawesome/css/all.min.css', _build_fontawesome),
+    'poppins': ('poppins/poppins.css', _build_poppins),
+}
+
+def build(static_folder, cache=CACHE_DIR):
+    """Write the trimmed files to static/vendor; returns {name: (upstream bytes, built bytes)}
+
+    Packages that are not in the cache are skipped and keep loading from the CDN.
+    """
+    out_dir = os.path.join(static_folder, VENDOR_DIR)
+    words, prefixes = used_words(extra=[p for p in [os.path.join(cache, 'bootstrap', 'bootstrap.bundle.min.js')]
+                                        if os.path.exists(p)])
+    sizes = {}
+
+    def record(name, source, target):
+        sizes[name] = (os.path.getsize(source), os.path.getsize(target))
+
+    for package, (marker, builder) in BUILDERS.items():
+        if not os.path.exists(os.path.join(cache, marker)):
+            logger.warning("Skipping %s: %s is not in %s (run with --fetch)", package, marker, cache)
+            continue
+        os.makedirs(os.path.join(out_dir, package), exist_ok=True)
+        builder(cache, out_dir, words, prefixes, record)
+    return sizes
+
+def init_app(app):
+    """Make vendor_url() available to templates"""
+    out_dir = os.path.join(app.static_folder, VENDOR_DIR)
+    built = {name for name in FALLBACKS if os.path.exists(os.path.join(out_dir, name))}
+    if built != set(FALLBACKS):
+        logger.info("Loading %d vendor files from their CDN (run python -m app.vendor --fetch --build)",
+                    len(FALLBACKS) - len(built))
+
+    def vendor_url(name):
+        """The self-hosted copy of a vendor file, or its CDN URL if it has not been built"""
+        if name in built:
+            return url_for('static', filename=f'{VENDOR_DIR}/{name}')
+        return FALLBACKS[name]
+    app.jinja_env.globals['vendor_url'] = vendor_url
+
+if __name__ == '__main__':
+    import argparse
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    parser = argparse.ArgumentParser(description='Self-hosted vendor assets')
+    parser.add_argument('--fetch', action='store_true', help='download the pinned upstream files')
+    parser.add_argument('--build', action='store_true', help='write trimmed copies to app/static/vendor')
+    parser.add_argument('--cache', default=CACHE_DIR)
+    args = parser.parse_args()
+
+    if args.fetch:
+        fetch(args.cache)
+    if args.build:
+        sizes = build(os.path.join(os.path.dirname(__file__), 'static'), args.cache)
+        for name, (before, after) in sorted(sizes.items()):
+            print(f"{name}: {before} -> {after} bytes")
+        before = sum(b for b, _ in sizes.values())
+        after = sum(a for _, a in sizes.values())
+        if before:
+            print(f"Vendor files {before} -> {after} bytes ({100 * (1 - after / before):.1f}% less)")
+    if not (args.fetch or args.build):
+        parser.print_help()
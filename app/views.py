@@ -0,0 +1,871 @@
+"""
+Routes of the site, registered on the app by create_app() (see app/__init__.py).
+"""
+from flask import Blueprint, current_app, render_template, render_template_string, request, redirect, url_for, flash, session, g, jsonify, abort
+import os
+import logging
+from datetime import datetime
+from app.models.database import get_db, get_pool
+from app.models.migrations import MIGRATIONS
+from app.models.writer import execute_write, get_writer
+from app.models.pagination import fetch_page, cached_count, in_condition
+from app.models.profile import profile_counts, fetch_tab
+from app.models.stats import totals, site_stats, DEFAULT_BREAKDOWN_LIMIT
+from app.models.places import resolve_place, suggest_places, get_place, places_within, MAX_RADIUS_KM
+from app.models.search import search_page
+from app.models.user_cache import get_user, invalidate_user, get_user_cache
+from app.models.auth import login_required
+from app.passwords import hash_password, verify_password, get_hasher, HasherBusy
+from app.translations import get_template_context
+from app.cache import cached_page, get_page_cache, invalidate as invalidate_pages
+from app.conditional import page_validators, conditional
+from app.images import save_image, pending_images
+from app.uploads import UploadRejected
+from app.tasks import get_task_pool
+from app.metrics import get_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+
+logger = logging.getLogger(__name__)
+
+main = Blueprint('main', __name__)
+
+# Make translations available in all templates
+@main.app_context_processor
+def inject_translations():
+    lang = session.get('language', 'en')
+    g.lang = lang  # Make language accessible via g.lang
+    
+    # 't' is the language's catalog and '_' its translate function, both built once per language
+    return get_template_context(lang)
+
+# Make user info available in all templates
+@main.app_context_processor
+def inject_user():
+    try:
+        if 'user_id' in session:
+            # Cached and memoized per request, so routes that also load the user don't query again
+            user = get_user(session['user_id'])
+            
+            if user:
+                user['is_authenticated'] = True
+                
+                # Make sure profile_image is safely handled in session
+                if 'profile_image' not in session and user['profile_image'] is not None and user['profile_image'].strip() != '':
+                    session['profile_image'] = user['profile_image']
+                    logger.debug("Added missing profile_image to session: %s", user['profile_image'])
+                    
+                return {'current_user': user}
+        
+        # Default case for users not logged in
+        return {'current_user': {'is_authenticated': False}}
+    except Exception:
+        logger.exception("Error in inject_user context processor")
+        # Return a safe default to prevent template rendering issues
+        return {'current_user': {'is_authenticated': False}}
+
+# Columns each listing card displays; long descriptions are cut in SQL to what the card shows
+JOB_CARD_COLUMNS = ('id', 'title', 'substr(description, 1, 121) AS description', 'location', 'contact',
+                    'category', 'salary', 'deadline', 'posted_date')
+SCHEME_CARD_COLUMNS = ('id', 'title', 'description', 'eligibility', 'deadline', 'agency', 'posted_date')
+ISSUE_CARD_COLUMNS = ('id', 'title', 'description', 'location', 'category', 'image', 'status', 'reported_date')
+PRODUCT_CARD_COLUMNS = ('id', 'name', 'substr(description, 1, 101) AS description', 'price', 'location',
+                        'contact', 'category', 'image', 'posted_date')
+
+def _with_any_of(where, params, any_of):
+    """`where` and `params` with fetch_page's any_of filter folded in as an IN list"""
+    if not any_of:
+        return where, params
+    condition, values = in_condition(*any_of)
+    return ' AND '.join(filter(None, [where, condition])), (*params, *values)
+
+def fetch_listing(table, columns, sort_column, where=None, params=(), any_of=None):
+    """Fetch the page of a listing selected by the request's after/before cursor"""
+    conn = get_db()
+    total = None
+    if current_app.config['LISTING_SHOW_TOTAL']:
+        total = cached_count(conn, table, *_with_any_of(where, params, any_of),
+                             ttl=current_app.config['LISTING_TOTAL_TTL'])
+    return fetch_page(conn, table, columns, sort_column, where, params,
+                      after=request.args.get('after'),
+                      before=request.args.get('before'),
+                      page_size=current_app.config['PAGE_SIZE'],
+                      total=total, any_of=any_of)
+
+def search_listing(table, columns, text, where=None, params=(), any_of=None):
+    """Fetch a page of full-text search results, or None if FTS can't answer it"""
+    where, params = _with_any_of(where, params, any_of)
+    return search_page(get_db(), table, columns, text, where, params,
+                       after=request.args.get('after'),
+                       before=request.args.get('before'),
+                       page_size=current_app.config['PAGE_SIZE'])
+
+def location_filter():
+    """The ?radius= filter, in km around ?near= or else the signed-in user's village.
+
+    Returns (any_of, near): `any_of` is the ('place_id', ids) filter for
+    fetch_listing, None when the listing is not filtered; `near` describes
+    the filter for the listing template and is None when no radius was
+    asked for. When the place can't be resolved nothing matches, and `near`
+    carries the gazetteer places spelled most like it to offer instead.
+    """
+    radius = request.args.get('radius', type=float)
+    if not radius or radius <= 0:
+        return None, None
+    conn = get_db()
+    text = request.args.get('near', '').strip()
+    if text:
+        place = get_place(conn, resolve_place(conn, text))
+    else:
+        user = get_user(session['user_id']) if 'user_id' in session else None
+        place = get_place(conn, user['place_id']) if user else None
+    radius = min(radius, MAX_RADIUS_KM)
+    near = {'place': place, 'radius': radius, 'text': text, 'suggestions': []}
+    if place is None:
+        # An empty result, not everything: the visitor asked for rows near somewhere
+        near['suggestions'] = suggest_places(conn, text) if text else []
+        return ('place_id', []), near
+    return ('place_id', places_within(conn, place, radius) or [place['id']]), near
+
+def save_uploaded_image(field):
+    """Store the image posted in form field `field`; returns its stored name, or None if no file was sent
+
+    Raises UploadRejected, with a message for the user, for files that are
+    not an accepted image type or are over its size limit.
+    """
+    file = request.files.get(field)
+    if file is None or not file.filename:
+        return None
+    # Streamed to disk, sniffed and stored under its content hash (see app/uploads.py and app/images.py)
+    return save_image(file)
+
+# Home route
+@main.route('/')
+def index():
+    return render_template('index.html', stats=totals(get_db()))
+
+# Totals and the largest categories/villages for the homepage counters; read from the counters table
+@main.route('/stats')
+def stats():
+    limit = min(max(request.args.get('limit', DEFAULT_BREAKDOWN_LIMIT, type=int), 1), 100)
+    response = jsonify(site_stats(get_db(), limit))
+    response.cache_control.public = True
+    response.cache_control.max_age = 60
+    return response
+
+# Job Board routes
+@main.route('/jobs')
+@cached_page('jobs')
+def jobs():
+    category = request.args.get('category')
+    
+    logger.debug("Jobs with category filter: %s", category)
+    
+    search = request.args.get('search', '').strip()
+    
+    where, params = ('category = ?', (category,)) if category else (None, ())
+    any_of, near = location_filter()
+    page = None
+    if search:
+        page = search_listing('jobs', JOB_CARD_COLUMNS, search, where, params, any_of)
+        if page is None:
+            where = ' AND '.join(filter(None, [where, '(title LIKE ? OR description LIKE ?)']))
+            params = (*params, f'%{search}%', f'%{search}%')
+    if page is None:
+        page = fetch_listing('jobs', JOB_CARD_COLUMNS, 'posted_date', where, params, any_of)
+    logger.debug("Retrieved %d jobs for this page", len(page.items))
+    
+    # 304 without rendering when the browser already has this page
+    validators = page_validators(page.items, 'posted_date', page.next_cursor, page.prev_cursor, page.total)
+    return conditional(validators, lambda: render_template('jobs.html', jobs=page.items, page=page,
+                                                           selected_category=category, near=near))
+
+@main.route('/jobs/<int:id>')
+@cached_page('jobs')
+def job_details(id):
+    conn = get_db()
+    job = conn.execute('SELECT * FROM jobs WHERE id = ?', (id,)).fetchone()
+    
+    if job is None:
+        flash('Job not found!')
+        return redirect(url_for('main.jobs'))
+    
+    validators = page_validators([job], 'posted_date')
+    
+    # Convert job to a mutable dictionary
+    job_dict = dict(job)
+    
+    # Convert posted_date string to datetime object
+    try:
+        # Try to parse the date string
+        if job_dict['posted_date']:
+            job_dict['posted_date'] = datetime.strptime(job_dict['posted_date'], '%Y-%m-%d %H:%M:%S')
+    except (ValueError, TypeError):
+        # If parsing fails, use current date
+        job_dict['posted_date'] = datetime.now()
+        
+    return conditional(validators, lambda: render_template('job_details.html', job=job_dict))
+
+@main.route('/jobs/new', methods=['GET', 'POST'])
+@login_required
+def new_job():
+    if request.method == 'POST':
+        title = request.form['title']
+        description = request.form['description']
+        location = request.form['location']
+        contact = request.form['contact']
+        category = request.form['category']
+        eligibility = request.form['eligibility']
+        salary = request.form['salary']
+        deadline = request.form['deadline']
+        
+        if not title or not description or not contact:
+            flash('Title, description and contact information are required!')
+            return render_template('new_job.html')
+        
+        execute_write('''
+            INSERT INTO jobs 
+            (title, description, location, place_id, contact, category, eligibility, salary, deadline, user_id, posted_date) 
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (title, description, location, resolve_place(get_db(), location), contact, category, eligibility, salary,
+              deadline, session.get('user_id'), datetime.now()))
+        invalidate_pages('jobs')
+        
+        flash('Job posted successfully!')
+        return redirect(url_for('main.jobs'))
+        
+    return render_template('new_job.html')
+
+# Government Schemes routes
+@main.route('/schemes')
+@cached_page('schemes')
+def schemes():
+    page = fetch_listing('schemes', SCHEME_CARD_COLUMNS, 'posted_date')
+    validators = page_validators(page.items, 'posted_date', page.next_cursor, page.prev_cursor, page.total)
+    return conditional(validators, lambda: render_template('schemes.html', schemes=page.items, page=page))
+
+@main.route('/schemes/<int:id>')
+@cached_page('schemes')
+def scheme_details(id):
+    conn = get_db()
+    scheme = conn.execute('SELECT * FROM schemes WHERE id = ?', (id,)).fetchone()
+    
+    if scheme is None:
+        flash('Scheme not found!')
+        return redirect(url_for('main.schemes'))
+        
+    return conditional(page_validators([scheme], 'posted_date'),
+                       lambda: render_template('scheme_details.html', scheme=scheme))
+
+# Infrastructure Reporting routes
+@main.route('/issues')
+@cached_page('issues')
+def issues():
+    any_of, near = location_filter()
+    page = fetch_listing('issues', ISSUE_CARD_COLUMNS, 'reported_date', any_of=any_of)
+    validators = page_validators(page.items, 'reported_date', page.next_cursor, page.prev_cursor, page.total,
+                                 pending_images(page.items))
+    return conditional(validators, lambda: render_template('issues.html', issues=page.items, page=page, near=near))
+
+@main.route('/issues/report', methods=['GET', 'POST'])
+@login_required
+def report_issue():
+    if request.method == 'POST':
+        title = request.form['title']
+        description = request.form['description']
+        location = request.form['location']
+        category = request.form['category']
+        
+        if not title or not description or not location:
+            flash('Title, description and location are required!')
+            return render_template('report_issue.html')
+        
+        # Handle image upload
+        try:
+            image_filename = save_uploaded_image('image')
+        except UploadRejected as e:
+            flash(str(e))
+            return render_template('report_issue.html')
+        
+        execute_write('INSERT INTO issues (title, description, location, place_id, category, image, user_id, reported_date, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                      (title, description, location, resolve_place(get_db(), location), category, image_filename,
+                       session.get('user_id'), datetime.now(), 'Pending'))
+        invalidate_pages('issues')
+        
+        flash('Issue reported successfully!')
+        return redirect(url_for('main.issues'))
+        
+    return render_template('report_issue.html')
+
+# Marketplace routes
+@main.route('/marketplace')
+@cached_page('marketplace')
+def marketplace():
+    # Get filter parameters
+    category = request.args.get('category')
+    search = request.args.get('search', '').strip()
+    
+    conditions = []
+    params = []
+    
+    # Apply filters if provided
+    if category:
+        conditions.append('category = ?')
+        params.append(category)
+    any_of, near = location_filter()
+    
+    # Ranked full-text search; LIKE only if the database has no FTS5 index
+    page = None
+    if search:
+        page = search_listing('products', PRODUCT_CARD_COLUMNS, search, ' AND '.join(conditions) or None, params,
+                              any_of)
+        if page is None:
+            conditions.append('(name LIKE ? OR description LIKE ?)')
+            params.append(f'%{search}%')
+            params.append(f'%{search}%')
+    
+    if page is None:
+        page = fetch_listing('products', PRODUCT_CARD_COLUMNS, 'posted_date', ' AND '.join(conditions) or None, params,
+                             any_of)
+    
+    validators = page_validators(page.items, 'posted_date', page.next_cursor, page.prev_cursor, page.total,
+                                 pending_images(page.items))
+    return conditional(validators, lambda: render_template('marketplace.html', products=page.items, page=page, near=near))
+
+@main.route('/marketplace/new', methods=['GET', 'POST'])
+@login_required
+def new_product():
+    if request.method == 'POST':
+        name = request.form['name']
+        description = request.form['description']
+        price = request.form['price']
+        location = request.form['location']
+        contact = request.form['contact']
+        category = request.form['category']
+        
+        if not name or not price or not contact:
+            flash('Product name, price and contact information are required!')
+            return render_template('new_product.html')
+        
+        # Handle image upload
+        try:
+            image_filename = save_uploaded_image('image')
+        except UploadRejected as e:
+            flash(str(e))
+            return render_template('new_product.html')
+        
+        execute_write('INSERT INTO products (name, description, price, location, place_id, contact, category, image, user_id, posted_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                      (name, description, price, location, resolve_place(get_db(), location), contact, category,
+                       image_filename, session.get('user_id'), datetime.now()))
+        invalidate_pages('marketplace')
+        
+        flash('Product listed successfully!')
+        return redirect(url_for('main.marketplace'))
+        
+    return render_template('new_product.html')
+
+# Auth routes
+@main.route('/register', methods=['GET', 'POST'])
+def register():
+    # If user is already logged in, redirect to home page
+    if 'user_id' in session:
+        return redirect(url_for('main.index'))
+        
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+        fullname = request.form['fullname']
+        village = request.form['village']
+        contact = request.form['contact']
+        
+        # Enhanced validation
+        validation_errors = []
+        
+        if not username or len(username) < 3:
+            validation_errors.append('Username must be at least 3 characters long.')
+        
+        if not password or len(password) < 6:
+            validation_errors.append('Password must be at least 6 characters long.')
+            
+        if not contact:
+            validation_errors.append('Contact information is required.')
+            
+        if validation_errors:
+            for error in validation_errors:
+                flash(error)
+            return render_template('register.html')
+            
+        conn = get_db()
+        existing_user = conn.execute('SELECT id FROM users WHERE username = ?', (username,)).fetchone()
+        
+        if existing_user:
+            flash('Username already exists! Please choose another one.')
+            return render_template('register.html')
+            
+        try:
+            password_hash = hash_password(password)
+        except HasherBusy:
+            flash('Too many people are signing up right now. Please try again in a moment.')
+            return render_template('register.html'), 503
+            
+        try:
+            result = execute_write('INSERT INTO users (username, password, fullname, village, place_id, contact, joined_date) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                   (username, password_hash, fullname, village, resolve_place(conn, village), contact, datetime.now()))
+            
+            # Get the newly created user to log them in automatically
+            user = conn.execute('SELECT * FROM users WHERE id = ?', (result.lastrowid,)).fetchone()
+            
+            # Auto login after registration
+            if user:
+                session.clear()
+                session['user_id'] = user['id']
+                session['username'] = user['username']
+                session['fullname'] = user['fullname'] if user['fullname'] else user['username']
+                session['profile_image'] = user['profile_image']
+            
+            flash('Registration successful! Welcome to GrameenConnect.')
+            # Use redirect with explicit return
+            return redirect(url_for('main.index'))
+        except Exception:
+            flash('An error occurred during registration. Please try again.')
+            logger.exception("Registration failed")
+            return render_template('register.html')
+        
+    return render_template('register.html')
+
+@main.route('/login', methods=['GET', 'POST'])
+def login():
+    
+    # If user is already logged in, redirect to home page
+    if 'user_id' in session:
+        return redirect(url_for('main.index'))
+        
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+        
+        logger.debug("Login attempt for username: %s", username)
+        
+        if not username or not password:
+            flash('Username and password are required!')
+            logger.debug("Username or password missing in form")
+            return render_template('login.html')
+            
+        conn = get_db()
+        
+        # One lookup; an unknown username is checked against a dummy hash, so it takes as long to refuse
+        user = conn.execute('SELECT * FROM users WHERE username = ?', (username,)).fetchone()
+        try:
+            valid, new_hash = verify_password(user['password'] if user else None, password)
+        except HasherBusy:
+            flash('Too many people are signing in right now. Please try again in a moment.')
+            return render_template('login.html'), 503
+        
+        if valid and new_hash:
+            # Made with an older method or cost (or stored in plain text); unless a concurrent login got there first
+            execute_write('UPDATE users SET password = ? WHERE id = ? AND password = ?',
+                          (new_hash, user['id'], user['password']))
+            invalidate_user(user['id'])
+            logger.info("Rehashed the password of user %s", user['id'])
+        
+        if valid:
+            try:
+                session.clear()
+                session['user_id'] = user['id']
+                session['username'] = user['username']
+                session['fullname'] = user['fullname'] if user['fullname'] else user['username']
+                
+                # Safely store profile image in session
+                if user['profile_image'] is not None and user['profile_image'].strip() != '':
+                    session['profile_image'] = user['profile_image']
+                    logger.debug("Set profile_image in session: %s", user['profile_image'])
+                else:
+                    # Ensure profile_image is not set in session if it's not in the database
+                    session.pop('profile_image', None)
+                    logger.debug("No profile image found for user")
+                
+                logger.debug("Login successful for user_id %s, session %s", session['user_id'], session)
+                
+                flash('Login successful! Welcome back, ' + session['username'] + '!')
+                # Use redirect with explicit return
+                return redirect(url_for('main.index'))
+            except Exception:
+                logger.exception("Error during login session setup")
+                flash('An error occurred during login. Please try again.')
+                return render_template('login.html')
+        else:
+            flash('Invalid username or password!')
+            logger.debug("Failed login for username %s (%s)", username, 'wrong password' if user else 'no such user')
+            
+    return render_template('login.html')
+
+@main.route('/logout')
+def logout():
+    session.clear()
+    flash('You have been logged out.')
+    return redirect(url_for('main.index'))
+
+# User Profile
+@main.route('/profile')
+@login_required
+def profile():
+    user_id = session.get('user_id')
+    logger.debug("Profile for user_id %s, session %s", user_id, session)
+    
+    conn = get_db()
+    
+    # Fetch user data
+    user = get_user(user_id)
+    
+    if not user:
+        logger.debug("User with ID %s not found in database", user_id)
+        flash('User not found!')
+        return redirect(url_for('main.index'))
+    
+    # The header's counts in one query; each tab loads its items from profile_tab() when opened
+    counts = profile_counts(conn, user_id)
+    logger.debug("User has %(jobs)d jobs, %(issues)d issues, %(products)d products and %(applications)d applications",
+                 counts)
+    
+    return render_template('profile.html', user=user, counts=counts)
+
+# One page of a profile tab's items, as HTML to append to the tab, and the cursor of the next page
+@main.route('/profile/<any(jobs, issues, products, applications):tab>')
+@login_required
+def profile_tab(tab):
+    page = fetch_tab(get_db(), tab, session['user_id'], after=request.args.get('after'),
+                     page_size=current_app.config['PAGE_SIZE'])
+    return jsonify({'html': render_template('_profile_tab.html', tab=tab, items=page.items),
+                    'next': page.next_cursor})
+
+@main.route('/edit_profile', methods=['GET', 'POST'])
+@login_required
+def edit_profile():
+    logger.debug("Edit profile for user_id %s, session %s", session.get('user_id'), session)
+    
+    user = get_user(session['user_id'])
+    
+    if user is None:
+        logger.debug("User not found for ID: %s", session.get('user_id'))
+        flash('User not found!')
+        return redirect(url_for('main.index'))
+    
+    if request.method == 'POST':
+        fullname = request.form.get('fullname', '')
+        village = request.form.get('village', '')
+        contact = request.form.get('contact', '')
+        
+        # Basic validation
+        if not contact:
+            flash('Contact information is required!')
+            return render_template('edit_profile.html', user=user)
+        
+        # Handle profile and banner image uploads, keeping the current images if none was sent
+        profile_image = user['profile_image'] if 'profile_image' in user.keys() else None
+        banner_image = user['banner_image'] if 'banner_image' in user.keys() else None
+        try:
+            profile_image = save_uploaded_image('profile_image') or profile_image
+            banner_image = save_uploaded_image('banner_image') or banner_image
+            logger.debug("Profile image %s, banner image %s", profile_image, banner_image)
+        except UploadRejected as e:
+            flash(str(e))
+            return render_template('edit_profile.html', user=user)
+        except Exception:
+            logger.exception("Error uploading profile images")
+            flash('Error uploading image. Please try the alternative upload method.')
+        
+        try:
+            # Update user information
+            execute_write('''
+                UPDATE users 
+                SET fullname = ?, village = ?, place_id = ?, contact = ?, profile_image = ?, banner_image = ?
+                WHERE id = ?
+            ''', (fullname, village, resolve_place(get_db(), village), contact, profile_image, banner_image,
+                  session['user_id']))
+            invalidate_user(session['user_id'])
+            
+            # If user changes fullname, update the session
+            if user['fullname'] != fullname:
+                session['fullname'] = fullname if fullname else user['username']
+            
+            # Update profile_image in session if changed
+            if 'profile_image' in user.keys() and user['profile_image'] != profile_image:
+                session['profile_image'] = profile_image
+                logger.debug("Updated session with new profile_image: %s", profile_image)
+            
+            flash('Profile updated successfully!')
+        except Exception as e:
+            logger.exception("Error updating user profile in database")
+            flash(f'Error updating profile: {str(e)}')
+            
+        return redirect(url_for('main.profile'))
+    
+    return render_template('edit_profile.html', user=user)
+
+@main.route('/settings')
+@login_required
+def settings():
+    user = get_user(session['user_id'])
+    
+    return render_template('settings.html', user=user)
+
+# Language toggle
+@main.route('/language/<lang>')
+def set_language(lang):
+    next_page = request.args.get('next', '/')
+    session['language'] = lang
+    return redirect(next_page)
+
+@main.route('/jobs/<int:id>/apply', methods=['GET', 'POST'])
+@login_required
+def apply_for_job(id):
+    conn = get_db()
+    job = conn.execute('SELECT * FROM jobs WHERE id = ?', (id,)).fetchone()
+    
+    if job is None:
+        flash('Job not found!')
+        return redirect(url_for('main.jobs'))
+    
+    job_dict = dict(job)
+    
+    # Check if user has already applied (answered from the unique (user_id, job_id) index)
+    application = conn.execute(
+        'SELECT id FROM job_applications WHERE user_id = ? AND job_id = ?', 
+        (session.get('user_id'), id)
+    ).fetchone()
+    
+    if request.method == 'POST':
+        name = request.form.get('name', '')
+        phone = request.form.get('phone', '')
+        experience = request.form.get('experience', '')
+        message = request.form.get('message', '')
+        
+        if not name or not phone:
+            flash('Name and phone number are required!')
+            return render_template('apply_job.html', job=job_dict, already_applied=application is not None)
+        
+        # One statement for both, so a double submit updates instead of hitting the unique index
+        execute_write(
+            '''INSERT INTO job_applications 
+               (job_id, user_id, name, phone, experience, message, application_date, status)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (user_id, job_id) DO UPDATE
+               SET name = excluded.name, phone = excluded.phone, experience = excluded.experience,
+                   message = excluded.message, application_date = excluded.application_date''',
+            (id, session.get('user_id'), name, phone, experience, message, datetime.now(), 'Pending')
+        )
+        flash('Your application has been updated!' if application else 'Your application has been submitted!')
+        
+        return redirect(url_for('main.job_details', id=id))
+    
+    # For GET request, show the application form
+    user = None
+    if session.get('user_id'):
+        user = get_user(session.get('user_id'))
+    
+    return render_template('apply_job.html', job=job_dict, user=user, already_applied=application is not None)
+
+@main.route('/my-applications')
+@login_required
+def my_applications():
+    conn = get_db()
+    
+    # Get all applications for the current user with job details
+    applications = conn.execute('''
+        SELECT a.*, j.title as job_title, j.category as job_category, j.location as job_location, j.deadline as job_deadline
+        FROM job_applications a
+        JOIN jobs j ON a.job_id = j.id
+        WHERE a.user_id = ?
+        ORDER BY a.application_date DESC
+    ''', (session.get('user_id'),)).fetchall()
+    
+    return render_template('my_applications.html', applications=applications)
+
+# Connection pool, writer and cache statistics for load testing; they include the SQL of slow requests
+@main.route('/debug/db-pool')
+def db_pool_stats():
+    if not (current_app.debug or current_app.config['DEBUG_STATS_ENABLED']):
+        abort(404)
+    return jsonify({'pool': get_pool().stats(), 'writer': get_writer().stats(),
+                    'user_cache': get_user_cache().stats(), 'page_cache': get_page_cache().stats(),
+                    'tasks': get_task_pool().stats(), 'metrics': get_metrics().stats(),
+                    'password_hashing': get_hasher().stats(),
+                    'compression': current_app.extensions['compression'].stats() if 'compression' in current_app.extensions else None})
+
+# Prometheus scrape target; summed over all workers when METRICS_DIR is set
+@main.route('/metrics')
+def metrics():
+    if not current_app.config['METRICS_ENABLED']:
+        abort(404)
+    return current_app.response_class(get_metrics().render(current_app.config['METRICS_DIR']),
+                                      content_type=METRICS_CONTENT_TYPE)
+
+# Liveness: the worker process is up and answering requests
+@main.route('/healthz')
+def healthz():
+    return jsonify({'status': 'ok', 'pid': os.getpid()})
+
+# Readiness: this worker can serve pages, so a load balancer may send it traffic
+@main.route('/readyz')
+def readyz():
+    checks = {}
+    try:
+        version = get_db().execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+        latest = max(number for number, _, _ in MIGRATIONS)
+        checks['database'] = 'ok' if version >= latest else f'schema at version {version}, expected {latest}'
+    except Exception as e:
+        checks['database'] = f'error: {e}'
+    checks['writer'] = 'ok' if get_writer().is_alive() else 'writer thread stopped'
+    tasks = get_task_pool()
+    checks['tasks'] = 'ok' if tasks.alive() == tasks.workers else f'{tasks.alive()} of {tasks.workers} workers running'
+    ready = all(value == 'ok' for value in checks.values())
+    return jsonify({'status': 'ready' if ready else 'unavailable', 'pid': os.getpid(), 'checks': checks}), \
+        200 if ready else 503
+
+# Direct upload fallback route (can be removed or protected in production)
+@main.route('/direct-upload', methods=['GET', 'POST'])
+@login_required
+def direct_upload():
+    if request.method == 'POST':
+        try:
+            # Get the file from the request
+            if 'file' not in request.files:
+                return 'No file part in the request', 400
+                
+            file = request.files['file']
+            if file.filename == '':
+                return 'No file selected', 400
+                
+            try:
+                new_filename = save_uploaded_image('file')
+            except UploadRejected as e:
+                return str(e), 400
+            
+            # Update the user's profile image in the database
+            execute_write('UPDATE users SET profile_image = ? WHERE id = ?', 
+                          (new_filename, session['user_id']))
+            invalidate_user(session['user_id'])
+            
+            # Update in session as well
+            session['profile_image'] = new_filename
+            
+            return f"File uploaded successfully as {new_filename}", 200
+            
+        except Exception as e:
+            logger.exception("Error in direct upload")
+            return f"Error: {str(e)}", 500
+    
+    # Simple upload form for GET requests
+    return render_template_string('''
+    <!doctype html>
+    <html>
+    <head>
+        <title>Direct Profile Picture Upload</title>
+        <meta name="viewport" content="width=device-width, initial-scale=1">
+        <link href="{{ vendor_url('bootstrap/bootstrap.min.css') }}" rel="stylesheet">
+        <style>
+            body { max-width: 500px; margin: 0 auto; padding: 20px; }
+            .preview { width: 100px; height: 100px; margin: 15px auto; border-radius: 50%; object-fit: cover; }
+            .hidden { display: none; }
+        </style>
+    </head>
+    <body>
+        <div class="card">
+            <div class="card-header bg-primary text-white">
+                <h3 class="mb-0">Upload Profile Picture</h3>
+            </div>
+            <div class="card-body">
+                <p>Use this simple form to directly upload your profile picture.</p>
+                
+                <div class="mb-3">
+                    <label for="file" class="form-label">Select image:</label>
+                    <input type="file" class="form-control" id="file" name="file" accept=".jpg,.jpeg,.png,.gif">
+                </div>
+                
+                <div class="text-center">
+                    <img id="preview" src="" class="preview hidden" alt="Preview">
+                </div>
+                
+                <div class="d-grid mt-3">
+                    <button onclick="uploadFile()" class="btn btn-primary">Upload</button>
+                </div>
+                
+                <div id="result" class="alert mt-3 hidden"></div>
+                
+                <div class="mt-3 text-center">
+                    <a href="/profile" class="btn btn-outline-secondary btn-sm">Return to Profile</a>
+                </div>
+            </div>
+        </div>
+                
+        <script>
+            // Preview image
+            document.getElementById('file').addEventListener('change', function(e) {
+                const file = this.files[0];
+                if (!file) return;
+                
+                const preview = document.getElementById('preview');
+                const reader = new FileReader();
+                
+                reader.onload = function(e) {
+                    preview.src = e.target.result;
+                    preview.classList.remove('hidden');
+                }
+                
+                reader.readAsDataURL(file);
+            });
+            
+            function uploadFile() {
+                const fileInput = document.getElementById('file');
+                const resultDiv = document.getElementById('result');
+                const btn = document.querySelector('button');
+                
+                if (!fileInput.files.length) {
+                    showResult('Please select a file first.', 'warning');
+                    return;
+                }
+                
+                // Show loading state
+                btn.disabled = true;
+                btn.innerHTML = '<span class="spinner-border spinner-border-sm" role="status" aria-hidden="true"></span> Uploading...';
+                resultDiv.classList.add('hidden');
+                
+                const file = fileInput.files[0];
+                const formData = new FormData();
+                formData.append('file', file);
+                
+                fetch('/direct-upload', {
+                    method: 'POST',
+                    body: formData
+                })
+                .then(response => {
+                    if (!response.ok) {
+                        return response.text().then(text => {
+                            throw new Error(text || 'Failed to upload image');
+                        });
+                    }
+                    return response.text();
+                })
+                .then(text => {
+                    showResult('Image uploaded successfully! Redirecting to your profile...', 'success');
+                    setTimeout(() => {
+                        window.location.href = '/profile';
+                    }, 2000);
+                })
+                .catch(error => {
+                    showResult(error.message || 'Error uploading file', 'danger');
+                })
+                .finally(() => {
+                    btn.disabled = false;
+                    btn.innerHTML = 'Upload';
+                });
+            }
+            
+            function showResult(message, type) {
+                const resultDiv = document.getElementById('result');
+                resultDiv.textContent = message;
+                resultDiv.className = `alert alert-${type} mt-3`;
+                resultDiv.classList.remove('hidden');
+            }
+        </script>
+    </body>
+    </html>
+    ''')
@@ -0,0 +1,94 @@
+"""
+Shared helpers for the benchmark scripts: loading the Flask app against a
+scratch database and filling it with synthetic rows.
+"""
+import os
+import random
+import sys
+import time
+import urllib.request
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+JOB_CATEGORIES = ['Agriculture', 'Tutoring', 'Labor', 'Skilled Trade', 'Other']
+PRODUCT_CATEGORIES = ['Agriculture', 'Handicrafts', 'Food', 'Clothing', 'Other']
+ISSUE_CATEGORIES = ['Roads', 'Water', 'Electricity', 'Sanitation', 'Other']
+VILLAGES = ['Rampur', 'Sitapur', 'Barabanki', 'Gonda', 'Bahraich', 'Faizabad', 'Lakhimpur', 'Hardoi']
+
+def load_app(db_path, **config):
+    """Create the app with its database at `db_path`, setting up the schema"""
+    from app import create_app
+    from app.models.database import initialize_db
+    os.environ['GRAMEENCONNECT_DB'] = db_path
+    app = create_app(dict(config, DATABASE=db_path))
+    with app.app_context():
+        initialize_db()
+    return app
+
+def seed(conn, users=100, jobs=1000, products=1000, issues=1000, applications=1000, seed=1):
+    """Insert synthetic rows into an initialized database"""
+    from app.models.places import resolve_all
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    first_user = conn.execute('SELECT COALESCE(MAX(id), 0) FROM users').fetchone()[0] + 1
+
+    conn.executemany(
+        'INSERT INTO users (username, password, fullname, village, contact, joined_date) VALUES (?, ?, ?, ?, ?, ?)',
+        ((f'bench_user_{first_user + i}', 'password', f'Bench User {i}', rng.choice(VILLAGES), '9999999999',
+          start + timedelta(minutes=i)) for i in range(users)))
+    user_ids = [first_user + i for i in range(users)]
+
+    conn.executemany(
+        'INSERT INTO jobs (title, description, location, contact, category, eligibility, salary, deadline, '
+        'user_id, posted_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        ((f'Job {i}', 'Work in the fields during the harvest season. ' * 4, rng.choice(VILLAGES), '9999999999',
+          rng.choice(JOB_CATEGORIES), 'Anyone above 18', '300/day', '2025-12-31', rng.choice(user_ids),
+          start + timedelta(minutes=i)) for i in range(jobs)))
+
+    conn.executemany(
+        'INSERT INTO products (name, description, price, location, contact, category, user_id, posted_date) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        ((f'Product {i}', 'Fresh organic produce from the village farm. ' * 3, str(rng.randint(10, 999)),
+          rng.choice(VILLAGES), '9999999999', rng.choice(PRODUCT_CATEGORIES), rng.choice(user_ids),
+          start + timedelta(minutes=i)) for i in range(products)))
+
+    conn.executemany(
+        'INSERT INTO issues (title, description, location, category, user_id, reported_date, status) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        ((f'Issue {i}', 'The road near the school is broken.', rng.choice(VILLAGES), rng.choice(ISSUE_CATEGORIES),
+          rng.choice(user_ids), start + timedelta(minutes=i), 'Pending') for i in range(issues)))
+
+    first_job = conn.execute('SELECT MIN(id) FROM jobs').fetchone()[0] or 1
+    pairs = set()
+    while len(pairs) < min(applications, users * jobs):
+        pairs.add((rng.choice(user_ids), first_job + rng.randrange(jobs)))
+    conn.executemany(
+        'INSERT INTO job_applications (job_id, user_id, name, phone, experience, message, application_date, status) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        ((job_id, user_id, 'Applicant', '9999999999', '2 years', 'Interested', start, 'Pending')
+         for user_id, job_id in pairs))
+    # Bulk inserts skip the routes that resolve locations, so resolve them as a gazetteer reload does
+    resolve_all(conn)
+    conn.commit()
+    return user_ids
+
+def wait_ready(port, process, timeout=60):
+    """Wait until the server started as `process` answers /readyz on `port`"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with {process.returncode}")
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/readyz', timeout=2) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+def percentile(ordered, fraction):
+    """Milliseconds at `fraction` of a sorted list of seconds"""
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000 if ordered else 0.0
@@ -0,0 +1,86 @@
+"""
+CPU cost against bytes saved for compressing our pages at different gzip
+levels and brotli qualities.
+
+Renders the main pages (anonymous and logged in) against a seeded scratch
+database, then compresses each body the way the middleware does and reports
+the median time per page, the compressed size and the microseconds spent
+per KB saved. The last table is the whole request through the test client
+with and without Accept-Encoding, at the configured settings.
+
+    python benchmarks/compression_cost.py [--runs 50] [--rows 1000]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from common import load_app, seed
+from app.compression import compress, brotli
+from app.models.database import get_db_connection
+
+ANONYMOUS = ['/', '/jobs', '/marketplace', '/issues', '/schemes', '/login']
+LOGGED_IN = ['/profile', '/edit_profile']
+CODECS = [('gzip', 1), ('gzip', 6), ('gzip', 9)] + ([('br', 1), ('br', 4), ('br', 6), ('br', 11)] if brotli else [])
+
+def median_seconds(fn, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--rows', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        app = load_app(db_path)
+        app.config['PAGE_CACHE_ENABLED'] = False
+        conn = get_db_connection(db_path)
+        seed(conn, jobs=args.rows, products=args.rows, issues=args.rows, applications=args.rows)
+        conn.close()
+
+        client = app.test_client()
+        pages = {page: client.get(page, headers={'Accept-Encoding': 'identity'}).data for page in ANONYMOUS}
+        client.post('/register', data={'username': 'benchuser', 'password': 'benchpass', 'confirm_password': 'benchpass',
+                                       'fullname': 'Bench', 'village': 'Rampur', 'contact': '9999999999'})
+        client.post('/login', data={'username': 'benchuser', 'password': 'benchpass'})
+        pages.update({page: client.get(page, headers={'Accept-Encoding': 'identity'}).data for page in LOGGED_IN})
+
+        header = ''.join(f'{f"{name}-{level}":>16}' for name, level in CODECS)
+        print("Per page: compressed KB / median ms / us per KB saved")
+        print(f"{'page':<14}{'KB':>7}{header}")
+        totals = {codec: [0, 0.0] for codec in CODECS}
+        for page, body in pages.items():
+            cells = []
+            for name, level in CODECS:
+                kwargs = {'br_quality': level} if name == 'br' else {'level': level}
+                size = len(compress(body, name, **kwargs))
+                seconds = median_seconds(lambda: compress(body, name, **kwargs), args.runs)
+                saved_kb = (len(body) - size) / 1024
+                totals[(name, level)][0] += size
+                totals[(name, level)][1] += seconds
+                cells.append(f'{size / 1024:>5.1f}/{seconds * 1000:>5.2f}/{seconds * 1e6 / saved_kb:>4.0f}')
+            print(f"{page:<14}{len(body) / 1024:>7.1f}" + ''.join(f'{c:>16}' for c in cells))
+        original = sum(len(body) for body in pages.values())
+        print(f"{'all pages':<14}{original / 1024:>7.1f}" + ''.join(
+            f'{f"{100 * (1 - size / original):.1f}% {seconds * 1000:.1f}ms":>16}' for size, seconds in totals.values()))
+
+        print(f"\nWhole request at COMPRESS_LEVEL={app.config['COMPRESS_LEVEL']}, "
+              f"COMPRESS_BR_QUALITY={app.config['COMPRESS_BR_QUALITY']} (median ms)")
+        print(f"{'page':<14}{'identity':>10}{'gzip':>10}{'br':>10}")
+        for page in pages:
+            if client.get(page).status_code != 200:
+                continue  # /login redirects once logged in
+            row = [median_seconds(lambda: client.get(page, headers={'Accept-Encoding': encoding}).data, args.runs // 2 or 1)
+                   for encoding in ('identity', 'gzip', 'br')]
+            print(f"{page:<14}" + ''.join(f'{seconds * 1000:>10.2f}' for seconds in row))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Bytes sent for listing and detail pages on a first visit versus a revalidation.
+
+Fetches each route once, then again with the ETag (If-None-Match) and the
+Last-Modified date (If-Modified-Since) it returned, and counts the status
+line, headers and body the server sends each time. Runs with the page cache
+off so every request goes through the view.
+
+    python benchmarks/conditional_get_bytes.py [--rows 1000]
+"""
+import argparse
+import os
+import tempfile
+
+from common import load_app, seed
+from app.models.database import get_db_connection
+
+ROUTES = ['/jobs', '/jobs?category=Labor', '/jobs/1', '/marketplace', '/issues', '/schemes', '/schemes/1']
+
+def bytes_sent(response):
+    """Status line, headers and body as they go over the wire"""
+    head = f"HTTP/1.1 {response.status}\r\n" + ''.join(f"{k}: {v}\r\n" for k, v in response.headers.items()) + "\r\n"
+    return len(head.encode('latin-1')) + len(response.get_data())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        app = load_app(db_path)
+        app.config['PAGE_CACHE_ENABLED'] = False
+        conn = get_db_connection(db_path)
+        seed(conn, jobs=args.rows, products=args.rows, issues=args.rows, applications=0)
+        conn.close()
+
+        client = app.test_client()
+        print(f"{'route':<24}{'first':>8}{'etag':>8}{'since':>8}{'saved':>8}")
+        totals = [0, 0, 0]
+        for url in ROUTES:
+            first = client.get(url)
+            assert first.status_code == 200, (url, first.status_code)
+            by_etag = client.get(url, headers={'If-None-Match': first.headers['ETag']})
+            by_date = client.get(url, headers={'If-Modified-Since': first.headers['Last-Modified']})
+            assert by_etag.status_code == 304 and by_date.status_code == 304, (url, by_etag.status_code,
+                                                                               by_date.status_code)
+            assert not by_etag.get_data() and not by_date.get_data()
+            sizes = [bytes_sent(first), bytes_sent(by_etag), bytes_sent(by_date)]
+            totals = [t + s for t, s in zip(totals, sizes)]
+            print(f"{url:<24}{sizes[0]:>8}{sizes[1]:>8}{sizes[2]:>8}{1 - sizes[1] / sizes[0]:>8.1%}")
+        print(f"{'total':<24}{totals[0]:>8}{totals[1]:>8}{totals[2]:>8}{1 - totals[1] / totals[0]:>8.1%}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Bytes a browser downloads from this server for a first (empty cache) page
+load, with the original static files versus the fingerprinted build.
+
+Renders each page, collects the /static/ files it refers to (link, script
+and img tags, inline url(...) and url(...) inside the stylesheets), and
+fetches them with Accept-Encoding: br, gzip as a browser would. Counts
+response bodies as sent. Images named in the stylesheets are counted as if
+every rule matched, so the totals are an upper bound. Third-party CDN files
+are listed but not fetched.
+
+    python benchmarks/first_load_bytes.py
+"""
+import argparse
+import os
+import posixpath
+import re
+import tempfile
+
+from common import load_app
+from app import assets
+
+PAGES = ['/', '/jobs', '/marketplace', '/issues', '/schemes', '/login']
+REFERENCE = re.compile(r'''(?:href|src)=["']([^"']+)["']|url\(\s*['"]?([^'")]+)['"]?\s*\)''')
+ACCEPT = {'Accept-Encoding': 'br, gzip'}
+
+def references(text, base):
+    for match in REFERENCE.finditer(text):
+        url = match.group(1) or match.group(2)
+        if url.startswith(('http://', 'https://', '//')):
+            yield url
+        elif not url.startswith(('data:', '#', 'mailto:', 'tel:', 'javascript:')):
+            yield posixpath.normpath(posixpath.join(base, url.split('?')[0]))
+
+def decoded(response):
+    encoding = response.headers.get('Content-Encoding')
+    if encoding == 'br':
+        return assets.brotli.decompress(response.data)
+    if encoding == 'gzip':
+        import gzip
+        return gzip.decompress(response.data)
+    return response.data
+
+def first_load(client, page):
+    """(html bytes, static files fetched, static bytes, external urls)"""
+    response = client.get(page, headers=ACCEPT)
+    html = decoded(response).decode('utf-8')
+    queue = [url for url in references(html, '/') if url.startswith('/static/')]
+    external = {url for url in references(html, '/') if url.startswith(('http', '//'))}
+    seen, total = set(), 0
+    while queue:
+        url = queue.pop()
+        if url in seen:
+            continue
+        seen.add(url)
+        response = client.get(url, headers=ACCEPT)
+        if response.status_code != 200:
+            continue
+        total += len(response.data)
+        if url.endswith('.css'):
+            queue += [u for u in references(decoded(response).decode('utf-8'), posixpath.dirname(url))
+                      if u.startswith('/static/')]
+        response.close()
+    return len(response.data), len(seen), total, external
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = load_app(os.path.join(tmp, 'bench.db'))
+        app.config['PAGE_CACHE_ENABLED'] = False
+        client = app.test_client()
+        assets.build(app.static_folder)
+        built = assets.load_manifest(app.static_folder)
+
+        external = set()
+        print(f"{'page':<14}{'html KB':>9}{'original files':>16}{'KB':>9}{'built files':>13}{'KB':>9}")
+        totals = [0, 0]
+        for page in PAGES:
+            app.extensions['assets_manifest'] = {}
+            html, original_files, original_bytes, urls = first_load(client, page)
+            app.extensions['assets_manifest'] = built
+            _, built_files, built_bytes, _ = first_load(client, page)
+            external |= urls
+            totals[0] += html + original_bytes
+            totals[1] += html + built_bytes
+            print(f"{page:<14}{html / 1024:>9.1f}{original_files:>16}{original_bytes / 1024:>9.1f}"
+                  f"{built_files:>13}{built_bytes / 1024:>9.1f}")
+        print(f"Total over {len(PAGES)} pages: {totals[0] / 1024:.1f} KB -> {totals[1] / 1024:.1f} KB "
+              f"({100 * (1 - totals[1] / totals[0]):.1f}% less)")
+        print(f"Not counted ({len(external)} third-party files): " + ', '.join(sorted(external)))
+
+if __name__ == '__main__':
+    main()
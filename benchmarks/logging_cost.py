@@ -0,0 +1,64 @@
+"""
+Per-request cost of the debug logging in the login, profile and jobs
+routes at different log settings.
+
+Logs in a user on a seeded scratch database and times requests through
+the test client with LOG_LEVEL=INFO (debug calls disabled), with
+LOG_TRACE on but the request not traced, with the request traced and
+with LOG_LEVEL=DEBUG. Log output goes to /dev/null so the terminal
+doesn't set the pace.
+
+    python benchmarks/logging_cost.py [--runs 300]
+"""
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+from common import load_app, seed
+from app import log
+from app.models.database import get_db_connection
+
+PAGES = ['/profile', '/edit_profile', '/jobs?category=Agriculture', '/login']
+SETTINGS = [('INFO', False, {}), ('INFO + trace on', True, {}),
+            ('traced request', True, {log.TRACE_HEADER: '1'}), ('DEBUG', False, {})]
+
+def median_ms(client, page, headers, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        client.get(page, headers=headers).close()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, 'w') as devnull:
+        db_path = os.path.join(tmp, 'bench.db')
+        app = load_app(db_path, PAGE_CACHE_ENABLED=False, LOG_TRACE=True)
+        conn = get_db_connection(db_path)
+        seed(conn)
+        conn.close()
+        log._listener.handlers[0].setStream(devnull)
+
+        client = app.test_client()
+        client.post('/register', data={'username': 'benchuser', 'password': 'benchpass', 'fullname': 'Bench',
+                                       'village': 'Rampur', 'contact': '9999999999'})
+        client.post('/login', data={'username': 'benchuser', 'password': 'benchpass'})
+
+        print(f"Median ms per request, {args.runs} runs")
+        print(f"{'page':<30}" + ''.join(f'{name:>18}' for name, _, _ in SETTINGS))
+        for page in PAGES:
+            row = []
+            for name, trace, headers in SETTINGS:
+                log.configure(logging.DEBUG if name == 'DEBUG' else logging.INFO, trace=trace)
+                row.append(median_ms(client, page, headers, args.runs))
+            print(f"{page:<30}" + ''.join(f'{ms:>18.3f}' for ms in row))
+
+if __name__ == '__main__':
+    main()
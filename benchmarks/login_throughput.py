@@ -0,0 +1,83 @@
+"""
+Login throughput and latency at different password hash costs.
+
+Registers a user per cost setting on a scratch database, then for each
+setting runs --clients threads logging in as fast as they can through the
+test client, while one more thread requests /healthz to show what the
+logins cost everyone else. Hashing runs on --hash-threads threads (the
+PASSWORD_HASH_THREADS setting); logins turned away because the hash queue
+is full are counted as 503s.
+
+    python benchmarks/login_throughput.py [--duration 5] [--clients 8] [--hash-threads 2]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from common import load_app, percentile
+
+SETTINGS = [
+    ('scrypt n=2^12', {'PASSWORD_HASH': 'scrypt', 'PASSWORD_SCRYPT_N': 2 ** 12}),
+    ('scrypt n=2^13', {'PASSWORD_HASH': 'scrypt', 'PASSWORD_SCRYPT_N': 2 ** 13}),
+    ('scrypt n=2^14 (default)', {'PASSWORD_HASH': 'scrypt', 'PASSWORD_SCRYPT_N': 2 ** 14}),
+    ('scrypt n=2^15', {'PASSWORD_HASH': 'scrypt', 'PASSWORD_SCRYPT_N': 2 ** 15}),
+    ('pbkdf2 100k', {'PASSWORD_HASH': 'pbkdf2_sha256', 'PASSWORD_PBKDF2_ITERATIONS': 100000}),
+    ('pbkdf2 600k', {'PASSWORD_HASH': 'pbkdf2_sha256', 'PASSWORD_PBKDF2_ITERATIONS': 600000}),
+]
+PASSWORD = 'bench-password'
+
+def hammer(app, path, data, until, times, statuses):
+    client = app.test_client(use_cookies=False)
+    while time.perf_counter() < until:
+        start = time.perf_counter()
+        response = client.post(path, data=data) if data else client.get(path)
+        times.append(time.perf_counter() - start)
+        statuses.append(response.status_code)
+        response.close()
+
+def run(app, username, clients, duration):
+    until = time.perf_counter() + duration
+    logins, login_statuses, probes = [], [], []
+    threads = [threading.Thread(target=hammer, args=(app, '/login', {'username': username, 'password': PASSWORD},
+                                                     until, logins, login_statuses))
+               for _ in range(clients)]
+    threads.append(threading.Thread(target=hammer, args=(app, '/healthz', None, until, probes, [])))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    succeeded = [t for t, status in zip(logins, login_statuses) if status == 302]
+    return {'logins_per_s': len(succeeded) / duration, 'login_p50': percentile(sorted(succeeded), 0.5),
+            'login_p95': percentile(sorted(succeeded), 0.95), 'busy': login_statuses.count(503),
+            'probe_p50': percentile(sorted(probes), 0.5), 'probe_p95': percentile(sorted(probes), 0.95)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per setting')
+    parser.add_argument('--clients', type=int, default=8, help='threads logging in at once')
+    parser.add_argument('--hash-threads', type=int, default=2)
+    parser.add_argument('--hash-queue', type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = load_app(os.path.join(tmp, 'bench.db'), PAGE_CACHE_ENABLED=False, METRICS_ENABLED=False,
+                       PASSWORD_HASH_THREADS=args.hash_threads, PASSWORD_HASH_QUEUE=args.hash_queue)
+        print(f"{args.clients} clients, {args.hash_threads} hash threads, queue {args.hash_queue}, "
+              f"{args.duration:g} s per setting, {os.cpu_count()} CPUs")
+        print(f"{'setting':<26}{'logins/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'503s':>7}"
+              f"{'healthz p50':>13}{'healthz p95':>13}")
+        for i, (name, settings) in enumerate(SETTINGS):
+            # Registered under the setting, so the stored hash already has its cost and logins don't rehash
+            app.config.update(settings)
+            username = f'bench_login_{i}'
+            app.test_client().post('/register', data={'username': username, 'password': PASSWORD,
+                                                      'fullname': 'Bench', 'village': 'Rampur',
+                                                      'contact': '9999999999'})
+            result = run(app, username, args.clients, args.duration)
+            print(f"{name:<26}{result['logins_per_s']:>10.1f}{result['login_p50']:>10.1f}{result['login_p95']:>10.1f}"
+                  f"{result['busy']:>7}{result['probe_p50']:>13.2f}{result['probe_p95']:>13.2f}")
+
+if __name__ == '__main__':
+    main()
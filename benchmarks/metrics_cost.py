@@ -0,0 +1,60 @@
+"""
+Per-request cost of the request metrics (app/metrics.py).
+
+Logs in a user on a seeded scratch database and times requests through
+the test client with metrics off, on, and on with every request sampled
+(its statements kept for the slow-request log, which is set high enough
+here not to fire).
+
+    python benchmarks/metrics_cost.py [--runs 300]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from common import load_app, seed
+from app.models import database, writer
+from app.models.database import get_db_connection
+
+PAGES = ['/profile', '/jobs?category=Agriculture', '/marketplace', '/login']
+SETTINGS = [('off', {'METRICS_ENABLED': False}), ('on', {}), ('on, all sampled', {'METRICS_SAMPLE_RATE': 1.0})]
+
+def median_ms(client, page, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        client.get(page).close()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        columns = {}
+        for name, config in SETTINGS:
+            # Each app opens its own pool and writer, with or without the instrumented connection
+            database._pool = writer._writer = None
+            app = load_app(db_path, PAGE_CACHE_ENABLED=False, METRICS_SLOW_MS=60000, **config)
+            if not columns:
+                conn = get_db_connection(db_path)
+                seed(conn)
+                conn.close()
+            client = app.test_client()
+            client.post('/register', data={'username': 'benchuser', 'password': 'benchpass', 'fullname': 'Bench',
+                                           'village': 'Rampur', 'contact': '9999999999'})
+            client.post('/login', data={'username': 'benchuser', 'password': 'benchpass'})
+            columns[name] = [median_ms(client, page, args.runs) for page in PAGES]
+
+        print(f"Median ms per request, {args.runs} runs")
+        print(f"{'page':<30}" + ''.join(f'{name:>18}' for name in columns))
+        for i, page in enumerate(PAGES):
+            print(f"{page:<30}" + ''.join(f'{times[i]:>18.3f}' for times in columns.values()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Requests per second for the public pages with the page cache off and on.
+
+Drives the Flask test client as an anonymous visitor against a scratch
+database seeded with synthetic listings.
+
+    python benchmarks/page_cache_rps.py [--rows 1000] [--requests 300]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from common import load_app, seed
+from app.models.database import get_db_connection
+
+ROUTES = ['/jobs', '/jobs?category=Labor', '/marketplace', '/issues', '/schemes', '/schemes/1']
+
+def requests_per_second(client, url, count):
+    client.get(url)  # warm up (and fill the cache when it is on)
+    start = time.perf_counter()
+    for _ in range(count):
+        response = client.get(url)
+        assert response.status_code == 200, (url, response.status_code)
+    return count / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        app = load_app(db_path)
+        conn = get_db_connection(db_path)
+        seed(conn, jobs=args.rows, products=args.rows, issues=args.rows, applications=0)
+        conn.close()
+
+        client = app.test_client()
+        print(f"{'route':<24}{'no cache req/s':>16}{'cached req/s':>14}{'speedup':>9}")
+        for url in ROUTES:
+            app.config['PAGE_CACHE_ENABLED'] = False
+            before = requests_per_second(client, url, args.requests)
+            app.config['PAGE_CACHE_ENABLED'] = True
+            after = requests_per_second(client, url, args.requests)
+            print(f"{url:<24}{before:>16.0f}{after:>14.0f}{after / before:>8.1f}x")
+
+if __name__ == '__main__':
+    main()
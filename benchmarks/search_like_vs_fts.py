@@ -0,0 +1,104 @@
+"""
+Marketplace search: LIKE '%x%' scan versus the FTS5 index.
+
+Seeds a scratch database with synthetic products (English and Hindi
+words), builds the search index through the real migrations, then times
+the old LIKE query and the ranked FTS query for a few search terms.
+
+    python benchmarks/search_like_vs_fts.py [--rows 100000] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.database import get_db_connection
+from app.models.migrations import run_migrations
+from app.models.search import search_page
+
+# Real words placed at different frequency ranks of a Zipf-distributed vocabulary
+WORDS = ['fresh', 'organic', 'rice', 'किसान', 'handmade', 'wheat', 'जैविक', 'basket', 'mango', 'honey',
+         'pickle', 'cotton', 'saree', 'शहद', 'ghee', 'pottery', 'bamboo', 'jaggery', 'turmeric', 'millet']
+VOCABULARY = [WORDS[i // 50] if i % 50 == 0 and i // 50 < len(WORDS) else f'w{i}' for i in range(5000)]
+ZIPF_WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+CATEGORIES = ['Agriculture', 'Handicrafts', 'Food', 'Clothing', 'Other']
+LOCATIONS = ['Rampur', 'Sitapur', 'Barabanki', 'Gonda', 'Bahraich', 'Faizabad']
+TERMS = ['fresh', 'organic rice', 'किसान', 'honey', 'bamb', 'millet', 'nothingmatches']
+
+SCHEMA = '''
+    CREATE TABLE products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        description TEXT,
+        price TEXT NOT NULL,
+        location TEXT,
+        contact TEXT NOT NULL,
+        category TEXT,
+        image TEXT,
+        user_id INTEGER NOT NULL,
+        posted_date TIMESTAMP NOT NULL
+    )
+'''
+COLUMNS = ('id', 'name', 'price', 'posted_date')
+
+def seed(conn, rows):
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    conn.execute(SCHEMA)
+    # The migrations also index jobs, so create an empty table for them
+    conn.execute('CREATE TABLE jobs (id INTEGER PRIMARY KEY, title TEXT, description TEXT, location TEXT, '
+                 'eligibility TEXT, category TEXT, user_id INTEGER, posted_date TIMESTAMP)')
+    conn.execute('CREATE TABLE schemes (id INTEGER PRIMARY KEY, posted_date TIMESTAMP)')
+    conn.execute('CREATE TABLE issues (id INTEGER PRIMARY KEY, user_id INTEGER, reported_date TIMESTAMP)')
+    conn.execute('CREATE TABLE job_applications (id INTEGER PRIMARY KEY, user_id INTEGER, job_id INTEGER, '
+                 'application_date TIMESTAMP)')
+    conn.executemany(
+        'INSERT INTO products (name, description, price, location, contact, category, user_id, posted_date) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        ((' '.join(rng.choices(VOCABULARY, ZIPF_WEIGHTS, k=2)), ' '.join(rng.choices(VOCABULARY, ZIPF_WEIGHTS, k=25)),
+          str(rng.randint(10, 999)),
+          rng.choice(LOCATIONS), '9999999999', rng.choice(CATEGORIES), 1, start + timedelta(minutes=i))
+         for i in range(rows)))
+    conn.commit()
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = get_db_connection(os.path.join(tmp, 'bench.db'))
+        seed(conn, args.rows)
+        start = time.perf_counter()
+        run_migrations(conn)
+        print(f"Seeded {args.rows} products; migrations + index build took {time.perf_counter() - start:.1f}s")
+
+        print(f"{'term':<16}{'matches':>9}{'LIKE ms':>10}{'FTS ms':>10}{'FTS+cat ms':>12}{'speedup':>10}")
+        for term in TERMS:
+            matches = conn.execute('SELECT COUNT(*) FROM products WHERE name LIKE ? OR description LIKE ?',
+                                   (f'%{term}%', f'%{term}%')).fetchone()[0]
+            like_ms, _ = timed(lambda: conn.execute(
+                'SELECT id, name, price, posted_date FROM products WHERE (name LIKE ? OR description LIKE ?) '
+                'ORDER BY posted_date DESC LIMIT 20', (f'%{term}%', f'%{term}%')).fetchall(), args.repeat)
+            fts_ms, _ = timed(lambda: search_page(conn, 'products', COLUMNS, term), args.repeat)
+            cat_ms, _ = timed(lambda: search_page(conn, 'products', COLUMNS, term, 'category = ?', ('Food',)),
+                              args.repeat)
+            print(f"{term:<16}{matches:>9}{like_ms:>10.2f}{fts_ms:>10.2f}{cat_ms:>12.2f}{like_ms / fts_ms:>9.1f}x")
+        conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Throughput and latency of the Werkzeug dev server (as `python app.py` runs
+it, with the debugger) against gunicorn with gunicorn.conf.py.
+
+Seeds a scratch database, starts each server on a local port and drives it
+with keep-alive HTTP clients spread over several processes, each request a
+GET of one of the public pages with Accept-Encoding: gzip. Reports
+requests per second, latency percentiles and errors for each concurrency.
+
+    python benchmarks/server_load.py [--duration 10] [--concurrency 1,8,32] [--workers 3] [--threads 4]
+"""
+import argparse
+import http.client
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from common import ROOT, seed, wait_ready, percentile
+from app.models.database import get_db_connection
+
+PAGES = ['/', '/jobs', '/marketplace', '/issues', '/schemes', '/jobs?page=2', '/jobs/{job}', '/jobs?search=harvest']
+DEV_SERVER = ("import wsgi; wsgi.app.run(host='127.0.0.1', port={port}, debug=True, use_reloader=False)")
+
+def client(port, threads, duration, jobs):
+    """Run `threads` keep-alive clients for `duration` seconds; returns (latencies, errors)"""
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+
+    def run(seed):
+        rng = random.Random(seed)
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        while time.perf_counter() < deadline:
+            path = rng.choice(PAGES).format(job=rng.randrange(1, jobs + 1))
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path, headers={'Accept-Encoding': 'gzip'})
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors.append(response.status)
+                latencies.append(time.perf_counter() - start)
+            except (OSError, http.client.HTTPException) as e:
+                # A recycled worker (max_requests) closes idle keep-alive connections; browsers retry those
+                if not isinstance(e, http.client.RemoteDisconnected):
+                    errors.append(type(e).__name__)
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        conn.close()
+
+    pool = [threading.Thread(target=run, args=(os.getpid() * 1000 + i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return latencies, errors
+
+def load(port, concurrency, duration, jobs, processes):
+    processes = min(processes, concurrency)
+    shares = [concurrency // processes + (1 if i < concurrency % processes else 0) for i in range(processes)]
+    started = time.perf_counter()
+    with ProcessPoolExecutor(processes) as executor:
+        results = list(executor.map(client, [port] * processes, shares, [duration] * processes, [jobs] * processes))
+    elapsed = time.perf_counter() - started
+    latencies = sorted(l for result in results for l in result[0])
+    errors = [e for result in results for e in result[1]]
+    return len(latencies) / min(elapsed, duration + 1), latencies, errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--concurrency', default='1,8,32')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() * 2 + 1)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=max(2, os.cpu_count()), help='client processes')
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--port', type=int, default=18080)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, GRAMEENCONNECT_DB=os.path.join(tmp, 'bench.db'),
+                   GRAMEENCONNECT_PAGE_CACHE_DIR=os.path.join(tmp, 'page-cache'),
+                   GRAMEENCONNECT_WORKERS=str(args.workers), GRAMEENCONNECT_THREADS=str(args.threads),
+                   GRAMEENCONNECT_BIND=f'127.0.0.1:{args.port}')
+        subprocess.run([sys.executable, '-m', 'app.models.database'], cwd=ROOT, env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+        conn = get_db_connection(env['GRAMEENCONNECT_DB'])
+        seed(conn, jobs=args.rows, products=args.rows, issues=args.rows, applications=args.rows)
+        conn.close()
+
+        servers = {
+            'dev server': [sys.executable, '-c', DEV_SERVER.format(port=args.port)],
+            f'gunicorn {args.workers}x{args.threads}': [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                                                        '--access-logfile', '/dev/null', 'wsgi:app'],
+        }
+        print(f"{os.cpu_count()} CPUs, {args.duration:.0f}s per run, {args.clients} client processes")
+        print(f"{'server':<18}{'clients':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+        for name, command in servers.items():
+            process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_ready(args.port, process)
+                load(args.port, 4, 1, args.rows, args.clients)  # warm caches and connections
+                for concurrency in [int(c) for c in args.concurrency.split(',')]:
+                    rate, latencies, errors = load(args.port, concurrency, args.duration, args.rows, args.clients)
+                    print(f"{name:<18}{concurrency:>8}{rate:>9.0f}{percentile(latencies, 0.5):>9.1f}"
+                          f"{percentile(latencies, 0.95):>9.1f}{percentile(latencies, 0.99):>9.1f}{len(errors):>8}"
+                          + (f"  {', '.join(sorted({str(e) for e in errors}))}" if errors else ''))
+            finally:
+                process.terminate()
+                process.wait(timeout=60)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Import and cold-start time of the app, each run in a fresh interpreter as
+a new gunicorn worker would pay it.
+
+For every run, times creating the app (importing app.py, which creates it)
+and then serving the first request for / through the test client, counts
+the lines printed meanwhile and the files written under the uploads
+folder. The database is a scratch copy of grameenconnect.db set up once
+beforehand. Pass --root with another checkout (a git worktree of an older
+commit, say) to compare.
+
+    python benchmarks/startup_time.py [--runs 10] [--root .]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from common import ROOT
+
+RUN = r'''
+import contextlib, importlib.util, io, json, os, sys, time
+uploads = os.path.join('app', 'static', 'images', 'uploads')
+before = {e.name: e.stat().st_mtime_ns for e in os.scandir(uploads)} if os.path.isdir(uploads) else {}
+out = io.StringIO()
+start = time.perf_counter()
+with contextlib.redirect_stdout(out):
+    sys.path.insert(0, os.getcwd())
+    spec = importlib.util.spec_from_file_location('grameenconnect_main', 'app.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    created = time.perf_counter()
+    status = module.app.test_client().get('/').status_code
+    served = time.perf_counter()
+after = {e.name: e.stat().st_mtime_ns for e in os.scandir(uploads)} if os.path.isdir(uploads) else {}
+print(json.dumps({'create_ms': (created - start) * 1000, 'first_ms': (served - created) * 1000, 'status': status,
+                  'lines': len(out.getvalue().splitlines()),
+                  'files': sum(1 for name, mtime in after.items() if before.get(name) != mtime)}))
+'''
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--root', default=ROOT, help='checkout to measure')
+    args = parser.parse_args()
+    root = os.path.abspath(args.root)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        shutil.copy(os.path.join(ROOT, 'grameenconnect.db'), db_path)
+        env = dict(os.environ, GRAMEENCONNECT_DB=db_path)
+        if os.path.exists(os.path.join(root, 'app', 'models', 'database.py')):
+            subprocess.run([sys.executable, '-m', 'app.models.database'], cwd=root, env=env,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        results = []
+        for _ in range(args.runs):
+            done = subprocess.run([sys.executable, '-c', RUN], cwd=root, env=env, check=True,
+                                  capture_output=True, text=True)
+            results.append(json.loads(done.stdout.strip().splitlines()[-1]))
+
+        print(f"{root}: {args.runs} runs")
+        for key, label in (('create_ms', 'import + create app (ms)'), ('first_ms', 'first request to / (ms)')):
+            values = [r[key] for r in results]
+            print(f"  {label:<28} median {statistics.median(values):7.1f}  min {min(values):7.1f}")
+        print(f"  {'cold start total (ms)':<28} median "
+              f"{statistics.median(r['create_ms'] + r['first_ms'] for r in results):7.1f}")
+        print(f"  first response status {results[0]['status']}, lines printed {results[0]['lines']}, "
+              f"upload files written {results[0]['files']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,426 @@
+"""
+Latency and throughput of every route, as JSON to compare between commits.
+
+Seeds a database with synthetic users, jobs, products, issues and
+applications at each --scale (1k, 100k or 1M rows per table), keeping it
+under .bench-data/ for later runs, and gives a bench user 50 rows of each
+so /profile and /my-applications have something to show. Every route is
+then driven through the Flask test client, one request at a time, and
+through gunicorn (gunicorn.conf.py) with --concurrency keep-alive clients
+spread over several processes. Writes and uploads (new listings with a
+photo, applications, profile edits, registrations) are included; uploads
+go to a scratch folder. Logged-in requests all send the session cookie the
+bench user got at login, so flashed messages don't pile up.
+
+For each scale, mode and route the results hold requests, req/s, p50,
+p95, p99 and errors (4xx/5xx). They are written to
+bench-results/<commit>.json unless --out says otherwise; --compare with an
+earlier file lists routes whose p50 or p95 grew by more than --threshold
+and exits with status 1 if there are any.
+
+    python benchmarks/suite.py [--scale 1k] [--mode client,server] [--requests 200]
+                               [--duration 3] [--concurrency 8] [--compare bench-results/abc1234.json]
+"""
+import argparse
+import http.client
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from urllib.parse import urlencode
+
+from common import ROOT, load_app, seed, wait_ready, percentile
+from PIL import Image
+from app.models.database import get_db_connection
+from app.models.migrations import MIGRATIONS
+
+SCALES = {'1k': 1000, '100k': 100_000, '1M': 1_000_000}
+DATA_DIR = os.path.join(ROOT, '.bench-data')
+RESULTS_DIR = os.path.join(ROOT, 'bench-results')
+USERNAME, PASSWORD = 'suite_user', 'suite_password'
+OWNED_ROWS = 50
+
+JOB_FORM = {'title': 'Harvest helper {n}', 'description': 'Help with the wheat harvest.', 'location': 'Rampur',
+            'contact': '9999999999', 'category': 'Agriculture', 'eligibility': 'Anyone above 18',
+            'salary': '300/day', 'deadline': '2025-12-31'}
+ISSUE_FORM = {'title': 'Broken hand pump {n}', 'description': 'The pump near the school is broken.',
+              'location': 'Rampur', 'category': 'Water'}
+PRODUCT_FORM = {'name': 'Organic wheat {n}', 'description': 'Fresh from the farm.', 'price': '40',
+                'location': 'Rampur', 'contact': '9999999999', 'category': 'Food'}
+APPLY_FORM = {'name': 'Suite User', 'phone': '9999999999', 'experience': '2 years', 'message': 'Interested'}
+PROFILE_FORM = {'fullname': 'Suite User', 'village': 'Rampur', 'contact': '9999999999'}
+REGISTER_FORM = {'username': 'suite_{n}', 'password': 'password1', 'fullname': 'New User', 'village': 'Rampur',
+                 'contact': '9999999999'}
+
+# name: (method, path, form, file field, logged in)
+ROUTES = {
+    'index': ('GET', '/', None, None, False),
+    'stats': ('GET', '/stats', None, None, False),
+    'jobs': ('GET', '/jobs', None, None, False),
+    'jobs_category': ('GET', '/jobs?category=Agriculture', None, None, False),
+    'jobs_search': ('GET', '/jobs?search=harvest', None, None, False),
+    'jobs_near': ('GET', '/jobs?near=Lucknow&radius=100', None, None, False),
+    'job_details': ('GET', '/jobs/{job}', None, None, False),
+    'schemes': ('GET', '/schemes', None, None, False),
+    'scheme_details': ('GET', '/schemes/{scheme}', None, None, False),
+    'issues': ('GET', '/issues', None, None, False),
+    'issues_near': ('GET', '/issues?near=Barabanki&radius=25', None, None, False),
+    'marketplace': ('GET', '/marketplace', None, None, False),
+    'marketplace_category': ('GET', '/marketplace?category=Food', None, None, False),
+    'marketplace_search': ('GET', '/marketplace?search=organic', None, None, False),
+    'marketplace_near': ('GET', '/marketplace?near=Lucknow&radius=100&category=Food', None, None, False),
+    'register_form': ('GET', '/register', None, None, False),
+    'register': ('POST', '/register', REGISTER_FORM, None, False),
+    'login_form': ('GET', '/login', None, None, False),
+    'login': ('POST', '/login', {'username': USERNAME, 'password': PASSWORD}, None, False),
+    'language': ('GET', '/language/hi?next=/jobs', None, None, False),
+    'healthz': ('GET', '/healthz', None, None, False),
+    'readyz': ('GET', '/readyz', None, None, False),
+    'debug_db_pool': ('GET', '/debug/db-pool', None, None, False),
+    'metrics': ('GET', '/metrics', None, None, False),
+    'profile': ('GET', '/profile', None, None, True),
+    'jobs_near_me': ('GET', '/jobs?radius=25', None, None, True),
+    'profile_jobs': ('GET', '/profile/jobs', None, None, True),
+    'profile_applications': ('GET', '/profile/applications', None, None, True),
+    'edit_profile_form': ('GET', '/edit_profile', None, None, True),
+    'edit_profile': ('POST', '/edit_profile', PROFILE_FORM, 'profile_image', True),
+    'settings': ('GET', '/settings', None, None, True),
+    'my_applications': ('GET', '/my-applications', None, None, True),
+    'new_job_form': ('GET', '/jobs/new', None, None, True),
+    'new_job': ('POST', '/jobs/new', JOB_FORM, None, True),
+    'report_issue_form': ('GET', '/issues/report', None, None, True),
+    'report_issue': ('POST', '/issues/report', ISSUE_FORM, 'image', True),
+    'new_product_form': ('GET', '/marketplace/new', None, None, True),
+    'new_product': ('POST', '/marketplace/new', PRODUCT_FORM, 'image', True),
+    'apply_form': ('GET', '/jobs/{job}/apply', None, None, True),
+    'apply_for_job': ('POST', '/jobs/{job}/apply', APPLY_FORM, None, True),
+    'direct_upload_form': ('GET', '/direct-upload', None, None, True),
+    'direct_upload': ('POST', '/direct-upload', None, 'file', True),
+    'logout': ('GET', '/logout', None, None, True),
+}
+
+def photo(width=800, height=600):
+    """A noisy JPEG roughly the size of a phone photo after the browser has resized it"""
+    buffer = io.BytesIO()
+    Image.effect_noise((width, height), 64).convert('RGB').save(buffer, 'JPEG', quality=85)
+    return buffer.getvalue()
+
+def build(name, rng, n, ids, image):
+    """(method, path, body, headers) for one request to route `name`; `n` makes names and uploads unique"""
+    method, path, form, field, _ = ROUTES[name]
+    path = path.format(job=rng.choice(ids['jobs']), scheme=rng.choice(ids['schemes']))
+    if method == 'GET':
+        return method, path, None, {}
+    form = {key: value.format(n=n) for key, value in (form or {}).items()}
+    if field is None:
+        return method, path, urlencode(form).encode(), {'Content-Type': 'application/x-www-form-urlencoded'}
+    # Bytes after the JPEG's end marker give every upload its own content hash, so none is deduplicated
+    boundary = f'suite{n}'
+    parts = [f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n{value}\r\n'.encode()
+             for key, value in form.items()]
+    parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="photo{n}.jpg"\r\n'
+                 f'Content-Type: image/jpeg\r\n\r\n'.encode() + image + str(n).encode() + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return method, path, b''.join(parts), {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+
+def summarize(latencies, elapsed, errors):
+    ordered = sorted(latencies)
+    return {'requests': len(ordered), 'rps': round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+            'p50_ms': round(percentile(ordered, 0.5), 3), 'p95_ms': round(percentile(ordered, 0.95), 3),
+            'p99_ms': round(percentile(ordered, 0.99), 3), 'errors': errors}
+
+def prepare(scale):
+    """Path of the seeded database for `scale`, creating it on the first run"""
+    rows = SCALES[scale]
+    version = max(number for number, _, _ in MIGRATIONS)
+    path = os.path.join(DATA_DIR, f'{scale}-v{version}.db')
+    if os.path.exists(path):
+        return path
+    os.makedirs(DATA_DIR, exist_ok=True)
+    partial = path + '.partial'
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(partial + suffix):
+            os.remove(partial + suffix)
+    print(f"Seeding {rows} rows per table into {path} (done once)", flush=True)
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        app = load_app(partial, PAGE_CACHE_ENABLED=False, UPLOAD_FOLDER=os.path.join(tmp, 'uploads'),
+                       UPLOAD_SPOOL_FOLDER=os.path.join(tmp, 'spool'))
+        conn = get_db_connection(partial)
+        seed(conn, users=rows, jobs=rows, products=rows, issues=rows, applications=rows)
+        # Registered through the app, so the password is stored however the app stores them
+        app.test_client().post('/register', data={'username': USERNAME, 'password': PASSWORD,
+                                                  'fullname': 'Suite User', 'village': 'Rampur',
+                                                  'contact': '9999999999'})
+        user_id = conn.execute('SELECT id FROM users WHERE username = ?', (USERNAME,)).fetchone()[0]
+        for table in ('jobs', 'products', 'issues'):
+            conn.execute(f'UPDATE {table} SET user_id = ? WHERE id IN (SELECT id FROM {table} ORDER BY id LIMIT ?)',
+                         (user_id, OWNED_ROWS))
+        # One application per job, as the unique (user_id, job_id) index requires
+        conn.execute('UPDATE job_applications SET user_id = ? WHERE id IN '
+                     '(SELECT MIN(id) FROM job_applications GROUP BY job_id ORDER BY 1 LIMIT ?)', (user_id, OWNED_ROWS))
+        conn.commit()
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        conn.close()
+    os.replace(partial, path)
+    for suffix in ('-wal', '-shm'):
+        # Left by the app's connections; the WAL was checkpointed into the file above
+        if os.path.exists(partial + suffix):
+            os.remove(partial + suffix)
+    print(f"Seeded in {time.perf_counter() - started:.0f}s", flush=True)
+    return path
+
+def sample_ids(db_path):
+    conn = get_db_connection(db_path)
+    try:
+        return {'jobs': [row[0] for row in conn.execute('SELECT id FROM jobs ORDER BY random() LIMIT 1000')],
+                'schemes': [row[0] for row in conn.execute('SELECT id FROM schemes')]}
+    finally:
+        conn.close()
+
+def drain(db_path, timeout=600):
+    """Wait until the background tasks uploads queued have run; returns the seconds waited"""
+    started = time.perf_counter()
+    conn = get_db_connection(db_path)
+    try:
+        while time.perf_counter() - started < timeout:
+            if not conn.execute("SELECT COUNT(*) FROM tasks WHERE status IN ('queued', 'running')").fetchone()[0]:
+                break
+            time.sleep(0.1)
+    finally:
+        conn.close()
+    return round(time.perf_counter() - started, 2)
+
+def session_cookie(response_headers):
+    """The 'name=value' pairs of the cookies a response sets"""
+    return '; '.join(header.split(';', 1)[0] for header in response_headers)
+
+def run_client(db_path, tmp, routes, count, image):
+    """Each route `count` times in a row through the test client"""
+    app = load_app(db_path, UPLOAD_FOLDER=os.path.join(tmp, 'uploads'),
+                   UPLOAD_SPOOL_FOLDER=os.path.join(tmp, 'spool'), DEBUG_STATS_ENABLED=True)
+    client = app.test_client(use_cookies=False)
+    login = client.post('/login', data={'username': USERNAME, 'password': PASSWORD})
+    cookie = session_cookie(login.headers.getlist('Set-Cookie'))
+    ids = sample_ids(db_path)
+    rng = random.Random(1)
+    results = {}
+    for name in routes:
+        def send(n):
+            method, path, body, headers = build(name, rng, f'c{n}', ids, image)
+            if ROUTES[name][4]:
+                headers['Cookie'] = cookie
+            start = time.perf_counter()
+            response = client.open(path, method=method, data=body, headers=headers)
+            response.get_data()
+            response.close()
+            return time.perf_counter() - start, response.status_code
+
+        for n in range(min(5, count)):
+            send(f'w{n}')  # warm the page cache, statement cache and connections
+        latencies, errors = [], 0
+        started = time.perf_counter()
+        for n in range(count):
+            seconds, status = send(n)
+            latencies.append(seconds)
+            errors += status >= 400
+        results[name] = summarize(latencies, time.perf_counter() - started, errors)
+        if ROUTES[name][3]:
+            # Image variants are made in the background; let them finish before timing the next route
+            results[name]['tasks_drain_s'] = drain(db_path)
+        print(f"  client {name:<22} {results[name]['p50_ms']:8.2f} ms p50 {results[name]['rps']:8.1f} req/s",
+              flush=True)
+    return results
+
+def http_clients(port, name, threads, duration, ids, cookie, image):
+    """Run `threads` keep-alive clients on one route for `duration` seconds; returns (latencies, errors)"""
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+
+    def run(index):
+        rng = random.Random(os.getpid() * 1000 + index)
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        n = 0
+        while time.perf_counter() < deadline:
+            n += 1
+            method, path, body, headers = build(name, rng, f's{os.getpid()}_{index}_{n}', ids, image)
+            if ROUTES[name][4]:
+                headers['Cookie'] = cookie
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    errors.append(response.status)
+                latencies.append(time.perf_counter() - start)
+            except (OSError, http.client.HTTPException) as e:
+                # A recycled worker (max_requests) closes idle keep-alive connections; browsers retry those
+                if not isinstance(e, http.client.RemoteDisconnected):
+                    errors.append(type(e).__name__)
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        conn.close()
+
+    pool = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return latencies, errors
+
+def run_server(db_path, tmp, routes, args, image):
+    """Each route for --duration seconds under --concurrency clients against gunicorn"""
+    env = dict(os.environ, GRAMEENCONNECT_DB=db_path,
+               GRAMEENCONNECT_PAGE_CACHE_DIR=os.path.join(tmp, 'page-cache'),
+               GRAMEENCONNECT_METRICS_DIR=os.path.join(tmp, 'metrics'),
+               GRAMEENCONNECT_WORKERS=str(args.workers), GRAMEENCONNECT_THREADS=str(args.threads),
+               GRAMEENCONNECT_BIND=f'127.0.0.1:{args.port}')
+    config = {'UPLOAD_FOLDER': os.path.join(tmp, 'uploads'), 'UPLOAD_SPOOL_FOLDER': os.path.join(tmp, 'spool'),
+              'DEBUG_STATS_ENABLED': True}
+    command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--access-logfile', '/dev/null',
+               f'app:create_app({config!r})']
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    results = {}
+    try:
+        wait_ready(args.port, process)
+        conn = http.client.HTTPConnection('127.0.0.1', args.port, timeout=60)
+        conn.request('POST', '/login', body=urlencode({'username': USERNAME, 'password': PASSWORD}),
+                     headers={'Content-Type': 'application/x-www-form-urlencoded'})
+        response = conn.getresponse()
+        response.read()
+        cookie = session_cookie(response.headers.get_all('Set-Cookie') or [])
+        conn.close()
+        ids = sample_ids(db_path)
+        processes = min(args.clients, args.concurrency)
+        shares = [args.concurrency // processes + (1 if i < args.concurrency % processes else 0)
+                  for i in range(processes)]
+        with ProcessPoolExecutor(processes) as executor:
+            for name in routes:
+                def load(duration):
+                    started = time.perf_counter()
+                    done = list(executor.map(http_clients, [args.port] * processes, [name] * processes, shares,
+                                             [duration] * processes, [ids] * processes, [cookie] * processes,
+                                             [image] * processes))
+                    elapsed = min(time.perf_counter() - started, duration)
+                    return ([l for result in done for l in result[0]],
+                            [e for result in done for e in result[1]], elapsed)
+
+                load(min(1.0, args.duration))  # warm up
+                latencies, errors, elapsed = load(args.duration)
+                results[name] = summarize(latencies, elapsed, len(errors))
+                if ROUTES[name][3]:
+                    results[name]['tasks_drain_s'] = drain(db_path)
+                print(f"  server {name:<22} {results[name]['p50_ms']:8.2f} ms p50 {results[name]['rps']:8.1f} req/s"
+                      + (f"  errors: {', '.join(sorted({str(e) for e in errors}))}" if errors else ''), flush=True)
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+    return results
+
+def in_subprocess(fn, *args):
+    # The app's pool, writer and caches are per process; a fresh one keeps each database's apart
+    with ProcessPoolExecutor(1) as executor:
+        return executor.submit(fn, *args).result()
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def compare(old, new, threshold):
+    """Print routes whose p50 or p95 changed by more than `threshold`; returns the regressions"""
+    regressions = []
+    print(f"\nCompared with {old['commit']} ({old['date']}), threshold {threshold:.0%}")
+    for scale, modes in new['results'].items():
+        for mode, routes in modes.items():
+            before = old['results'].get(scale, {}).get(mode, {})
+            for name, result in routes.items():
+                if name not in before:
+                    continue
+                for key in ('p50_ms', 'p95_ms'):
+                    was, now = before[name][key], result[key]
+                    # Sub-millisecond differences are noise on routes this fast
+                    if was and abs(now - was) > 1 and abs(now - was) / was > threshold:
+                        worse = now > was
+                        print(f"  {'SLOWER' if worse else 'faster'} {scale} {mode} {name} {key}: "
+                              f"{was:.2f} -> {now:.2f} ({(now - was) / was:+.0%})")
+                        if worse:
+                            regressions.append((scale, mode, name, key))
+    if not regressions:
+        print("  no regressions")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', default='1k', help=f"comma-separated, of {', '.join(SCALES)}")
+    parser.add_argument('--mode', default='client,server')
+    parser.add_argument('--routes', help='comma-separated route names (default: all)')
+    parser.add_argument('--requests', type=int, default=200, help='per route through the test client')
+    parser.add_argument('--duration', type=float, default=3, help='seconds per route against the server')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() * 2 + 1)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=max(2, os.cpu_count()), help='client processes')
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--out', help='results file (default bench-results/<commit>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args()
+    scales = args.scale.split(',')
+    modes = args.mode.split(',')
+    routes = args.routes.split(',') if args.routes else list(ROUTES)
+    checks = [(s, SCALES) for s in scales] + [(m, ('client', 'server')) for m in modes] + [(r, ROUTES) for r in routes]
+    for value, known in checks:
+        if value not in known:
+            parser.error(f"unknown {value!r}, expected one of {', '.join(known)}")
+
+    commit = git_commit()
+    report = {'commit': commit, 'date': datetime.now().isoformat(timespec='seconds'),
+              'python': platform.python_version(), 'cpus': os.cpu_count(),
+              'settings': {'requests': args.requests, 'duration': args.duration, 'concurrency': args.concurrency,
+                           'workers': args.workers, 'threads': args.threads, 'clients': args.clients},
+              'results': {}}
+    image = photo()
+    for scale in scales:
+        seeded = in_subprocess(prepare, scale)
+        report['results'][scale] = {}
+        for mode in modes:
+            print(f"{scale} rows, {mode}", flush=True)
+            # A fresh copy per mode, so one mode's writes don't slow the other
+            with tempfile.TemporaryDirectory() as tmp:
+                db_path = os.path.join(tmp, 'bench.db')
+                shutil.copy(seeded, db_path)
+                if mode == 'client':
+                    report['results'][scale][mode] = in_subprocess(run_client, db_path, tmp, routes, args.requests,
+                                                                   image)
+                else:
+                    report['results'][scale][mode] = run_server(db_path, tmp, routes, args, image)
+
+    out = args.out or os.path.join(RESULTS_DIR, f'{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=1, sort_keys=True)
+    print(f"Results written to {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            if compare(json.load(f), report, args.threshold):
+                sys.exit(1)
+
+if __name__ == '__main__':
+    main()
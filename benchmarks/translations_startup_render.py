@@ -0,0 +1,97 @@
+"""
+Translation startup and per-render cost: one big Python dict versus lazily
+loaded, precompiled catalogs.
+
+Startup compares importing every language as a Python dict literal (how
+app/translations.py used to work) with importing the catalog module and
+loading only the default language. Per-render compares building the
+template context the old way (fresh closure each call) with the cached
+context, and renders a small template that calls `_` 50 times.
+
+    python benchmarks/translations_startup_render.py [--languages 10]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import timeit
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from jinja2 import Environment
+from app import translations as catalogs
+
+def old_style_module(path, languages):
+    """Write a module with all languages inlined, padded to `languages` copies"""
+    data = {}
+    for lang in catalogs.available_languages():
+        with open(os.path.join(catalogs.LOCALES_DIR, f'{lang}.json'), encoding='utf-8') as f:
+            data[lang] = json.load(f)
+    base = list(data.values())
+    i = 0
+    while len(data) < languages:
+        data[f'x{i}'] = base[i % len(base)]
+        i += 1
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('translations = ' + repr(data) + '\n')
+
+# Already imported by Flask in the real app, so kept out of the measurement
+PRELOAD = 'import json, re, threading, types'
+
+def time_in_subprocess(code, env=None, runs=5):
+    """Best wall time in ms of running `code` in a fresh interpreter (no bytecode cache)"""
+    timer = (PRELOAD + '; import time; _t = time.perf_counter(); ' + code +
+             '; print((time.perf_counter() - _t) * 1000)')
+    best = float('inf')
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-B', '-c', timer], capture_output=True, text=True,
+                             cwd=ROOT, env=env, check=True).stdout
+        best = min(best, float(out.strip().splitlines()[-1]))
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--languages', type=int, default=10, help='languages to simulate for startup')
+    parser.add_argument('--number', type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old_style_module(os.path.join(tmp, 'old_translations.py'), args.languages)
+        env = dict(os.environ, PYTHONPATH=tmp)
+        old_ms = time_in_subprocess('import old_translations', env)
+    new_ms = time_in_subprocess("import app.translations as t; t.get_template_context('en')")
+    print(f"Startup with {args.languages} languages")
+    print(f"  old: import all as dict literal   {old_ms:8.2f} ms")
+    print(f"  new: import + load default only   {new_ms:8.2f} ms")
+
+    table = {lang: dict(catalogs.get_catalog(lang)) for lang in catalogs.available_languages()}
+
+    def old_context(lang='hi'):
+        translations_dict = table.get(lang, table['en'])
+
+        def translate(key):
+            return translations_dict.get(key, key)
+        return {'t': translations_dict, '_': translate}
+
+    def new_context(lang='hi'):
+        return catalogs.get_template_context(lang)
+
+    n = args.number
+    old_us = timeit.timeit(old_context, number=n) / n * 1e6
+    new_us = timeit.timeit(new_context, number=n) / n * 1e6
+    print("Context processor per render")
+    print(f"  old: {old_us:6.3f} us    new: {new_us:6.3f} us")
+
+    keys = list(table['en'])[:50]
+    template = Environment().from_string(''.join("{{ _('%s') }}" % key for key in keys))
+    renders = n // 20
+    old_render = timeit.timeit(lambda: template.render(**old_context()), number=renders) / renders * 1e6
+    new_render = timeit.timeit(lambda: template.render(**new_context()), number=renders) / renders * 1e6
+    print("Template with 50 `_` calls")
+    print(f"  old: {old_render:6.1f} us    new: {new_render:6.1f} us")
+
+if __name__ == '__main__':
+    main()
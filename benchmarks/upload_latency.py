@@ -0,0 +1,85 @@
+"""
+Upload request latency with image processing in the request versus queued
+to the background task pool.
+
+Posts product listings with a camera-sized JPEG through the Flask test
+client. "inline" is the request time plus the variant processing the
+request used to do itself; "queued" is the request time as it is now, and
+the task pool's own wait/run latencies are reported after the queue drains.
+
+    python benchmarks/upload_latency.py [--uploads 20] [--size 3000x2000]
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+
+from common import load_app
+from PIL import Image
+from app import images
+from app.tasks import get_task_pool
+
+def camera_jpeg(width, height):
+    """A noisy JPEG roughly the size of a phone photo"""
+    image = Image.effect_noise((width, height), 64).convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=92)
+    return buffer.getvalue()
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--uploads', type=int, default=20)
+    parser.add_argument('--size', default='3000x2000')
+    args = parser.parse_args()
+    width, height = (int(n) for n in args.size.split('x'))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = load_app(os.path.join(tmp, 'bench.db'))
+        app.config['UPLOAD_FOLDER'] = os.path.join(tmp, 'uploads')
+        app.config['UPLOAD_SPOOL_FOLDER'] = os.path.join(tmp, 'spool')
+        client = app.test_client()
+        client.post('/register', data={'username': 'benchuser', 'password': 'benchpass', 'confirm_password': 'benchpass',
+                                       'fullname': 'Bench', 'village': 'Rampur', 'contact': '9999999999'})
+        client.post('/login', data={'username': 'benchuser', 'password': 'benchpass'})
+
+        photo = camera_jpeg(width, height)
+        print(f"{args.uploads} uploads of a {width}x{height} JPEG ({len(photo) // 1024} KB)")
+
+        processing = []
+        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+        for i in range(min(5, args.uploads)):
+            start = time.perf_counter()
+            images.make_variants(photo, app.config['UPLOAD_FOLDER'], f'inline_{i}')
+            processing.append(time.perf_counter() - start)
+
+        request_times = []
+        for i in range(args.uploads):
+            data = {'name': f'Product {i}', 'description': 'Fresh', 'price': '10', 'location': 'Rampur',
+                    'contact': '9999999999', 'category': 'Food', 'image': (io.BytesIO(photo), f'photo_{i}.jpg')}
+            start = time.perf_counter()
+            response = client.post('/marketplace/new', data=data, content_type='multipart/form-data')
+            request_times.append(time.perf_counter() - start)
+            assert response.status_code == 302, response.status_code
+
+        start = time.perf_counter()
+        with app.app_context():
+            pool = get_task_pool()
+        assert pool.wait_idle(timeout=600)
+        drain = time.perf_counter() - start
+
+        inline = [t + percentile(processing, 0.5) for t in request_times]
+        print(f"{'':<10}{'p50 ms':>10}{'p95 ms':>10}")
+        print(f"{'inline':<10}{percentile(inline, 0.5) * 1000:>10.1f}{percentile(inline, 0.95) * 1000:>10.1f}")
+        print(f"{'queued':<10}{percentile(request_times, 0.5) * 1000:>10.1f}{percentile(request_times, 0.95) * 1000:>10.1f}")
+        print(f"Queue drained {drain:.2f}s after the last request")
+        stats = pool.stats()
+        print(f"Tasks: {stats['done']} done, {stats['failed']} failed; wait p50/p95 {stats['wait_ms_p50']}/"
+              f"{stats['wait_ms_p95']} ms, run p50/p95 {stats['run_ms_p50']}/{stats['run_ms_p95']} ms")
+
+if __name__ == '__main__':
+    main()
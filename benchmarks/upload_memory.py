@@ -0,0 +1,147 @@
+"""
+Peak server memory under parallel large uploads: reading each upload into
+memory (how edit_profile and direct_upload used to save files) versus the
+streaming upload handler.
+
+Starts the app on a real threaded Werkzeug server in a child process for
+each mode, sends --parallel concurrent uploads of --size MB for --rounds
+rounds, and reports the growth of the server's peak RSS (VmHWM) over its
+RSS before the uploads. Background image processing is switched off so
+only the request path is measured.
+
+    python benchmarks/upload_memory.py [--parallel 8] [--rounds 3] [--size 15]
+"""
+import argparse
+import http.client
+import io
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+BOUNDARY = 'benchmarkboundary7MA4YWxkTrZu0gW'
+
+def serve(mode, port, tmp):
+    """Child process: run the app with a route for the old buffered behaviour"""
+    from common import load_app
+    from flask import request
+
+    app = load_app(os.path.join(tmp, 'bench.db'))
+    app.config.update(UPLOAD_FOLDER=os.path.join(tmp, 'uploads'), UPLOAD_SPOOL_FOLDER=os.path.join(tmp, 'spool'),
+                      TASK_WORKERS=0)
+
+    @app.route('/bench/buffered-upload', methods=['POST'])
+    def buffered_upload():
+        file = request.files['file']
+        # What the old upload blocks did: the whole file in memory, then written out
+        file_data = file.read()
+        path = os.path.join(tmp, f'buffered_{threading.get_ident()}')
+        with open(path, 'wb') as f:
+            f.write(file_data)
+        return 'ok'
+
+    from werkzeug.serving import run_simple
+    run_simple('127.0.0.1', port, app, threaded=True)
+
+def rss_kb(pid, field):
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+def png_payload(size):
+    """A valid PNG header followed by random bytes, so it passes type sniffing"""
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64)).save(buffer, 'PNG')
+    return buffer.getvalue() + os.urandom(size - buffer.tell())
+
+def multipart(payload):
+    head = (f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="upload.png"\r\n'
+            'Content-Type: image/png\r\n\r\n').encode()
+    return head + payload + f'\r\n--{BOUNDARY}--\r\n'.encode()
+
+def request(port, method, path, body=b'', headers=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    conn.request(method, path, body=body, headers=headers or {})
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    return response
+
+def login(port):
+    form = {'username': 'benchuser', 'password': 'benchpass', 'confirm_password': 'benchpass',
+            'fullname': 'Bench', 'village': 'Rampur', 'contact': '9999999999'}
+    headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+    request(port, 'POST', '/register', urllib.parse.urlencode(form), headers)
+    response = request(port, 'POST', '/login', urllib.parse.urlencode(form), headers)
+    return response.getheader('Set-Cookie').split(';', 1)[0]
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def run_mode(mode, args):
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        server = subprocess.Popen([sys.executable, __file__, '--serve', mode, '--port', str(port), '--tmp', tmp],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            for _ in range(100):
+                try:
+                    request(port, 'GET', '/')
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            cookie = login(port)
+            path = '/bench/buffered-upload' if mode == 'buffered' else '/direct-upload'
+            headers = {'Content-Type': f'multipart/form-data; boundary={BOUNDARY}', 'Cookie': cookie}
+            size = int(args.size * 1024 * 1024)
+            bodies = [multipart(png_payload(size)) for _ in range(args.parallel)]
+            baseline = rss_kb(server.pid, 'VmRSS')
+
+            statuses = []
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                threads = [threading.Thread(target=lambda b=body: statuses.append(
+                    request(port, 'POST', path, b, headers).status)) for body in bodies]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            elapsed = time.perf_counter() - start
+            peak = rss_kb(server.pid, 'VmHWM')
+            ok = sum(1 for status in statuses if status == 200)
+            return baseline, peak, ok, len(statuses), elapsed
+        finally:
+            server.terminate()
+            server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--parallel', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--size', type=float, default=15, help='upload size in MB (MAX_CONTENT_LENGTH is 16)')
+    parser.add_argument('--serve', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--tmp', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.serve, args.port, args.tmp)
+        return
+
+    print(f"{args.parallel} parallel uploads of {args.size:g} MB, {args.rounds} rounds")
+    print(f"{'mode':<11}{'base MB':>9}{'peak MB':>9}{'growth MB':>11}{'ok':>7}{'seconds':>9}")
+    for mode in ('buffered', 'streaming'):
+        baseline, peak, ok, total, elapsed = run_mode(mode, args)
+        print(f"{mode:<11}{baseline / 1024:>9.1f}{peak / 1024:>9.1f}{(peak - baseline) / 1024:>11.1f}"
+              f"{ok:>4}/{total:<3}{elapsed:>8.2f}")
+
+if __name__ == '__main__':
+    main()
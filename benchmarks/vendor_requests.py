@@ -0,0 +1,100 @@
+"""
+Third-party requests and vendor bytes per page: Bootstrap, Font Awesome
+and Poppins from their CDNs versus the trimmed self-hosted copies.
+
+For each page, counts the requests and distinct origins (each one a DNS
+lookup and TLS handshake on a cold connection) that go to other hosts.
+Self-hosted vendor files are fetched through the app with Accept-Encoding:
+br, gzip, including the fonts their stylesheets load. CDN bytes are taken
+from the upstream files in .vendor-cache/ (gzip-compressed, as the CDNs
+send them); "+?" marks a page that also loads files not fetched there.
+
+    python benchmarks/vendor_requests.py [--cache .vendor-cache]
+"""
+import argparse
+import gzip
+import html as html_module
+import os
+import posixpath
+import tempfile
+import urllib.parse
+
+from common import load_app
+from first_load_bytes import PAGES, ACCEPT, references, decoded
+from app import assets, vendor
+
+# Stylesheets that load their fonts from yet another host
+FOLLOW_UP = {vendor.POPPINS: 'https://fonts.gstatic.com/s/poppins/'}
+
+def cdn_bytes(url, cache):
+    """Transfer size of a CDN file from its cached upstream copy, or None"""
+    for name, upstream in vendor.UPSTREAM.items():
+        if upstream != url:
+            continue
+        path = os.path.join(cache, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            data = f.read()
+        size = len(gzip.compress(data))
+        if name.endswith('all.min.css'):
+            # The stylesheet pulls in the three webfonts (shipped as woff2, about 40% of the TrueType size)
+            fonts = [os.path.join(cache, 'fontawesome', 'webfonts', f) for f in os.listdir(os.path.join(
+                cache, 'fontawesome', 'webfonts'))]
+            size += sum(os.path.getsize(f) * (1 if f.endswith('.woff2') else 0.4) for f in fonts)
+        return int(size)
+    return None
+
+def vendor_load(client, html):
+    """(requests, bytes) for the self-hosted vendor files a page loads"""
+    queue = [u for u in references(html, '/') if u.startswith('/static/') and '/vendor/' in u]
+    seen, total = set(), 0
+    while queue:
+        url = queue.pop()
+        if url in seen:
+            continue
+        seen.add(url)
+        response = client.get(url, headers=ACCEPT)
+        total += len(response.data)
+        if url.endswith('.css'):
+            queue += [u for u in references(decoded(response).decode('utf-8'), posixpath.dirname(url))
+                      if u.startswith('/static/')]
+        response.close()
+    return len(seen), total
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cache', default=vendor.CACHE_DIR)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = load_app(os.path.join(tmp, 'bench.db'))
+        app.config['PAGE_CACHE_ENABLED'] = False
+        client = app.test_client()
+        assets.build(app.static_folder)
+        app.extensions['assets_manifest'] = assets.load_manifest(app.static_folder) or {}
+        self_hosted = app.jinja_env.globals['vendor_url']
+
+        print(f"{'page':<14}{'3rd-party requests':>20}{'origins':>10}{'vendor KB (CDN -> self-hosted)':>34}")
+        for page in PAGES:
+            app.jinja_env.globals['vendor_url'] = vendor.FALLBACKS.get
+            html = client.get(page).data.decode('utf-8')
+            external = [html_module.unescape(u) for u in references(html, '/') if u.startswith(('http://', 'https://'))]
+            external += [FOLLOW_UP[u] for u in external if u in FOLLOW_UP]
+            sizes = [cdn_bytes(u, args.cache) for u in external if u in vendor.FALLBACKS.values()]
+            before = f'{sum(size for size in sizes if size) / 1024:.1f}' + ('+?' if None in sizes else '')
+
+            app.jinja_env.globals['vendor_url'] = self_hosted
+            html = client.get(page).data.decode('utf-8')
+            remaining = [html_module.unescape(u) for u in references(html, '/') if u.startswith(('http://', 'https://'))]
+            remaining += [FOLLOW_UP[u] for u in remaining if u in FOLLOW_UP]
+            _, after = vendor_load(client, html)
+
+            origins = lambda urls: len({urllib.parse.urlsplit(u).netloc for u in urls})
+            print(f"{page:<14}{len(external):>10} -> {len(remaining):<6}{origins(external):>4} -> {origins(remaining):<3}"
+                  f"{before:>20} -> {after / 1024:.1f}")
+        if remaining:
+            print("Still loaded from CDNs (not built yet): " + ', '.join(sorted(set(remaining))))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Read throughput with and without concurrent writes.
+
+Runs reader threads against a scratch copy of the schema for a fixed time,
+first alone and then alongside writer threads, once with the old rollback
+journal and direct commits and once with WAL and the single-writer queue.
+
+    python benchmarks/wal_read_throughput.py [--rows 20000] [--seconds 3]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.database import configure_connection
+from app.models.writer import WriteQueue
+
+SCHEMA = '''
+    CREATE TABLE jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        description TEXT NOT NULL,
+        location TEXT,
+        contact TEXT NOT NULL,
+        category TEXT,
+        user_id INTEGER NOT NULL,
+        posted_date TIMESTAMP NOT NULL
+    )
+'''
+
+READ_SQL = 'SELECT id, title, location, category FROM jobs WHERE category = ? ORDER BY posted_date DESC LIMIT 20'
+WRITE_SQL = 'INSERT INTO jobs (title, description, location, contact, category, user_id, posted_date) VALUES (?, ?, ?, ?, ?, ?, ?)'
+CATEGORIES = ['Agriculture', 'Labor', 'Tutoring', 'Skilled Trade', 'Other']
+
+def seed(path, rows, wal):
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode = %s' % ('WAL' if wal else 'DELETE'))
+    conn.execute(SCHEMA)
+    start = datetime(2024, 1, 1)
+    conn.executemany(WRITE_SQL, (
+        (f'Job {i}', 'Seeded job description ' * 5, 'Village', '9999999999',
+         CATEGORIES[i % len(CATEGORIES)], 1, start + timedelta(minutes=i))
+        for i in range(rows)))
+    conn.commit()
+    conn.close()
+
+def open_reader(path, wal):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    if wal:
+        configure_connection(conn)
+    else:
+        conn.execute('PRAGMA busy_timeout = 5000')
+    return conn
+
+def run(path, wal, readers, writers, seconds):
+    stop = threading.Event()
+    reads = [0] * readers
+    writes = [0] * max(writers, 1)
+    writer_queue = WriteQueue(path) if wal and writers else None
+
+    def read_loop(i):
+        conn = open_reader(path, wal)
+        n = 0
+        while not stop.is_set():
+            conn.execute(READ_SQL, (CATEGORIES[n % len(CATEGORIES)],)).fetchall()
+            n += 1
+        reads[i] = n
+        conn.close()
+
+    def write_loop(i):
+        params = ('New job', 'Posted during benchmark', 'Village', '1', 'Labor', 1, datetime.now())
+        if writer_queue:
+            while not stop.is_set():
+                writer_queue.submit(lambda conn: conn.execute(WRITE_SQL, params)).result()
+                writes[i] += 1
+        else:
+            conn = open_reader(path, wal)
+            while not stop.is_set():
+                conn.execute(WRITE_SQL, params)
+                conn.commit()
+                writes[i] += 1
+            conn.close()
+
+    threads = [threading.Thread(target=read_loop, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=write_loop, args=(i,)) for i in range(writers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return sum(reads) / seconds, (sum(writes) / seconds if writers else 0.0)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--seconds', type=float, default=3)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    args = parser.parse_args()
+
+    print(f"{'mode':<28}{'reads/s idle':>14}{'reads/s + writes':>18}{'writes/s':>10}")
+    for wal, label in ((False, 'rollback journal, direct'), (True, 'WAL, single-writer queue')):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.db')
+            seed(path, args.rows, wal)
+            idle, _ = run(path, wal, args.readers, 0, args.seconds)
+            loaded, write_rate = run(path, wal, args.readers, args.writers, args.seconds)
+        print(f"{label:<28}{idle:>14.0f}{loaded:>18.0f}{write_rate:>10.0f}")
+
+if __name__ == '__main__':
+    main()
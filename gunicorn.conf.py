@@ -0,0 +1,59 @@
+"""
+Gunicorn settings for running GrameenConnect in production.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+A pre-fork master with GRAMEENCONNECT_WORKERS processes (2 x CPUs + 1 by
+default), each serving GRAMEENCONNECT_THREADS requests at a time. The
+master brings the schema up to date once before forking, so workers only
+open their own connections, writer thread and task workers (see
+_reset_after_fork in app/models/database.py, writer.py and tasks.py).
+
+Send the master SIGHUP to reload: it migrates the database, starts workers
+with the new code and lets the old ones finish their requests within
+graceful_timeout.
+"""
+import glob
+import multiprocessing
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+bind = os.environ.get('GRAMEENCONNECT_BIND', '0.0.0.0:8080')
+workers = int(os.environ.get('GRAMEENCONNECT_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+# No more than the connection pool holds, so requests don't wait for a connection
+threads = int(os.environ.get('GRAMEENCONNECT_THREADS', 4))
+timeout = 60            # uploads on slow rural links take a while
+graceful_timeout = 30   # seconds old workers get to finish their requests on reload or shutdown
+keepalive = 5
+# Recycle workers now and then so a slow leak can't grow without bound
+max_requests = 2000
+max_requests_jitter = 200
+# Import the app in each worker rather than the master, so SIGHUP picks up new code
+preload_app = False
+accesslog = '-'
+
+# Each worker has its own in-process page cache; share invalidations through disk
+os.environ.setdefault('GRAMEENCONNECT_PAGE_CACHE_DIR', os.path.join(ROOT, 'page-cache'))
+# ... and their request metrics, so /metrics reports the whole server whichever worker answers
+os.environ.setdefault('GRAMEENCONNECT_METRICS_DIR', os.path.join(ROOT, 'metrics'))
+
+def _migrate(server):
+    # In a child process, so the master never holds a connection or imports the app
+    server.log.info("Bringing the database schema up to date")
+    subprocess.run([sys.executable, '-m', 'app.models.database'], cwd=ROOT, check=True)
+
+def on_starting(server):
+    _migrate(server)
+    # Counters restart with the server, as Prometheus expects
+    for name in glob.glob(os.path.join(os.environ['GRAMEENCONNECT_METRICS_DIR'], '*.json')):
+        os.remove(name)
+
+def on_reload(server):
+    try:
+        _migrate(server)
+    except subprocess.CalledProcessError as e:
+        server.log.error(f"Migration failed, new workers will report not ready: {e}")
@@ -0,0 +1,11 @@
+"""
+WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Set up the schema first with `python -m app.models.database`;
+gunicorn.conf.py does this before starting workers.
+"""
+from app import create_app
+
+app = application = create_app()